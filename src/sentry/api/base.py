@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import contextlib
 import functools
 import logging
 import time
@@ -192,6 +193,18 @@ class Endpoint(APIView):
                 rv.user = orig_user
         return rv
 
+    def serializer_memo(self, request: Request):
+        """
+        Share model instances loaded by serializers for the whole request.
+        Only safe requests do so, as others may change rows after they have
+        been loaded.
+        """
+        from sentry.api.serializers.base import serializer_memo
+
+        if request.method in ("GET", "HEAD"):
+            return serializer_memo()
+        return contextlib.nullcontext()
+
     @csrf_exempt
     @allow_cors_options
     def dispatch(self, request: Request, *args, **kwargs) -> Response:
@@ -250,7 +263,7 @@ class Endpoint(APIView):
             with sentry_sdk.start_span(
                 op="base.dispatch.execute",
                 description=f"{type(self).__name__}.{handler.__name__}",
-            ):
+            ), self.serializer_memo(request):
                 response = handler(request, *args, **kwargs)
 
         except Exception as exc:
@@ -1,5 +1,6 @@
 import re
-from collections import namedtuple
+import threading
+from collections import OrderedDict, namedtuple
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
@@ -28,6 +29,7 @@ from sentry.search.utils import (
     parse_numeric_value,
     parse_percentage,
 )
+from sentry.utils import metrics
 from sentry.utils.compat import filter, map
 from sentry.utils.snuba import is_duration_measurement, is_measurement, is_span_op_breakdown
 from sentry.utils.validators import is_event_id, is_span_id
@@ -465,6 +467,9 @@ class SearchVisitor(NodeVisitor):
             config = SearchConfig()
         self.config = config
         self.params = params if params is not None else {}
+        # Whether the result only depends on the query and config, and not on
+        # `params` or the current time.
+        self.is_cacheable = True
 
     @cached_property
     def key_mappings_lookup(self):
@@ -598,6 +603,7 @@ class SearchVisitor(NodeVisitor):
 
     def visit_rel_date_filter(self, node, children):
         (search_key, _, value) = children
+        self.is_cacheable = False
 
         if self.is_date_key(search_key.name):
             try:
@@ -696,6 +702,7 @@ class SearchVisitor(NodeVisitor):
 
     def visit_aggregate_duration_filter(self, node, children):
         (negation, search_key, _, operator, search_value) = children
+        self.is_cacheable = False
         operator = handle_negation(negation, operator)
 
         try:
@@ -730,6 +737,7 @@ class SearchVisitor(NodeVisitor):
 
     def visit_aggregate_percentage_filter(self, node, children):
         (negation, search_key, _, operator, search_value) = children
+        self.is_cacheable = False
         operator = handle_negation(negation, operator)
 
         aggregate_value = None
@@ -780,6 +788,7 @@ class SearchVisitor(NodeVisitor):
 
     def visit_aggregate_rel_date_filter(self, node, children):
         (negation, search_key, _, operator, search_value) = children
+        self.is_cacheable = False
         operator = handle_negation(negation, operator)
         is_date_aggregate = any(key in search_key.name for key in self.config.date_keys)
         if is_date_aggregate:
@@ -1067,10 +1076,57 @@ default_config = SearchConfig(
 )
 
 
+# Number of parsed queries kept by `parse_search_query`.
+PARSE_CACHE_SIZE = 1000
+
+# Marks cached queries whose result depends on `params` or the current time.
+_UNCACHEABLE = object()
+
+# (query, id(config)) -> (config, parsed query)
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def _get_cached_parse(cache_key, config):
+    with _parse_cache_lock:
+        entry = _parse_cache.get(cache_key)
+        # Entries reference their config, so its id cannot have been reused.
+        if entry is None or entry[0] is not config:
+            return None
+        _parse_cache.move_to_end(cache_key)
+        return entry[1]
+
+
+def _set_cached_parse(cache_key, config, result):
+    with _parse_cache_lock:
+        _parse_cache[cache_key] = (config, result)
+        _parse_cache.move_to_end(cache_key)
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+
+
 def parse_search_query(query, config=None, params=None) -> Sequence[SearchFilter]:
+    """
+    Parses a search query into a list of search filters.
+
+    Parsed queries are kept in a process-local LRU keyed by the query and
+    config, unless the result also depends on `params` (aggregate filters
+    resolving functions) or on the current time (relative dates).
+    """
     if config is None:
         config = default_config
 
+    cache_key = (query, id(config))
+    cached = _get_cached_parse(cache_key, config)
+    if cached is not None and cached is not _UNCACHEABLE:
+        metrics.incr("event_search.parse_cache", tags={"result": "hit"})
+        # Callers are free to modify the returned list
+        return list(cached)
+    metrics.incr(
+        "event_search.parse_cache",
+        tags={"result": "miss" if cached is None else "uncacheable"},
+    )
+
     try:
         tree = event_search_grammar.parse(query)
     except IncompleteParseError as e:
@@ -1083,4 +1139,12 @@ def parse_search_query(query, config=None, params=None) -> Sequence[SearchFilter
                 "This is commonly caused by unmatched parentheses. Enclose any text in double quotes.",
             )
         )
-    return SearchVisitor(config, params=params).visit(tree)
+
+    visitor = SearchVisitor(config, params=params)
+    result = visitor.visit(tree)
+    if not visitor.is_cacheable:
+        _set_cached_parse(cache_key, config, _UNCACHEABLE)
+        return result
+
+    _set_cached_parse(cache_key, config, result)
+    return list(result)
@@ -1,5 +1,6 @@
 import bisect
 import functools
+import heapq
 import math
 from datetime import datetime
 
@@ -388,6 +389,24 @@ class SequencePaginator:
         self.max_limit = max_limit
         self.on_results = on_results
 
+    def extend(self, data):
+        """
+        Adds more ``(score, value)`` pairs, merging them into the already
+        sorted sequence rather than sorting everything again.
+        """
+        if not data:
+            return
+        merged = list(
+            heapq.merge(
+                zip(self.scores, self.values),
+                sorted(data, reverse=self.reverse),
+                reverse=self.reverse,
+            )
+        )
+        # `self.search` is bound to the scores list, so update it in place.
+        self.scores[:] = [score for score, _ in merged]
+        self.values[:] = [value for _, value in merged]
+
     def get_result(self, limit, cursor=None, count_hits=False, known_hits=None, max_hits=None):
         limit = min(limit, self.max_limit)
 
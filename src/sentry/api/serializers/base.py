@@ -1,6 +1,12 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import (
     Any,
     Callable,
+    Dict,
+    Generator,
+    Iterable,
     List,
     Mapping,
     MutableMapping,
@@ -13,13 +19,135 @@ from typing import (
 
 import sentry_sdk
 from django.contrib.auth.models import AnonymousUser
+from django.db import close_old_connections
+from django.db.models import Model
+from sentry_sdk import Hub
 
+from sentry import options
 from sentry.utils.json import JSONData
 
 K = TypeVar("K")
 
 registry: MutableMapping[Any, Any] = {}
 
+# Runs the fetches of `Serializer.fetch_concurrently`. This is separate from
+# the Snuba query thread pool, as fetches themselves may submit bulk queries
+# to that one and wait for them.
+_fetch_thread_pool = ThreadPoolExecutor(max_workers=20)
+_fetch_local = threading.local()
+_memo_local = threading.local()
+
+
+class SerializerMemo:
+    """
+    Model instances loaded while serializing, keyed by `(model, pk)`.
+
+    Nested `serialize` calls share the memo of the outermost one, so rows that
+    several serializers need (such as the projects and users referenced by
+    groups, releases and alerts) are only queried once. Rows that do not
+    exist are remembered as well.
+    """
+
+    def __init__(self) -> None:
+        self._instances: Dict[Any, Optional[Model]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, instances: Iterable[Model]) -> None:
+        """Remember instances that were loaded elsewhere."""
+        with self._lock:
+            for instance in instances:
+                self._instances[(type(instance), instance.pk)] = instance
+
+    def get_many(self, model: Type[Model], ids: Iterable[Any]) -> Dict[Any, Model]:
+        """
+        Return a mapping of ids to instances of `model`, fetching the ones that
+        are not in the memo in a single query. Missing ids are left out.
+        """
+        ids = set(ids)
+        with self._lock:
+            missing = [id for id in ids if (model, id) not in self._instances]
+
+        if missing:
+            fetched = model.objects.in_bulk(missing)
+            with self._lock:
+                for id in missing:
+                    self._instances.setdefault((model, id), fetched.get(id))
+
+        with self._lock:
+            instances = {id: self._instances[(model, id)] for id in ids}
+        return {id: instance for id, instance in instances.items() if instance is not None}
+
+    def load(self, dependencies: Mapping[Type[Model], Iterable[Any]]) -> None:
+        """Fetch the ids of every model in `dependencies`, one query per model."""
+        for model, ids in dependencies.items():
+            self.get_many(model, ids)
+
+    def attach(self, item_list: Sequence[Model], field_name: str) -> None:
+        """
+        Set the foreign key `field_name` on every item from the memo, so that
+        accessing it does not issue a query per item.
+        """
+        if not item_list:
+            return
+
+        field = item_list[0]._meta.get_field(field_name)
+        cached = [item for item in item_list if field.is_cached(item)]
+        self.add(instance for instance in map(field.get_cached_value, cached) if instance)
+
+        uncached = [item for item in item_list if not field.is_cached(item)]
+        related = self.get_many(
+            field.related_model, {getattr(item, field.attname) for item in uncached}
+        )
+        for item in uncached:
+            instance = related.get(getattr(item, field.attname))
+            if instance is not None:
+                setattr(item, field_name, instance)
+
+
+def get_serializer_memo() -> SerializerMemo:
+    """
+    Return the memo of the current `serialize` call, or an empty one when
+    called outside of it.
+    """
+    memo = getattr(_memo_local, "memo", None)
+    return memo if memo is not None else SerializerMemo()
+
+
+@contextmanager
+def serializer_memo(memo: Optional[SerializerMemo] = None) -> Generator[SerializerMemo, None, None]:
+    """
+    Share a memo between all `serialize` calls in this block, for example to
+    reuse instances across multiple calls while handling a request. Within an
+    active block, the existing memo is reused.
+    """
+    previous = getattr(_memo_local, "memo", None)
+    if memo is None:
+        memo = previous if previous is not None else SerializerMemo()
+    _memo_local.memo = memo
+    try:
+        yield memo
+    finally:
+        _memo_local.memo = previous
+
+
+def _run_fetch(name: str, fetch: Callable[[], Any]) -> Any:
+    with sentry_sdk.start_span(op="serialize.get_attrs.fetch", description=name):
+        return fetch()
+
+
+def _run_fetch_in_thread(
+    hub: Hub, memo: SerializerMemo, name: str, fetch: Callable[[], Any]
+) -> Any:
+    # Worker threads keep their database connections between fetches, so
+    # drop the ones that errored or outlived `CONN_MAX_AGE`.
+    close_old_connections()
+    _fetch_local.in_worker = True
+    try:
+        with hub, serializer_memo(memo):
+            return _run_fetch(name, fetch)
+    finally:
+        _fetch_local.in_worker = False
+
 
 def register(type: Any) -> Callable[[Type[K]], Type[K]]:
     """A wrapper that adds the wrapped Serializer to the Serializer registry (see above) for the key `type`."""
@@ -69,17 +197,24 @@ def serialize(
         else:
             return objects
 
-    with sentry_sdk.start_span(op="serialize", description=type(serializer).__name__) as span:
+    with sentry_sdk.start_span(
+        op="serialize", description=type(serializer).__name__
+    ) as span, serializer_memo() as memo:
         span.set_data("Object Count", len(objects))
 
+        # avoid passing NoneType's to the serializer as they're allowed and
+        # filtered out of serialize()
+        item_list = [o for o in objects if o is not None]
+
+        dependencies = serializer.get_dependencies(item_list=item_list, user=user, **kwargs)
+        if dependencies:
+            with sentry_sdk.start_span(
+                op="serialize.get_dependencies", description=type(serializer).__name__
+            ):
+                memo.load(dependencies)
+
         with sentry_sdk.start_span(op="serialize.get_attrs", description=type(serializer).__name__):
-            attrs = serializer.get_attrs(
-                # avoid passing NoneType's to the serializer as they're allowed and
-                # filtered out of serialize()
-                item_list=[o for o in objects if o is not None],
-                user=user,
-                **kwargs,
-            )
+            attrs = serializer.get_attrs(item_list=item_list, user=user, **kwargs)
 
         with sentry_sdk.start_span(op="serialize.iterate", description=type(serializer).__name__):
             return [serializer(o, attrs=attrs.get(o, {}), user=user, **kwargs) for o in objects]
@@ -96,6 +231,20 @@ class Serializer:
             return None
         return self.serialize(obj, attrs, user, **kwargs)
 
+    def get_dependencies(
+        self, item_list: List[Any], user: Any, **kwargs: Any
+    ) -> Mapping[Type[Model], Iterable[Any]]:
+        """
+        Declare the rows `get_attrs` reads through `get_serializer_memo()`, so
+        they are loaded with one query per model before it is called.
+
+        :param item_list: List of input objects that should be serialized.
+        :param user: The user who will be viewing the objects.
+        :param kwargs: Any
+        :returns A mapping of model classes to the ids of the rows needed.
+        """
+        return {}
+
     def get_attrs(self, item_list: List[Any], user: Any, **kwargs: Any) -> MutableMapping[Any, Any]:
         """
         Fetch all of the associated data needed to serialize the objects in `item_list`.
@@ -107,6 +256,37 @@ class Serializer:
         """
         return {}
 
+    def fetch_concurrently(
+        self, fetches: Mapping[str, Callable[[], Any]]
+    ) -> MutableMapping[str, Any]:
+        """
+        Run independent fetches needed by `get_attrs`, each in its own span.
+
+        With `api.serializers.concurrent-fetches` enabled, the first fetch runs
+        on the calling thread while the others run on a thread pool. Fetches
+        called from within another fetch always run one after another.
+
+        :param fetches: A mapping of names to functions without arguments.
+        :returns A mapping of the names to the results of the fetches.
+        """
+        if (
+            len(fetches) < 2
+            or getattr(_fetch_local, "in_worker", False)
+            or not options.get("api.serializers.concurrent-fetches")
+        ):
+            return {name: _run_fetch(name, fetch) for name, fetch in fetches.items()}
+
+        (first_name, first_fetch), *others = fetches.items()
+        futures = {
+            name: _fetch_thread_pool.submit(
+                _run_fetch_in_thread, Hub(Hub.current), get_serializer_memo(), name, fetch
+            )
+            for name, fetch in others
+        }
+        results = {first_name: _run_fetch(first_name, first_fetch)}
+        results.update((name, future.result()) for name, future in futures.items())
+        return results
+
     def serialize(
         self, obj: Any, attrs: Mapping[Any, Any], user: Any, **kwargs: Any
     ) -> MutableMapping[str, JSONData]:
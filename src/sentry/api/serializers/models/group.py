@@ -9,11 +9,11 @@ from typing import Iterable, Mapping, Optional, Sequence, Tuple, TypedDict
 import pytz
 import sentry_sdk
 from django.conf import settings
-from django.db.models import Min, prefetch_related_objects
+from django.db.models import Min
 from django.utils import timezone
 
 from sentry import release_health, tagstore, tsdb
-from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers import Serializer, get_serializer_memo, register, serialize
 from sentry.api.serializers.models.actor import ActorSerializer
 from sentry.api.serializers.models.plugin import is_plugin_deprecated
 from sentry.api.serializers.models.user import UserSerializerResponse
@@ -290,7 +290,9 @@ class GroupSerializerBase(Serializer):
 
         # Note that organization is necessary here for use in `_get_permalink` to avoid
         # making unnecessary queries.
-        prefetch_related_objects(item_list, "project__organization")
+        memo = get_serializer_memo()
+        memo.attach(item_list, "project")
+        memo.attach([item.project for item in item_list], "organization")
 
         if user.is_authenticated and item_list:
             bookmarks = set(
@@ -353,7 +355,7 @@ class GroupSerializerBase(Serializer):
         actor_ids = {r[-1] for r in release_resolutions.values()}
         actor_ids.update(r.actor_id for r in ignore_items.values())
         if actor_ids:
-            users = list(User.objects.filter(id__in=actor_ids, is_active=True))
+            users = [u for u in memo.get_many(User, actor_ids).values() if u.is_active]
             actors = {u.id: d for u, d in zip(users, serialize(users, user))}
         else:
             actors = {}
@@ -987,18 +989,21 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
                 start=self.start,
                 end=self.end,
             )
-            time_range_result = partial_execute_seen_stats_query()
-            filtered_result = (
-                partial_execute_seen_stats_query(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
-            )
-            if not self._collapse("lifetime"):
-                lifetime_result = (
-                    partial_execute_seen_stats_query(start=None, end=None)
-                    if self.start or self.end
-                    else time_range_result
+            fetches = {"time_range": partial_execute_seen_stats_query}
+            if self.conditions and not self._collapse("filtered"):
+                fetches["filtered"] = functools.partial(
+                    partial_execute_seen_stats_query, conditions=self.conditions
+                )
+            if not self._collapse("lifetime") and (self.start or self.end):
+                fetches["lifetime"] = functools.partial(
+                    partial_execute_seen_stats_query, start=None, end=None
                 )
+            results = self.fetch_concurrently(fetches)
+
+            time_range_result = results["time_range"]
+            filtered_result = results.get("filtered")
+            if not self._collapse("lifetime"):
+                lifetime_result = results.get("lifetime", time_range_result)
             else:
                 lifetime_result = None
 
@@ -1021,82 +1026,99 @@ class StreamGroupSerializerSnuba(GroupSerializerSnuba, GroupStatsMixin):
             **query_params,
         )
 
+    def _get_session_counts(self, item_list):
+        uniq_project_ids = list({item.project_id for item in item_list})
+        cache_keys = {pid: self._build_session_cache_key(pid) for pid in uniq_project_ids}
+        cache_data = cache.get_many(cache_keys.values())
+        session_counts = {}
+        missed_items = []
+        for item in item_list:
+            num_sessions = cache_data.get(cache_keys[item.project_id])
+            if num_sessions is None:
+                found = "miss"
+                missed_items.append(item)
+            else:
+                found = "hit"
+                session_counts[item] = num_sessions
+            metrics.incr(f"group.get_session_counts.{found}")
+
+        if missed_items:
+            project_ids = list({item.project_id for item in missed_items})
+            project_sessions = release_health.get_num_sessions_per_project(
+                project_ids,
+                self.start,
+                self.end,
+                self.environment_ids,
+            )
+
+            results = {}
+            for project_id, count in project_sessions:
+                cache_key = self._build_session_cache_key(project_id)
+                results[project_id] = count
+                cache.set(cache_key, count, 3600)
+
+            for item in missed_items:
+                session_counts[item] = results.get(item.project_id)
+
+        return session_counts
+
     def get_attrs(self, item_list, user):
+        # All of these are independent of each other, see `fetch_concurrently`.
+        fetches = {}
         if not self._collapse("base"):
-            attrs = super().get_attrs(item_list, user)
+            fetches["base"] = functools.partial(super().get_attrs, item_list, user)
         else:
-            seen_stats = self._get_seen_stats(item_list, user)
-            if seen_stats:
-                attrs = {item: seen_stats.get(item, {}) for item in item_list}
-            else:
-                attrs = {item: {} for item in item_list}
+            fetches["seen_stats"] = functools.partial(self._get_seen_stats, item_list, user)
 
         if self.stats_period and not self._collapse("stats"):
             partial_get_stats = functools.partial(
                 self.get_stats, item_list=item_list, user=user, environment_ids=self.environment_ids
             )
-            stats = partial_get_stats()
-            filtered_stats = (
-                partial_get_stats(conditions=self.conditions)
-                if self.conditions and not self._collapse("filtered")
-                else None
-            )
+            fetches["stats"] = partial_get_stats
+            if self.conditions and not self._collapse("filtered"):
+                fetches["filtered_stats"] = functools.partial(
+                    partial_get_stats, conditions=self.conditions
+                )
+            if self._expand("sessions"):
+                fetches["sessions"] = functools.partial(self._get_session_counts, item_list)
+
+        if self._expand("inbox"):
+            fetches["inbox"] = functools.partial(get_inbox_details, item_list)
+
+        if self._expand("owners"):
+            fetches["owners"] = functools.partial(get_owner_details, item_list)
+
+        results = self.fetch_concurrently(fetches)
+
+        if not self._collapse("base"):
+            attrs = results["base"]
+        else:
+            seen_stats = results["seen_stats"]
+            if seen_stats:
+                attrs = {item: seen_stats.get(item, {}) for item in item_list}
+            else:
+                attrs = {item: {} for item in item_list}
+
+        if "stats" in results:
+            stats = results["stats"]
+            filtered_stats = results.get("filtered_stats")
             for item in item_list:
                 if filtered_stats:
                     attrs[item].update({"filtered_stats": filtered_stats[item.id]})
                 attrs[item].update({"stats": stats[item.id]})
 
-            if self._expand("sessions"):
-                uniq_project_ids = list({item.project_id for item in item_list})
-                cache_keys = {pid: self._build_session_cache_key(pid) for pid in uniq_project_ids}
-                cache_data = cache.get_many(cache_keys.values())
-                missed_items = []
-                for item in item_list:
-                    num_sessions = cache_data.get(cache_keys[item.project_id])
-                    if num_sessions is None:
-                        found = "miss"
-                        missed_items.append(item)
-                    else:
-                        found = "hit"
-                        attrs[item].update(
-                            {
-                                "sessionCount": num_sessions,
-                            }
-                        )
-                    metrics.incr(f"group.get_session_counts.{found}")
-
-                if missed_items:
-                    project_ids = list({item.project_id for item in missed_items})
-                    project_sessions = release_health.get_num_sessions_per_project(
-                        project_ids,
-                        self.start,
-                        self.end,
-                        self.environment_ids,
-                    )
-
-                    results = {}
-                    for project_id, count in project_sessions:
-                        cache_key = self._build_session_cache_key(project_id)
-                        results[project_id] = count
-                        cache.set(cache_key, count, 3600)
-
-                    for item in missed_items:
-                        if item.project_id in results.keys():
-                            attrs[item].update(
-                                {
-                                    "sessionCount": results[item.project_id],
-                                }
-                            )
-                        else:
-                            attrs[item].update({"sessionCount": None})
+        if "sessions" in results:
+            session_counts = results["sessions"]
+            for item in item_list:
+                attrs[item].update({"sessionCount": session_counts[item]})
 
-        if self._expand("inbox"):
-            inbox_stats = get_inbox_details(item_list)
+        if "inbox" in results:
+            inbox_stats = results["inbox"]
             for item in item_list:
                 attrs[item].update({"inbox": inbox_stats.get(item.id)})
 
-        if self._expand("owners"):
-            owner_details = get_owner_details(item_list)
+        if "owners" in results:
+            owner_details = results["owners"]
             for item in item_list:
                 attrs[item].update({"owners": owner_details.get(item.id)})
 
@@ -4,7 +4,7 @@ from django.core.cache import cache
 from django.db.models import Sum
 
 from sentry import release_health, tagstore
-from sentry.api.serializers import Serializer, register, serialize
+from sentry.api.serializers import Serializer, get_serializer_memo, register, serialize
 from sentry.db.models.query import in_iexact
 from sentry.models import (
     Commit,
@@ -309,6 +309,9 @@ class ReleaseSerializer(Serializer):
 
         return release_project_envs
 
+    def get_dependencies(self, item_list, user, **kwargs):
+        return {User: {i.owner_id for i in item_list if i.owner_id}}
+
     def get_attrs(self, item_list, user, **kwargs):
         project = kwargs.get("project")
 
@@ -352,7 +355,11 @@ class ReleaseSerializer(Serializer):
                 issue_counts_by_release,
             ) = self.__get_release_data_with_environments(release_project_envs)
 
-        owners = {d["id"]: d for d in serialize({i.owner for i in item_list if i.owner_id}, user)}
+        owner_ids = {i.owner_id for i in item_list if i.owner_id}
+        owners = {
+            d["id"]: d
+            for d in serialize(list(get_serializer_memo().get_many(User, owner_ids).values()), user)
+        }
 
         release_metadata_attrs = self._get_commit_metadata(item_list, user)
         deploy_metadata_attrs = self._get_deploy_metadata(item_list, user)
@@ -1,6 +1,11 @@
 import logging
+from collections import defaultdict
 
-from django.db.models import F
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router
+from django.db.models import F, Model
+from django.db.models.expressions import BaseExpression
+from psycopg2.extras import execute_values
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
@@ -88,3 +93,164 @@ class Buffer(Service, metaclass=BufferMount):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, batch):
+        """
+        Applies many buffered increments for ``model`` at once. ``batch`` is a
+        list of ``(columns, filters, extra, signal_only)`` tuples as they would
+        be passed to ``process``.
+
+        Increments that touch the same set of columns are written with a single
+        ``UPDATE ... FROM (VALUES ...)`` statement. Rows that do not exist yet
+        and increments that cannot be expressed that way go through ``process``.
+        """
+        shapes = defaultdict(list)
+        seen = set()
+        for item in batch:
+            shape = self._get_batch_shape(model, *item)
+            if shape is not None:
+                # A row can only be updated once per statement.
+                row = (shape, tuple(sorted((k, getattr(v, "pk", v)) for k, v in item[1].items())))
+                if row not in seen:
+                    seen.add(row)
+                    shapes[shape].append(item)
+                    continue
+            self.process(model, *item)
+
+        for shape, items in shapes.items():
+            updated = self._update_from_values(model, shape, items)
+            for (columns, filters, extra, signal_only), was_updated in zip(items, updated):
+                if not was_updated:
+                    self.process(model, columns, filters, extra, signal_only)
+                    continue
+
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+    def _get_batch_shape(self, model, columns, filters, extra=None, signal_only=None):
+        """
+        Returns the ``(filters, columns, extra)`` field names describing the
+        statement for this increment, or ``None`` if it has to be processed on
+        its own.
+        """
+        from sentry.models import Group
+
+        if signal_only or not filters or not (columns or extra):
+            return None
+
+        for value in filters.values():
+            if isinstance(value, Model):
+                value = value.pk
+            # We need to be able to match up the returned rows with the filters
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                return None
+
+        extra = extra or {}
+        for name, value in extra.items():
+            if not isinstance(value, BaseExpression):
+                continue
+            # The score of groups is recomputed from `times_seen` and
+            # `last_seen`, same as in `process`.
+            if not (
+                model is Group
+                and name == "score"
+                and "times_seen" in columns
+                and "last_seen" in extra
+            ):
+                return None
+
+        shape = (
+            tuple(sorted(filters)),
+            tuple(sorted(columns)),
+            tuple(sorted(k for k, v in extra.items() if not isinstance(v, BaseExpression))),
+        )
+
+        connection = connections[router.db_for_write(model)]
+        for name in sum(shape, ()):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.db_type(connection) is None:
+                return None
+
+        return shape
+
+    def _update_from_values(self, model, shape, items):
+        """
+        Applies all ``items`` with one multi-row update. Returns a list of
+        booleans telling which of the items found an existing row.
+        """
+        from sentry.models import Group
+
+        filter_names, incr_names, extra_names = shape
+        connection = connections[router.db_for_write(model)]
+        quote_name = connection.ops.quote_name
+        fields = {name: model._meta.get_field(name) for name in sum(shape, ())}
+
+        aliases = []
+        casts = []
+        where = []
+        assignments = []
+        for prefix, names in (("f", filter_names), ("i", incr_names), ("e", extra_names)):
+            for idx, name in enumerate(names):
+                column = quote_name(fields[name].column)
+                alias = quote_name(f"{prefix}{idx}")
+                aliases.append(alias)
+                casts.append(f"%s::{fields[name].db_type(connection)}")
+                if prefix == "f":
+                    where.append(f"t.{column} = v.{alias}")
+                elif prefix == "i":
+                    assignments.append(f"{column} = t.{column} + v.{alias}")
+                else:
+                    assignments.append(f"{column} = v.{alias}")
+
+        if model is Group and "times_seen" in incr_names and "last_seen" in extra_names:
+            times_seen = quote_name("i%d" % incr_names.index("times_seen"))
+            last_seen = quote_name("e%d" % extra_names.index("last_seen"))
+            assignments.append(
+                f"{quote_name('score')} = log(t.{quote_name('times_seen')} + v.{times_seen}) * 600"
+                f" + floor(extract(epoch from v.{last_seen}))"
+            )
+
+        returning = ", ".join(f"t.{quote_name(fields[name].column)}" for name in filter_names)
+        sql = (
+            f"UPDATE {quote_name(model._meta.db_table)} AS t SET {', '.join(assignments)} "
+            f"FROM (VALUES %s) AS v ({', '.join(aliases)}) "
+            f"WHERE {' AND '.join(where)} RETURNING {returning}"
+        )
+
+        rows = []
+        keys = []
+        for columns, filters, extra, _ in items:
+            key = tuple(
+                fields[name].get_db_prep_value(
+                    filters[name].pk if isinstance(filters[name], Model) else filters[name],
+                    connection,
+                )
+                for name in filter_names
+            )
+            keys.append(key)
+            rows.append(
+                key
+                + tuple(
+                    fields[name].get_db_prep_value(columns[name], connection) for name in incr_names
+                )
+                + tuple(
+                    fields[name].get_db_prep_value(extra[name], connection) for name in extra_names
+                )
+            )
+
+        with connection.cursor() as cursor:
+            result = execute_values(
+                cursor, sql, rows, template=f"({', '.join(casts)})", page_size=len(rows), fetch=True
+            )
+
+        updated = {tuple(row) for row in result}
+        return [key in updated for key in keys]
@@ -1,12 +1,15 @@
 import pickle
 import threading
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from time import time
 
+import msgpack
 from django.db import models
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 
+from sentry import options
 from sentry.buffer import Buffer
 from sentry.exceptions import InvalidConfiguration
 from sentry.tasks.process_buffer import process_incr, process_pending
@@ -19,6 +22,51 @@ from sentry.utils.redis import get_cluster_from_options
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
+# Values written with the msgpack encoding start with this byte, which
+# neither pickle nor the legacy JSON encoding can produce. Bump it when
+# the encoding changes incompatibly.
+MSGPACK_ENCODING_V1 = b"\x01"
+
+_EXT_DATETIME = 1
+_EXT_MODEL = 2
+_EXT_SCORE_CLAUSE = 3
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _msgpack_default(value):
+    from sentry.event_manager import ScoreClause
+
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        delta = value - _EPOCH
+        micros = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        return msgpack.ExtType(_EXT_DATETIME, msgpack.packb(micros))
+    elif isinstance(value, models.Model):
+        model = type(value)
+        return msgpack.ExtType(
+            _EXT_MODEL, msgpack.packb([f"{model.__module__}.{model.__name__}", value.pk])
+        )
+    elif isinstance(value, ScoreClause):
+        # Only used as a marker, `Buffer.process` recomputes the score from
+        # `times_seen` and `last_seen`.
+        return msgpack.ExtType(_EXT_SCORE_CLAUSE, b"")
+    raise TypeError(type(value))
+
+
+def _msgpack_ext_hook(code, data):
+    from sentry.event_manager import ScoreClause
+
+    if code == _EXT_DATETIME:
+        return _EPOCH + timedelta(microseconds=msgpack.unpackb(data))
+    elif code == _EXT_MODEL:
+        path, pk = msgpack.unpackb(data, raw=False)
+        return import_string(path)(pk=pk)
+    elif code == _EXT_SCORE_CLAUSE:
+        return ScoreClause()
+    return msgpack.ExtType(code, data)
+
 
 class PendingBuffer:
     def __init__(self, size):
@@ -51,10 +99,17 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(self, pending_partitions=1, incr_batch_size=2, batch_flush=False, **options):
+        """
+        When ``batch_flush`` is enabled, each ``process_incr`` task drains
+        its ``incr_batch_size`` keys with one Redis round trip per host and
+        writes them with one ``UPDATE`` per model and column set. In that
+        mode ``incr_batch_size`` should be in the hundreds.
+        """
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        self.batch_flush = batch_flush
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
@@ -142,6 +197,36 @@ class RedisBuffer(Buffer):
         else:
             raise TypeError(f"invalid type: {type_}")
 
+    def _encode(self, value):
+        """
+        Encodes filters or an extra value for storage in the buffer hash.
+        Values that the msgpack encoding does not support are pickled.
+        """
+        if options.get("buffer.msgpack-encoding"):
+            try:
+                return MSGPACK_ENCODING_V1 + msgpack.packb(
+                    value, use_bin_type=True, default=_msgpack_default
+                )
+            except (TypeError, OverflowError):
+                metrics.incr("buffer.encode.pickle-fallback", skip_internal=False)
+        return pickle.dumps(value)
+
+    def _decode(self, value):
+        """
+        Decodes filters or an extra value in any of the formats we have
+        written: msgpack, the legacy JSON encoding, or pickle.
+        """
+        if value.startswith(MSGPACK_ENCODING_V1):
+            return msgpack.unpackb(
+                memoryview(value)[1:], raw=False, ext_hook=_msgpack_ext_hook, strict_map_key=False
+            )
+        elif value.startswith(b"{"):
+            return self._load_values(json.loads(value.decode("utf-8")))
+        elif value.startswith(b"["):
+            return self._load_value(json.loads(value.decode("utf-8")))
+        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+        return pickle.loads(value)
+
     def get(self, model, columns, filters):
         """
         Fetches buffered values for a model/filter. Passed columns must be integer columns.
@@ -179,10 +264,7 @@ class RedisBuffer(Buffer):
 
         pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        pipe.hsetnx(key, "f", self._encode(filters))
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
@@ -191,10 +273,7 @@ class RedisBuffer(Buffer):
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                pipe.hset(key, "e+" + column, self._encode(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
@@ -259,9 +338,43 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.batch_flush:
+            self._process_batch_incr(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
+    def _load_buffered_values(self, values):
+        """
+        Decodes the hash of a buffer key into the arguments for
+        ``Buffer.process``.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
+
+        filters = self._decode(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                extra_values[k[2:]] = self._decode(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -282,42 +395,88 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
             if not values:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))  # NOQA
-
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
+            model, incr_values, filters, extra_values, signal_only = self._load_buffered_values(
+                values
+            )
             super().process(model, incr_values, filters, extra_values, signal_only)
         finally:
             client.delete(lock_key)
+
+    def _process_batch_incr(self, keys):
+        """
+        Drains all given keys with a single pipeline per Redis host and
+        applies the increments grouped by model.
+        """
+        started = time()
+
+        # prevent a stampede due to the way we use celery etas + duplicate
+        # tasks
+        with self.cluster.map() as client:
+            acquired = {
+                key: client.set(self._make_lock_key(key), "1", nx=True, ex=10) for key in keys
+            }
+        locked_keys = [key for key, result in acquired.items() if result.value]
+
+        revoked = len(keys) - len(locked_keys)
+        if revoked:
+            metrics.incr(
+                "buffer.revoked", amount=revoked, tags={"reason": "locked"}, skip_internal=False
+            )
+
+        try:
+            router = self.cluster.get_router()
+            keys_by_host = defaultdict(list)
+            for key in locked_keys:
+                keys_by_host[router.get_host_for_key(key)].append(key)
+
+            results = {}
+            for host_id, host_keys in keys_by_host.items():
+                # Like in `_process_single_incr`, every key is read and deleted
+                # in a transaction so that no concurrent `incr` is lost. The
+                # pending set lives on the same host as the key itself, see
+                # `incr`.
+                pipe = self.cluster.get_local_client(host_id).pipeline(transaction=True)
+                for key in host_keys:
+                    pipe.hgetall(key)
+                    pipe.zrem(self._make_pending_key_from_key(key), key)
+                    pipe.delete(key)
+                # Every key has three replies, the first one being its values.
+                results.update(zip(host_keys, pipe.execute()[::3]))
+
+            by_model = defaultdict(list)
+            for key in locked_keys:
+                values = results[key]
+                if not values:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+
+                model, incr_values, filters, extra_values, signal_only = self._load_buffered_values(
+                    values
+                )
+                by_model[model].append((incr_values, filters, extra_values, signal_only))
+
+            metrics.timing("buffer.batch.redis-duration", time() - started)
+
+            for model, batch in by_model.items():
+                with metrics.timer(
+                    "buffer.batch.db-duration",
+                    tags={"module": model.__module__, "model": model.__name__},
+                ):
+                    self.process_batch(model, batch)
+                metrics.timing(
+                    "buffer.batch.size",
+                    len(batch),
+                    tags={"module": model.__module__, "model": model.__name__},
+                )
+        finally:
+            with self.cluster.map() as client:
+                for key in locked_keys:
+                    client.delete(self._make_lock_key(key))
+
+        metrics.timing("buffer.batch.duration", time() - started)
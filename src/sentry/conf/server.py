@@ -1354,6 +1354,9 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# The number of Snuba queries run in parallel by each process, which also
+# sizes the connection pool to Snuba.
+SENTRY_SNUBA_QUERY_CONCURRENCY = 10
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
@@ -1457,6 +1460,12 @@ SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 # e.g. memcached defaults to 1MB  = 1024 * 1024
 SENTRY_CACHE_MAX_VALUE_SIZE = None
 
+# Total size in bytes of the raw sourcemaps, and separately of the source
+# files, whose parsed views are kept in memory by each worker process so that
+# events of the same release do not parse them again. The parsed views take up
+# a multiple of this. Defaults to 0 which disables the caches.
+SENTRY_JS_PARSED_ARTIFACT_CACHE_SIZE = 0
+
 # Fields which managed users cannot change via Sentry UI. Username and password
 # cannot be changed by managed users. Optionally include 'email' and
 # 'name' in SENTRY_MANAGED_USER_FIELDS.
@@ -138,10 +138,31 @@ class NodeData(MutableMapping):
             See documentation of nodestore.
         """
 
+        subkeys = self._get_subkeys_to_write(subkeys)
+        if subkeys is not None:
+            nodestore.set_subkeys(self.id, subkeys)
+
+    @classmethod
+    def save_many(cls, nodes):
+        """
+        Write multiple nodes back to nodestore in one batch.
+
+        :param nodes: A list of ``(node_data, subkeys)`` tuples, see `save`.
+        """
+        items = {}
+        for node_data, subkeys in nodes:
+            subkeys = node_data._get_subkeys_to_write(subkeys)
+            if subkeys is not None:
+                items[node_data.id] = subkeys
+
+        if items:
+            nodestore.set_subkeys_multi(items)
+
+    def _get_subkeys_to_write(self, subkeys):
         # We never loaded any data for reading or writing, so there
         # is nothing to save.
         if self._node_data is None:
-            return
+            return None
 
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
@@ -151,8 +172,7 @@ class NodeData(MutableMapping):
 
         subkeys = subkeys or {}
         subkeys[None] = to_write
-
-        nodestore.set_subkeys(self.id, subkeys)
+        return subkeys
 
 
 class NodeField(GzippedDictField):
@@ -33,6 +33,7 @@ from sentry.constants import (
     DataCategory,
 )
 from sentry.culprit import generate_culprit
+from sentry.db.models import NodeData
 from sentry.eventstore.processing import event_processing_store
 from sentry.grouping.api import (
     BackgroundGroupingConfigLoader,
@@ -783,27 +784,33 @@ def _get_or_create_release_associated_models(jobs, projects):
 @metrics.wraps("save_event.tsdb_record_all_metrics")
 def _tsdb_record_all_metrics(jobs):
     """
-    Do all tsdb-related things for save_event in here s.t. we can potentially
-    put everything in a single redis pipeline someday.
+    Do all tsdb-related things for save_event in here, s.t. they are written
+    for all jobs with one pipeline per redis host.
     """
 
     # XXX: validate whether anybody actually uses those metrics
 
-    for job in jobs:
-        incrs = []
-        frequencies = []
-        records = []
+    incrs = []
+    frequencies = []
+    records = []
 
-        incrs.append((tsdb.models.project, job["project_id"]))
+    for job in jobs:
         event = job["event"]
         group = job["group"]
         release = job["release"]
         environment = job["environment"]
+        options = {"timestamp": event.datetime, "environment_id": environment.id}
+
+        incrs.append((tsdb.models.project, job["project_id"], options))
 
         if group:
-            incrs.append((tsdb.models.group, group.id))
+            incrs.append((tsdb.models.group, group.id, options))
             frequencies.append(
-                (tsdb.models.frequent_environments_by_group, {group.id: {environment.id: 1}})
+                (
+                    tsdb.models.frequent_environments_by_group,
+                    {group.id: {environment.id: 1}},
+                    {"timestamp": event.datetime},
+                )
             )
 
             if release:
@@ -811,34 +818,33 @@ def _tsdb_record_all_metrics(jobs):
                     (
                         tsdb.models.frequent_releases_by_group,
                         {group.id: {job["grouprelease"].id: 1}},
+                        {"timestamp": event.datetime},
                     )
                 )
 
         if release:
-            incrs.append((tsdb.models.release, release.id))
+            incrs.append((tsdb.models.release, release.id, options))
 
         user = job["user"]
 
         if user:
             project_id = job["project_id"]
-            records.append((tsdb.models.users_affected_by_project, project_id, (user.tag_value,)))
+            records.append(
+                (tsdb.models.users_affected_by_project, project_id, (user.tag_value,), options)
+            )
 
             if group:
-                records.append((tsdb.models.users_affected_by_group, group.id, (user.tag_value,)))
-
-        if incrs:
-            tsdb.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
-
-        if records:
-            tsdb.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
+                records.append(
+                    (tsdb.models.users_affected_by_group, group.id, (user.tag_value,), options)
+                )
 
-        if frequencies:
-            tsdb.record_frequency_multi(frequencies, timestamp=event.datetime)
+    tsdb.write_batch(increments=incrs, records=records, frequencies=frequencies)
 
 
 @metrics.wraps("save_event.nodestore_save_many")
 def _nodestore_save_many(jobs):
     inserted_time = datetime.utcnow().replace(tzinfo=UTC).timestamp()
+    nodes = []
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -853,7 +859,9 @@ def _nodestore_save_many(jobs):
                 subkeys["unprocessed"] = data
 
         job["event"].data["nodestore_insert"] = inserted_time
-        job["event"].data.save(subkeys=subkeys)
+        nodes.append((job["event"].data, subkeys))
+
+    NodeData.save_many(nodes)
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Any, Optional
+from typing import Any, Mapping, Optional, Sequence
 
 import sentry_sdk
 
@@ -46,6 +46,17 @@ class EventProcessingStore:
                 key = self.__get_unprocessed_key(key)
             return self.inner.get(key)
 
+    def get_many(self, keys: Sequence[str]) -> Mapping[str, Event]:
+        """
+        Fetch the events stored at `keys`. Missing events are left out.
+        """
+        with sentry_sdk.start_span(op="eventstore.processing.get_many"):
+            return dict(self.inner.get_many(keys))
+
+    def delete_many_by_key(self, keys: Sequence[str]) -> None:
+        with sentry_sdk.start_span(op="eventstore.processing.delete_many_by_key"):
+            self.inner.delete_many([*keys, *(self.__get_unprocessed_key(key) for key in keys)])
+
     def delete_by_key(self, key: str) -> None:
         with sentry_sdk.start_span(op="eventstore.processing.delete_by_key"):
             self.inner.delete(key)
@@ -11,7 +11,7 @@ from sentry.eventstream.kafka.protocol import (
     get_task_kwargs_for_message,
     get_task_kwargs_for_message_from_headers,
 )
-from sentry.tasks.post_process import post_process_group
+from sentry.tasks.post_process import post_process_group, post_process_group_batch
 from sentry.utils import metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -23,6 +23,13 @@ _DURATION_METRIC = "eventstream.duration"
 _CONCURRENCY_METRIC = "eventstream.concurrency"
 _MESSAGES_METRIC = "eventstream.messages"
 _CONCURRENCY_OPTION = "post-process-forwarder:concurrency"
+_BATCH_SIZE_OPTION = "post-process-forwarder:batch-size"
+# Upper bound of the batch size, so that a `post_process_group_batch` task
+# stays well within its time limit. Payloads of a batch are deleted from the
+# processing store before it is processed, so events left over when the task
+# is killed are lost.
+MAX_BATCH_SIZE = 100
+_BATCH_SIZE_METRIC = "eventstream.post_process_batch.size"
 _TRANSACTION_FORWARDER_HEADER = "transaction_forwarder"
 
 
@@ -66,7 +73,7 @@ def _record_metrics(partition: int, task_kwargs: Mapping[str, Any]) -> None:
     )
 
 
-def dispatch_post_process_group_task(
+def _get_post_process_group_kwargs(
     event_id: str,
     project_id: int,
     group_id: Optional[int],
@@ -75,20 +82,59 @@ def dispatch_post_process_group_task(
     is_new_group_environment: bool,
     primary_hash: Optional[str],
     skip_consume: bool = False,
-) -> None:
+) -> Optional[Mapping[str, Any]]:
     if skip_consume:
         logger.info("post_process.skip.raw_event", extra={"event_id": event_id})
-    else:
-        cache_key = cache_key_for_event({"project": project_id, "event_id": event_id})
+        return None
+
+    cache_key = cache_key_for_event({"project": project_id, "event_id": event_id})
+    return {
+        "is_new": is_new,
+        "is_regression": is_regression,
+        "is_new_group_environment": is_new_group_environment,
+        "primary_hash": primary_hash,
+        "cache_key": cache_key,
+        "group_id": group_id,
+    }
+
+
+def dispatch_post_process_group_task(
+    event_id: str,
+    project_id: int,
+    group_id: Optional[int],
+    is_new: bool,
+    is_regression: bool,
+    is_new_group_environment: bool,
+    primary_hash: Optional[str],
+    skip_consume: bool = False,
+) -> None:
+    post_process_group_kwargs = _get_post_process_group_kwargs(
+        event_id=event_id,
+        project_id=project_id,
+        group_id=group_id,
+        is_new=is_new,
+        is_regression=is_regression,
+        is_new_group_environment=is_new_group_environment,
+        primary_hash=primary_hash,
+        skip_consume=skip_consume,
+    )
+    if post_process_group_kwargs is not None:
+        post_process_group.delay(**post_process_group_kwargs)
 
-        post_process_group.delay(
-            is_new=is_new,
-            is_regression=is_regression,
-            is_new_group_environment=is_new_group_environment,
-            primary_hash=primary_hash,
-            cache_key=cache_key,
-            group_id=group_id,
-        )
+
+def dispatch_post_process_group_batch_tasks(
+    events: Sequence[Mapping[str, Any]], batch_size: int
+) -> None:
+    """
+    Dispatches `post_process_group_batch` tasks for `events`, the arguments
+    of `post_process_group` calls, with up to `batch_size` events each.
+    `batch_size` is capped at `MAX_BATCH_SIZE`.
+    """
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    for i in range(0, len(events), batch_size):
+        batch = events[i : i + batch_size]
+        metrics.timing(_BATCH_SIZE_METRIC, len(batch))
+        post_process_group_batch.delay(events=batch)
 
 
 def _get_task_kwargs_and_dispatch(message: Message):
@@ -100,6 +146,15 @@ def _get_task_kwargs_and_dispatch(message: Message):
     dispatch_post_process_group_task(**task_kwargs)
 
 
+def _get_post_process_group_kwargs_for_message(message: Message) -> Optional[Mapping[str, Any]]:
+    task_kwargs = _get_task_kwargs(message)
+    if not task_kwargs:
+        return None
+
+    _record_metrics(message.partition(), task_kwargs)
+    return _get_post_process_group_kwargs(**task_kwargs)
+
+
 class PostProcessForwarderWorker(AbstractBatchWorker):
     """
     Implementation of the AbstractBatchWorker which would be used for post process forwarder.
@@ -107,6 +162,10 @@ class PostProcessForwarderWorker(AbstractBatchWorker):
     because we want to be able to change the concurrency during runtime. This should be replaced
     by a thread pool executor once stress tests experiments are over and we start using the
     CLI arguments to set concurrency.
+
+    With `post-process-forwarder:batch-size` above 1, messages are not dispatched one by one.
+    Instead, the events of a batch are dispatched together to `post_process_group_batch` tasks
+    when the batch is flushed.
     """
 
     def __init__(self, concurrency: Optional[int] = 1) -> None:
@@ -114,6 +173,7 @@ class PostProcessForwarderWorker(AbstractBatchWorker):
         logger.info(f"Starting post process forwarder with {concurrency} threads")
         metrics.incr(_CONCURRENCY_METRIC, amount=concurrency)
         self.__executor = ThreadPoolExecutor(max_workers=self.__current_concurrency)
+        self.__batch_size = options.get(_BATCH_SIZE_OPTION)
 
     def process_message(self, message: Message) -> Optional[Future]:
         """
@@ -121,6 +181,8 @@ class PostProcessForwarderWorker(AbstractBatchWorker):
         is stored in the batch of batching_kafka_consumer and provided as an argument to flush_batch. If None is
         returned, the batching_kafka_consumer will not add the return value to the batch.
         """
+        if self.__batch_size > 1:
+            return self.__executor.submit(_get_post_process_group_kwargs_for_message, message)
         return self.__executor.submit(_get_task_kwargs_and_dispatch, message)
 
     def flush_batch(self, batch: Optional[Sequence[Future]]) -> None:
@@ -135,6 +197,14 @@ class PostProcessForwarderWorker(AbstractBatchWorker):
                 if exc is not None:
                     raise exc
 
+            # Futures of messages processed in batched mode return the arguments for
+            # `post_process_group`. They are dispatched in the order of the messages.
+            events = [future.result() for future in batch if future.result() is not None]
+            if events:
+                dispatch_post_process_group_batch_tasks(events, max(self.__batch_size, 1))
+
+        self.__batch_size = options.get(_BATCH_SIZE_OPTION)
+
         # Check if the concurrency settings have changed. If yes, then shutdown the existing executor
         # and create a new one with the new settings
         new_concurrency = options.get(_CONCURRENCY_OPTION)
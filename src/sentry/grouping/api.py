@@ -1,3 +1,4 @@
+import functools
 import re
 
 from sentry import options
@@ -172,16 +173,25 @@ def load_default_grouping_config():
 
 
 def get_fingerprinting_config_for_project(project):
-    from sentry.grouping.fingerprinting import FingerprintingRules, InvalidFingerprintingConfig
+    from sentry.grouping.fingerprinting import FingerprintingRules
 
     rules = project.get_option("sentry:fingerprinting_rules")
     if not rules:
         return FingerprintingRules([])
 
-    from sentry.utils.cache import cache
     from sentry.utils.hashlib import md5_text
 
-    cache_key = "fingerprinting-rules:" + md5_text(rules).hexdigest()
+    return _load_fingerprinting_rules(md5_text(rules).hexdigest(), rules)
+
+
+# Parsed and compiled rules are immutable, so they are shared between events in
+# process memory, keyed by the hash of the project's config.
+@functools.lru_cache(maxsize=1000)
+def _load_fingerprinting_rules(config_hash, rules):
+    from sentry.grouping.fingerprinting import FingerprintingRules, InvalidFingerprintingConfig
+    from sentry.utils.cache import cache
+
+    cache_key = "fingerprinting-rules:" + config_hash
     rv = cache.get(cache_key)
     if rv is not None:
         return FingerprintingRules.from_json(rv)
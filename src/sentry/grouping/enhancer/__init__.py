@@ -12,6 +12,7 @@ from sentry.utils.strings import unescape_string
 
 from .actions import Action, FlagAction, VarAction
 from .exceptions import InvalidEnhancerConfig
+from .index import RuleIndex
 from .matchers import (
     CalleeMatch,
     CallerMatch,
@@ -113,37 +114,48 @@ class Enhancements:
             bases = []
         self.bases = bases
 
-        self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
-        self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
+        # Only this instance's own rules are compiled here, the rules of the
+        # bases are compiled once with the base itself.
+        self._modifier_index = RuleIndex([rule for rule in self.rules if rule.is_modifier])
+        self._updater_index = RuleIndex([rule for rule in self.rules if rule.is_updater])
+
+    def _iter_rule_indexes(self, modifiers):
+        for base in self.bases:
+            base = ENHANCEMENT_BASES.get(base)
+            if base:
+                yield from base._iter_rule_indexes(modifiers)
+        yield self._modifier_index if modifiers else self._updater_index
+
+    def _iter_matching_frame_actions(self, modifiers, match_frames, platform, exception_data):
+        cache = {}
+        for index in self._iter_rule_indexes(modifiers):
+            yield from index.iter_matching_frame_actions(
+                match_frames, platform, exception_data, cache
+            )
 
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
         """
 
-        cache = {}
-
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
-        for rule in self._modifier_rules:
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
+        for rule, matches in self._iter_matching_frame_actions(
+            True, match_frames, platform, exception_data
+        ):
+            for idx, action in matches:
                 action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
 
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
 
-        cache = {}
-
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
-
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
+        for rule, matches in self._iter_matching_frame_actions(
+            False, match_frames, platform, exception_data
+        ):
+            for idx, action in matches:
                 action.update_frame_components_contributions(components, frames, idx, rule=rule)
                 action.modify_stacktrace_state(stacktrace_state, rule)
 
@@ -312,9 +324,13 @@ class Rule:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, frame_indexes=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        `frame_indexes` optionally restricts matching to the given frames.
         """
         if not self.matchers:
             return []
@@ -327,7 +343,10 @@ class Rule:
         rv = []
 
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
+        if frame_indexes is None:
+            frame_indexes = range(len(frames))
+
+        for idx in frame_indexes:
             if all(
                 m.matches_frame(frames, idx, platform, exception_data, cache)
                 for m in self._other_matchers
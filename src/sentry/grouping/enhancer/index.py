@@ -0,0 +1,125 @@
+import re
+from collections import defaultdict
+
+from .matchers import FamilyMatch, FrameMatch
+
+# Frame fields that can be used to preselect the rules that may match a frame.
+# Actions only ever modify `in_app` and `category`, so these stay the same
+# while rules are being applied.
+LITERAL_INDEXED_KEYS = ("function", "module", "package", "path")
+
+# Patterns using any of these are never indexed, as literals inside of them do
+# not need to appear in a matching value.
+_unindexable_pattern_re = re.compile(rb"[\[\]{}\\]")
+_wildcard_re = re.compile(rb"[*?]")
+_path_separator_re = re.compile(rb"[/\\]")
+
+
+def get_required_literal(matcher):
+    """
+    Returns the longest literal that every value matched by the given frame
+    matcher contains, or `None` if there is none that can be determined.
+    """
+    if matcher.negated or matcher.key not in LITERAL_INDEXED_KEYS:
+        return None
+
+    pattern = matcher._encoded_pattern
+    if _unindexable_pattern_re.search(pattern):
+        return None
+
+    literals = _wildcard_re.split(pattern)
+    if matcher.key in ("package", "path"):
+        # Path-like values are matched with normalized separators and with
+        # an additional leading slash, so separators cannot be relied upon.
+        literals = [part for literal in literals for part in _path_separator_re.split(literal)]
+
+    return max(literals, key=len) or None
+
+
+class RuleIndex:
+    """
+    A compiled list of enhancement rules.
+
+    Every rule is anchored on one of its frame matchers, either a literal the
+    matched field needs to contain or a family. For a stack trace, the frames
+    each rule can possibly apply to are determined in a single pass over the
+    frames, and the rules are then only fully evaluated against those. Rules
+    are still applied in order, with the same results as matching every rule
+    against every frame.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Indexes of rules that need to be evaluated against every frame
+        self._unanchored = set(range(len(rules)))
+        # family -> [rule index]
+        self._by_family = defaultdict(list)
+        # key -> [(literal, [rule index])]
+        self._by_literal = {}
+
+        by_literal = defaultdict(lambda: defaultdict(list))
+        for rule_idx, rule in enumerate(rules):
+            frame_matchers = [
+                m for m in rule._other_matchers if isinstance(m, FrameMatch) and not m.negated
+            ]
+
+            literal_matchers = []
+            for matcher in frame_matchers:
+                literal = get_required_literal(matcher)
+                if literal is not None:
+                    literal_matchers.append((len(literal), matcher.key, literal))
+
+            if literal_matchers:
+                _, key, literal = max(literal_matchers)
+                by_literal[key][literal].append(rule_idx)
+                self._unanchored.discard(rule_idx)
+                continue
+
+            for matcher in frame_matchers:
+                if isinstance(matcher, FamilyMatch) and b"all" not in matcher._flags:
+                    for family in matcher._flags:
+                        self._by_family[family].append(rule_idx)
+                    self._unanchored.discard(rule_idx)
+                    break
+
+        for key, literals in by_literal.items():
+            self._by_literal[key] = list(literals.items())
+
+    def _get_candidate_frames(self, match_frames):
+        """
+        Returns a list with an entry per rule, either the indexes of the frames
+        the rule can match or `None` if the rule needs to be evaluated against
+        every frame.
+        """
+        candidates = [None if idx in self._unanchored else [] for idx in range(len(self.rules))]
+
+        for frame_idx, match_frame in enumerate(match_frames):
+            for rule_idx in self._by_family.get(match_frame["family"], ()):
+                candidates[rule_idx].append(frame_idx)
+
+            for key, literals in self._by_literal.items():
+                value = match_frame[key]
+                if value is None:
+                    continue
+
+                for literal, rule_indexes in literals:
+                    if literal in value:
+                        for rule_idx in rule_indexes:
+                            candidates[rule_idx].append(frame_idx)
+
+        return candidates
+
+    def iter_matching_frame_actions(self, match_frames, platform, exception_data, cache):
+        """
+        Yields every rule with its list of matching `(frame index, action)`
+        tuples. The matches of a rule are only computed once the actions of
+        the previous rule have been applied.
+        """
+        candidates = self._get_candidate_frames(match_frames)
+        for rule, frame_indexes in zip(self.rules, candidates):
+            if frame_indexes is not None and not frame_indexes:
+                continue
+
+            yield rule, rule.get_matching_frame_actions(
+                match_frames, platform, exception_data, cache, frame_indexes=frame_indexes
+            )
@@ -1,4 +1,5 @@
 import inspect
+import re
 
 from parsimonious.exceptions import ParseError
 from parsimonious.grammar import Grammar, NodeVisitor
@@ -57,6 +58,57 @@ class InvalidFingerprintingConfig(Exception):
     pass
 
 
+# Keys that are matched case-insensitively
+CASE_INSENSITIVE_KEYS = frozenset(["path", "package", "message", "level", "value"])
+
+# Event values a matcher on the given key is tested against, if not the key itself
+HAYSTACK_FIELDS = {
+    "path": ("abs_path", "filename"),
+    "message": ("message", "value"),
+}
+
+# Patterns using any of these are never used to prefilter rules, as literals
+# inside of them do not need to appear in a matching value.
+_unindexable_pattern_re = re.compile(r"[\[\]{}\\]")
+_wildcard_re = re.compile(r"[*?]")
+_path_separator_re = re.compile(r"[/\\]")
+
+
+def get_match_group(key):
+    if key == "message":
+        return "toplevel"
+    if key in ("logger", "level"):
+        return "log_info"
+    if key in ("type", "value"):
+        return "exceptions"
+    if key.startswith("tags."):
+        return "tags"
+    return "frames"
+
+
+def get_required_literal(key, pattern):
+    """
+    Returns the longest literal that every value matched by `pattern` on `key`
+    contains, case-folded for case-insensitive keys, or `None` if there is
+    none that can be determined.
+    """
+    if key in ("family", "app") or _unindexable_pattern_re.search(pattern):
+        return None
+
+    literals = _wildcard_re.split(pattern)
+    if key in ("path", "package"):
+        # Paths are matched with normalized separators and with an additional
+        # leading slash, so separators cannot be relied upon.
+        literals = [part for literal in literals for part in _path_separator_re.split(literal)]
+
+    literal = max(literals, key=len)
+    if not literal:
+        return None
+    if key in CASE_INSENSITIVE_KEYS:
+        literal = literal.casefold()
+    return literal
+
+
 def get_crashing_thread(threads):
     if threads is None:
         return None
@@ -79,6 +131,7 @@ class EventAccess:
         self._log_info = None
         self._toplevel = None
         self._tags = None
+        self._haystacks = {}
 
     def get_messages(self):
         if self._messages is None:
@@ -175,6 +228,25 @@ class EventAccess:
     def get_values(self, match_group):
         return getattr(self, "get_" + match_group)()
 
+    def get_haystack(self, key):
+        """
+        Returns all values a matcher on `key` is tested against joined into a
+        single string, to quickly rule out matchers requiring a literal.
+        """
+        haystack = self._haystacks.get(key)
+        if haystack is None:
+            fields = HAYSTACK_FIELDS.get(key, (key,))
+            haystack = "\n".join(
+                value
+                for values in self.get_values(get_match_group(key))
+                for value in (values.get(field) for field in fields)
+                if isinstance(value, str)
+            )
+            if key in CASE_INSENSITIVE_KEYS:
+                haystack = haystack.casefold()
+            self._haystacks[key] = haystack
+        return haystack
+
 
 class FingerprintingRules:
     def __init__(self, rules, changelog=None, version=None):
@@ -265,18 +337,11 @@ class Match:
                 raise InvalidFingerprintingConfig("Unknown matcher '%s'" % key)
         self.pattern = pattern
         self.negated = negated
+        self.required_literal = None if negated else get_required_literal(self.key, pattern)
 
     @property
     def match_group(self):
-        if self.key == "message":
-            return "toplevel"
-        if self.key in ("logger", "level"):
-            return "log_info"
-        if self.key in ("type", "value"):
-            return "exceptions"
-        if self.key.startswith("tags."):
-            return "tags"
-        return "frames"
+        return get_match_group(self.key)
 
     def matches(self, values):
         rv = self._positive_match(values)
@@ -364,12 +429,23 @@ class Rule:
         self.fingerprint = fingerprint
         self.attributes = attributes
 
+        self._by_match_group = {}
+        for matcher in matchers:
+            self._by_match_group.setdefault(matcher.match_group, []).append(matcher)
+        self._required_literals = [
+            (matcher.key, matcher.required_literal)
+            for matcher in matchers
+            if matcher.required_literal is not None
+        ]
+
     def get_fingerprint_values_for_event_access(self, access):
-        by_match_group = {}
-        for matcher in self.matchers:
-            by_match_group.setdefault(matcher.match_group, []).append(matcher)
+        # A rule cannot match if any literal its patterns require appears
+        # nowhere in the event.
+        for key, literal in self._required_literals:
+            if literal not in access.get_haystack(key):
+                return
 
-        for match_group, matchers in by_match_group.items():
+        for match_group, matchers in self._by_match_group.items():
             for values in access.get_values(match_group):
                 if all(x.matches(values) for x in matchers):
                     break
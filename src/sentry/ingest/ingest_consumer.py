@@ -2,6 +2,7 @@ import functools
 import logging
 import random
 import time
+from collections import defaultdict
 from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import (
     Any,
@@ -24,17 +25,22 @@ from django.core.cache import cache
 
 from sentry import eventstore, features
 from sentry.attachments import CachedAttachment, attachment_cache
-from sentry.event_manager import save_attachment
+from sentry.event_manager import save_attachment, save_transaction_events
 from sentry.eventstore.processing import event_processing_store
 from sentry.ingest.types import ConsumerType
 from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
 from sentry.models import Project
-from sentry.signals import event_accepted
-from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.signals import event_accepted, first_transaction_received
+from sentry.tasks.store import (
+    preprocess_event,
+    save_event_transaction,
+    time_synthetic_monitoring_event,
+)
 from sentry.utils import json, metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
+from sentry.utils.canonical import CANONICAL_TYPES, CanonicalKeyDict
 from sentry.utils.dates import to_datetime
 from sentry.utils.kafka import create_batching_kafka_consumer
 from sentry.utils.sdk import mark_scope_as_unsafe
@@ -57,8 +63,13 @@ Message = Any
 
 
 class IngestConsumerWorker(AbstractBatchWorker):
-    def __init__(self, process_event_executor: Optional[ThreadPoolExecutor] = None) -> None:
+    def __init__(
+        self,
+        process_event_executor: Optional[ThreadPoolExecutor] = None,
+        save_transactions_in_batch: bool = False,
+    ) -> None:
         self.__process_event_executor = process_event_executor
+        self.__save_transactions_in_batch = save_transactions_in_batch
         if self.__process_event_executor is None:
             self.__process_event = process_event
         else:
@@ -94,6 +105,18 @@ class IngestConsumerWorker(AbstractBatchWorker):
             ]
         ] = []
 
+        # Transactions that are saved in this process once all other messages
+        # have been processed, see `save_transactions_batch`.
+        transactions: MutableSequence[Tuple[Message, Any]] = []
+        if self.__save_transactions_in_batch:
+            process_event_func = functools.partial(
+                process_event_or_collect_transaction,
+                self.__process_event_executor,
+                transactions,
+            )
+        else:
+            process_event_func = self.__process_event
+
         projects_to_fetch = set()
 
         with metrics.timer("ingest_consumer.prepare_messages"):
@@ -102,7 +125,7 @@ class IngestConsumerWorker(AbstractBatchWorker):
                 projects_to_fetch.add(message["project_id"])
 
                 if message_type == "event":
-                    other_messages.append((self.__process_event, message))
+                    other_messages.append((process_event_func, message))
                 elif message_type == "attachment_chunk":
                     attachment_chunks.append(message)
                 elif message_type == "attachment":
@@ -148,6 +171,9 @@ class IngestConsumerWorker(AbstractBatchWorker):
                     (time.monotonic() - other_messages_flush_start) / len(other_messages),
                 )
 
+        if transactions:
+            save_transactions_batch(transactions, projects)
+
     def shutdown(self):
         if self.__process_event_executor is not None:
             self.__process_event_executor.shutdown()
@@ -192,7 +218,6 @@ def _load_event(
     start_time = float(message["start_time"])
     event_id = message["event_id"]
     project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
     attachments = message.get("attachments") or ()
 
     sentry_sdk.set_extra("event_id", event_id)
@@ -215,7 +240,7 @@ def _load_event(
     # This code has been ripped from the old python store endpoint. We're
     # keeping it around because it does provide some protection against
     # reprocessing good events if a single consumer is in a restart loop.
-    deduplication_key = f"ev:{project_id}:{event_id}"
+    deduplication_key = _get_deduplication_key(project_id, event_id)
     if cache.get(deduplication_key) is not None:
         logger.warning(
             "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
@@ -302,15 +327,25 @@ def _load_event(
                     project=project,
                 )
 
-        # remember for an 1 hour that we saved this event (deduplication protection)
-        cache.set(deduplication_key, "", CACHE_TIMEOUT)
-
-        # emit event_accepted once everything is done
-        event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+        _mark_event_accepted(message, data, project)
 
     return data, dispatch_task
 
 
+def _get_deduplication_key(project_id: int, event_id: str) -> str:
+    return f"ev:{project_id}:{event_id}"
+
+
+def _mark_event_accepted(message: Message, data: Any, project: Project) -> None:
+    # remember for an 1 hour that we saved this event (deduplication protection)
+    cache.set(_get_deduplication_key(project.id, message["event_id"]), "", CACHE_TIMEOUT)
+
+    # emit event_accepted once everything is done
+    event_accepted.send_robust(
+        ip=message.get("remote_addr"), data=data, project=project, sender=process_event
+    )
+
+
 def _store_event(data) -> str:
     return event_processing_store.store(data)
 
@@ -334,6 +369,137 @@ def process_event_async(
     )
 
 
+def process_event_or_collect_transaction(
+    executor: Optional[ThreadPoolExecutor],
+    transactions: MutableSequence[Tuple[Message, Any]],
+    message: Message,
+    projects: Mapping[int, Project],
+) -> Optional["AsyncResult[str]"]:
+    """
+    Like `process_event` and `process_event_async`, except that transactions
+    without attachments are appended to `transactions` rather than being
+    stored and dispatched to `save_event_transaction`.
+    """
+    result = _load_event(message, projects)
+    if result is None:
+        return None
+
+    data, callback = result
+    if data.get("type") == "transaction" and not message.get("attachments"):
+        transactions.append((message, data))
+        return None
+
+    if executor is None:
+        callback(_store_event(data))
+        return None
+
+    return AsyncResult(
+        executor.submit(_store_event, data),
+        lambda future: callback(future.result()),
+    )
+
+
+@metrics.wraps("ingest_consumer.save_transactions_batch")
+def save_transactions_batch(
+    transactions: Sequence[Tuple[Message, Any]], projects: Mapping[int, Project]
+) -> None:
+    """
+    Saves transactions in this process with one `save_transaction_events`
+    call per project, instead of passing each of them through the processing
+    store to a `save_event_transaction` task.
+    """
+    start = time.monotonic()
+
+    by_project: MutableMapping[int, MutableMapping[str, Tuple[Message, Any]]] = defaultdict(dict)
+    for message, data in transactions:
+        # Duplicates within a batch are not caught by the deduplication in
+        # `_load_event`, as it is only marked once the batch has been saved.
+        by_project[int(message["project_id"])].setdefault(message["event_id"], (message, data))
+
+    saved = 0
+    for project_id, project_transactions in by_project.items():
+        project = projects[project_id]
+        try:
+            saved += _save_project_transactions(project, list(project_transactions.values()))
+        except Exception:
+            logger.exception(
+                "ingest_consumer.save_transactions_batch.failed", extra={"project_id": project_id}
+            )
+            metrics.incr(
+                "events.failed",
+                amount=len(project_transactions),
+                tags={"reason": "save", "stage": "ingest_consumer"},
+                skip_internal=False,
+            )
+
+    duration = time.monotonic() - start
+    metrics.timing("ingest_consumer.save_transactions_batch.size", saved)
+    metrics.timing("ingest_consumer.save_transactions_batch.projects", len(by_project))
+    if saved:
+        metrics.timing("ingest_consumer.save_transactions_batch.normalized", duration / saved)
+
+
+def _save_project_transactions(
+    project: Project, transactions: Sequence[Tuple[Message, Any]]
+) -> int:
+    jobs = []
+    saved_transactions = []
+    for message, data in transactions:
+        if killswitch_matches_context(
+            "store.load-shed-save-event-projects",
+            {
+                "project_id": project.id,
+                "event_type": "transaction",
+                "platform": data.get("platform") or "none",
+            },
+        ):
+            continue
+
+        data = CanonicalKeyDict(data)
+        data["project"] = project.id
+        jobs.append({"data": data, "start_time": float(message["start_time"])})
+        saved_transactions.append((message, data))
+
+    if not jobs:
+        return 0
+
+    # Post processing reads the event from the processing store and can run as soon as the event
+    # is inserted into eventstream, so payloads need to be stored before saving.
+    with metrics.timer("ingest_consumer.save_transactions_batch.write_processing_store"):
+        for _, data in saved_transactions:
+            _store_event(dict(data.items()))
+
+    with metrics.timer("ingest_consumer.save_transactions_batch.save_transaction_events"):
+        save_transaction_events(jobs, {project.id: project})
+
+    if not project.flags.has_transactions:
+        first_transaction_received.send_robust(
+            project=project, event=jobs[0]["event"], sender=Project
+        )
+
+    for message, data in saved_transactions:
+        start_time = float(message["start_time"])
+        if isinstance(data, CANONICAL_TYPES):
+            data = dict(data.items())
+
+        # Put the normalized event back into the processing store so that post processing has
+        # the most recent data.
+        with metrics.timer("ingest_consumer.save_transactions_batch.write_processing_store"):
+            _store_event(data)
+
+        _mark_event_accepted(message, data, project)
+
+        metrics.timing(
+            "events.time-to-process",
+            time.time() - start_time,
+            instance=data["platform"],
+            tags={"is_reprocessing2": "false"},
+        )
+        time_synthetic_monitoring_event(data, project.id, start_time)
+
+    return len(jobs)
+
+
 @trace_func(name="ingest_consumer.process_attachment_chunk")
 @metrics.wraps("ingest_consumer.process_attachment_chunk")
 def process_attachment_chunk(message, projects):
@@ -422,14 +588,25 @@ def process_userreport(message, projects) -> None:
 
 
 def get_ingest_consumer(
-    consumer_types, once=False, executor: Optional[ThreadPoolExecutor] = None, **options
+    consumer_types,
+    once=False,
+    executor: Optional[ThreadPoolExecutor] = None,
+    save_transactions_in_batch: bool = False,
+    **options,
 ):
     """
     Handles events coming via a kafka queue.
 
     The events should have already been processed (normalized... ) upstream (by Relay).
+
+    With `save_transactions_in_batch`, transactions are saved by the consumer
+    itself rather than by `save_event_transaction` tasks.
     """
     topic_names = {ConsumerType.get_topic_name(consumer_type) for consumer_type in consumer_types}
     return create_batching_kafka_consumer(
-        topic_names=topic_names, worker=IngestConsumerWorker(executor), **options
+        topic_names=topic_names,
+        worker=IngestConsumerWorker(
+            executor, save_transactions_in_batch=save_transactions_in_batch
+        ),
+        **options,
     )
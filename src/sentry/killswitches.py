@@ -110,6 +110,19 @@ ALL_KILLSWITCH_OPTIONS = {
             "project_id": "A project ID to filter events by.",
         },
     ),
+    "post_process.skip-stages": KillswitchInfo(
+        description="""
+        Skip stages of post_process_group, such as rule processing or similarity.
+
+        Other stages still run. Stages that depend on a skipped stage run as if
+        it had no effect.
+        """,
+        fields={
+            "stage": "The name of a stage in sentry.tasks.post_process.POST_PROCESS_STAGES.",
+            "project_id": "A project ID to filter events by.",
+            "organization_id": "Numeric organization ID to filter events by.",
+        },
+    ),
     "reprocessing2.drop-delete-old-primary-hash": KillswitchInfo(
         description="""
         Drop per-event messages emitted from delete_old_primary_hash. This message is currently lacking batching, and for the time being we should be able to drop it on a whim.
@@ -1,8 +1,12 @@
+import threading
+from collections import OrderedDict
+
 from symbolic import SourceView
 
+from sentry.utils import metrics
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "ParsedArtifactCache"]
 
 
 def is_utf8(codec):
@@ -10,6 +14,20 @@ def is_utf8(codec):
     return name in ("utf-8", "ascii")
 
 
+def make_source_view(source, encoding=None):
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    # If an encoding is provided and it's not utf-8 compatible
+    # we try to re-encoding the source and create a source view
+    # from it.
+    elif encoding is not None and not is_utf8(encoding):
+        try:
+            source = source.decode(encoding).encode("utf-8")
+        except UnicodeError:
+            pass
+    return SourceView.from_bytes(source)
+
+
 class SourceCache:
     def __init__(self):
         self._cache = {}
@@ -40,17 +58,7 @@ class SourceCache:
         url = self._get_canonical_url(url)
 
         if not isinstance(source, SourceView):
-            if isinstance(source, str):
-                source = source.encode("utf-8")
-            # If an encoding is provided and it's not utf-8 compatible
-            # we try to re-encoding the source and create a source view
-            # from it.
-            elif encoding is not None and not is_utf8(encoding):
-                try:
-                    source = source.decode(encoding).encode("utf-8")
-                except UnicodeError:
-                    pass
-            source = SourceView.from_bytes(source)
+            source = make_source_view(source, encoding)
         self._cache[url] = source
 
     def add_error(self, url, error):
@@ -90,3 +98,64 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class ParsedArtifactCache:
+    """
+    A process wide LRU of parsed source views or sourcemap views, shared by
+    all events a worker processes. Entries are keyed by
+    ``(release_id, dist_id, url, checksum)`` and the cache is bounded by the
+    total size of the raw artifacts the views were parsed from.
+    """
+
+    def __init__(self, name, max_size):
+        self.name = name
+        self.max_size = max_size
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+
+        metrics.incr(
+            "sourcemaps.parsed_cache.hit" if item is not None else "sourcemaps.parsed_cache.miss",
+            tags={"type": self.name},
+            skip_internal=True,
+        )
+        return item[0] if item is not None else None
+
+    def set(self, key, value, size):
+        if size > self.max_size:
+            return
+
+        evicted = 0
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+                evicted += 1
+
+        if evicted:
+            metrics.incr(
+                "sourcemaps.parsed_cache.eviction",
+                amount=evicted,
+                tags={"type": self.name},
+                skip_internal=True,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
@@ -5,23 +5,33 @@ import re
 import sys
 import time
 import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from hashlib import sha1
 from io import BytesIO
 from os.path import splitext
-from typing import IO, Optional, Tuple
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit
 
 import sentry_sdk
 from django.conf import settings
+from django.db import close_old_connections
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
 from requests.utils import get_encoding_from_headers
+from sentry_sdk import Hub
 from symbolic import SourceMapView
 
 from sentry import http, options
 from sentry.interfaces.stacktrace import Stacktrace
 from sentry.models import EventError, Organization, ReleaseFile
-from sentry.models.releasefile import ARTIFACT_INDEX_FILENAME, ReleaseArchive, read_artifact_index
+from sentry.models.releasefile import (
+    ARTIFACT_INDEX_FILENAME,
+    MappedReleaseArchive,
+    ReleaseArchive,
+    read_artifact_index,
+)
 from sentry.stacktraces.processing import StacktraceProcessor
 from sentry.utils import json, metrics
 
@@ -36,7 +46,7 @@ from sentry.utils.retries import ConditionalRetryPolicy, exponential_delay
 from sentry.utils.safe import get_path
 from sentry.utils.urls import non_standard_url_join
 
-from .cache import SourceCache, SourceMapCache
+from .cache import ParsedArtifactCache, SourceCache, SourceMapCache, make_source_view
 
 __all__ = ["JavaScriptStacktraceProcessor"]
 
@@ -72,11 +82,22 @@ CACHE_CONTROL_MIN = 60
 # the maximum number of remote resources (i.e. source files) that should be
 # fetched
 MAX_RESOURCE_FETCHES = 100
+# the maximum number of sources and sourcemaps fetched in parallel across all
+# events of a worker, see the `processing.sourcemap-fetch-concurrency` option
+MAX_FETCH_WORKERS = 20
 
 CACHE_MAX_VALUE_SIZE = settings.SENTRY_CACHE_MAX_VALUE_SIZE
 
 logger = logging.getLogger(__name__)
 
+_fetch_thread_pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS)
+
+# parsed views shared by all events processed by this worker
+parsed_sourcemap_cache = ParsedArtifactCache(
+    "sourcemap", settings.SENTRY_JS_PARSED_ARTIFACT_CACHE_SIZE
+)
+parsed_source_cache = ParsedArtifactCache("source", settings.SENTRY_JS_PARSED_ARTIFACT_CACHE_SIZE)
+
 
 class UnparseableSourcemap(http.BadSource):
     error_type = EventError.JS_INVALID_SOURCEMAP
@@ -383,7 +404,9 @@ def fetch_release_file(filename, release, dist=None):
 
 
 @metrics.wraps("sourcemaps.get_from_archive")
-def get_from_archive(url: str, archive: ReleaseArchive) -> Tuple[bytes, dict]:
+def get_from_archive(
+    url: str, archive: Union[ReleaseArchive, MappedReleaseArchive]
+) -> Tuple[bytes, dict]:
     candidates = ReleaseFile.normalize(url)
     for candidate in candidates:
         try:
@@ -508,6 +531,70 @@ def fetch_release_archive_for_url(release, dist, url) -> Optional[IO]:
             return file_
 
 
+@metrics.wraps("sourcemaps.fetch_mapped_release_archive")
+def fetch_mapped_release_archive_for_url(release, dist, url) -> Optional[MappedReleaseArchive]:
+    """Fetch the release archive containing the URL into the file system
+    cache and map it into memory.
+
+    Unlike `fetch_release_archive_for_url`, this never puts the archive
+    itself into the cache.
+    """
+    with sentry_sdk.start_span(op="fetch_mapped_release_archive_for_url.get_index_entry"):
+        info = get_index_entry(release, dist, url)
+    if info is None:
+        return None
+
+    try:
+        releasefile = ReleaseFile.objects.filter(
+            release_id=release.id, dist_id=dist.id if dist else dist, ident=info["archive_ident"]
+        ).select_related("file")[0]
+    except IndexError:
+        # This should not happen when there is an archive_ident in the manifest
+        logger.error("sourcemaps.missing_archive", exc_info=sys.exc_info())
+        return None
+
+    try:
+        with sentry_sdk.start_span(op="fetch_mapped_release_archive_for_url.map_archive"):
+            return fetch_retry_policy(lambda: ReleaseFile.cache.get_mapped_archive(releasefile))
+    except Exception:
+        logger.error("sourcemaps.read_archive_failed", exc_info=sys.exc_info())
+        return None
+
+
+def fetch_release_artifact_from_mapped_archive(url, release, dist, cache_key, cache_key_meta):
+    """
+    Returns a tuple of whether the artifact was looked up in a release
+    archive, and the result.
+    """
+    start = time.monotonic()
+    archive = fetch_mapped_release_archive_for_url(release, dist, url)
+    if archive is None:
+        return False, None
+
+    try:
+        data, headers = get_from_archive(url, archive)
+    except KeyError:
+        # The manifest mapped the url to an archive, but the file
+        # is not there.
+        logger.error("Release artifact %r not found in archive %s", url, archive.path)
+        cache.set(cache_key, -1, 60)
+        return True, None
+    except Exception as exc:
+        logger.error("Failed to read %s from release %s", url, release.id, exc_info=exc)
+        return False, None
+    finally:
+        metrics.timing("sourcemaps.release_artifact_from_archive", time.monotonic() - start)
+
+    return True, fetch_and_cache_artifact(
+        url,
+        lambda: BytesIO(data),
+        cache_key,
+        cache_key_meta,
+        headers,
+        compress_fn=compress,
+    )
+
+
 def compress(fp: IO) -> Tuple[bytes, bytes]:
     """Alternative for compress_file when fp does not support chunks"""
     content = fp.read()
@@ -531,8 +618,17 @@ def fetch_release_artifact(url, release, dist):
     if result:
         return result_from_cache(url, result)
 
-    start = time.monotonic()
-    archive_file = fetch_release_archive_for_url(release, dist, url)
+    if options.get("processing.release-archive-mmap"):
+        found, result = fetch_release_artifact_from_mapped_archive(
+            url, release, dist, cache_key, cache_key_meta
+        )
+        if found:
+            return result
+        archive_file = None
+    else:
+        start = time.monotonic()
+        archive_file = fetch_release_archive_for_url(release, dist, url)
+
     if archive_file is not None:
         try:
             archive = ReleaseArchive(archive_file)
@@ -739,13 +835,51 @@ def fetch_sourcemap(url, project=None, release=None, dist=None, allow_scraping=T
             allow_scraping=allow_scraping,
         )
         body = result.body
+
+    cache_key = None
+    if parsed_sourcemap_cache.max_size:
+        cache_key = get_parsed_artifact_cache_key(
+            "<base64>" if is_data_uri(url) else url, body, release, dist
+        )
+        sourcemap_view = parsed_sourcemap_cache.get(cache_key)
+        if sourcemap_view is not None:
+            return sourcemap_view
+
     try:
-        return SourceMapView.from_json_bytes(body)
+        sourcemap_view = SourceMapView.from_json_bytes(body)
     except Exception as exc:
         # This is in debug because the product shows an error already.
         logger.debug(str(exc), exc_info=True)
         raise UnparseableSourcemap({"url": http.expose_url(url)})
 
+    if cache_key is not None:
+        parsed_sourcemap_cache.set(cache_key, sourcemap_view, len(body))
+    return sourcemap_view
+
+
+def get_source_view(result, release=None, dist=None):
+    """
+    Returns the parsed `SourceView` for a fetched source file.
+    """
+    if not parsed_source_cache.max_size:
+        return make_source_view(result.body, result.encoding)
+
+    cache_key = get_parsed_artifact_cache_key(result.url, result.body, release, dist)
+    source_view = parsed_source_cache.get(cache_key)
+    if source_view is None:
+        source_view = make_source_view(result.body, result.encoding)
+        parsed_source_cache.set(cache_key, source_view, len(result.body))
+    return source_view
+
+
+def get_parsed_artifact_cache_key(url, body, release=None, dist=None):
+    return (
+        release and release.id or None,
+        dist and dist.id or None,
+        url,
+        sha1(body).hexdigest(),
+    )
+
 
 def is_data_uri(url):
     return url[:BASE64_PREAMBLE_LENGTH] == BASE64_SOURCEMAP_PREAMBLE
@@ -1119,14 +1253,7 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
         Look for and (if found) cache a source file and its associated source
         map (if any).
         """
-
-        sourcemaps = self.sourcemaps
-        cache = self.cache
-
-        self.fetch_count += 1
-
-        if self.fetch_count > self.max_fetches:
-            cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+        if not self._count_fetch(filename):
             return
 
         # TODO: respect cache-control/max-age headers to some extent
@@ -1137,36 +1264,13 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_file"
             ) as span:
                 span.set_data("filename", filename)
-                result = fetch_file(
-                    filename,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
+                result = self._fetch_file(filename)
         except http.BadSource as exc:
-            # most people don't upload release artifacts for their third-party libraries,
-            # so ignore missing node_modules files
-            if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
-                pass
-            else:
-                cache.add_error(filename, exc.data)
-
-            # either way, there's no more for us to do here, since we don't have
-            # a valid file to cache
-            return
-        cache.add(filename, result.body, result.encoding)
-        cache.alias(result.url, filename)
-
-        sourcemap_url = discover_sourcemap(result)
-        if not sourcemap_url:
+            self._add_source_error(filename, exc)
             return
 
-        logger.debug(
-            "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
-        )
-        sourcemaps.link(filename, sourcemap_url)
-        if sourcemap_url in sourcemaps:
+        sourcemap_url = self._add_source(filename, result)
+        if sourcemap_url is None or sourcemap_url in self.sourcemaps:
             return
 
         # pull down sourcemap
@@ -1175,13 +1279,7 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.cache_source.fetch_sourcemap"
             ) as span:
                 span.set_data("sourcemap_url", sourcemap_url)
-                sourcemap_view = fetch_sourcemap(
-                    sourcemap_url,
-                    project=self.project,
-                    release=self.release,
-                    dist=self.dist,
-                    allow_scraping=self.allow_scraping,
-                )
+                sourcemap_view = self._fetch_sourcemap(sourcemap_url)
         except http.BadSource as exc:
             # we don't perform the same check here as above, because if someone has
             # uploaded a node_modules file, which has a sourceMappingURL, they
@@ -1189,10 +1287,68 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             # working, if that's the case). If they're not looking for it to be
             # mapped, then they shouldn't be uploading the source file in the
             # first place.
-            cache.add_error(filename, exc.data)
+            self.cache.add_error(filename, exc.data)
+            return
+
+        self._add_sourcemap(sourcemap_url, sourcemap_view)
+
+    def _count_fetch(self, filename):
+        """
+        Counts a fetch towards `max_fetches`. Returns `False` and records an
+        error if the limit has been reached.
+        """
+        self.fetch_count += 1
+
+        if self.fetch_count > self.max_fetches:
+            self.cache.add_error(filename, {"type": EventError.JS_TOO_MANY_REMOTE_SOURCES})
+            return False
+        return True
+
+    def _fetch_file(self, filename):
+        return fetch_file(
+            filename,
+            project=self.project,
+            release=self.release,
+            dist=self.dist,
+            allow_scraping=self.allow_scraping,
+        )
+
+    def _fetch_sourcemap(self, sourcemap_url):
+        return fetch_sourcemap(
+            sourcemap_url,
+            project=self.project,
+            release=self.release,
+            dist=self.dist,
+            allow_scraping=self.allow_scraping,
+        )
+
+    def _add_source_error(self, filename, exc):
+        # most people don't upload release artifacts for their third-party libraries,
+        # so ignore missing node_modules files
+        if exc.data["type"] == EventError.JS_MISSING_SOURCE and "node_modules" in filename:
             return
+        self.cache.add_error(filename, exc.data)
+
+    def _add_source(self, filename, result):
+        """
+        Caches a fetched source and links it to its sourcemap. Returns the
+        sourcemap URL if there is one.
+        """
+        self.cache.add(filename, get_source_view(result, self.release, self.dist))
+        self.cache.alias(result.url, filename)
+
+        sourcemap_url = discover_sourcemap(result)
+        if not sourcemap_url:
+            return None
+
+        logger.debug(
+            "Found sourcemap URL %r for minified script %r", sourcemap_url[:256], result.url
+        )
+        self.sourcemaps.link(filename, sourcemap_url)
+        return sourcemap_url
 
-        sourcemaps.add(sourcemap_url, sourcemap_view)
+    def _add_sourcemap(self, sourcemap_url, sourcemap_view):
+        self.sourcemaps.add(sourcemap_url, sourcemap_view)
 
         # cache any inlined sources
         for src_id, source_name in sourcemap_view.iter_sources():
@@ -1221,12 +1377,83 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 continue
             pending_file_list.add(f["abs_path"])
 
-        for idx, filename in enumerate(pending_file_list):
-            with sentry_sdk.start_span(
-                op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
+        concurrency = options.get("processing.sourcemap-fetch-concurrency")
+        concurrent = concurrency > 1 and len(pending_file_list) > 1
+        metrics.timing("sourcemaps.fetch.fan_out", len(pending_file_list))
+
+        with metrics.timer("sourcemaps.fetch.duration", tags={"concurrent": concurrent}):
+            if concurrent:
+                self._populate_source_cache_concurrently(pending_file_list, concurrency)
+                return
+
+            for idx, filename in enumerate(pending_file_list):
+                with sentry_sdk.start_span(
+                    op="JavaScriptStacktraceProcessor.populate_source_cache.cache_source"
+                ) as span:
+                    span.set_data("filename", filename)
+                    self.cache_source(filename=filename)
+
+    def _populate_source_cache_concurrently(self, filenames, concurrency):
+        """
+        Same as calling `cache_source` for every file, except that sources and
+        sourcemaps are fetched on a thread pool with at most `concurrency`
+        fetches in flight. Sourcemaps are requested as soon as the source
+        referencing them is in, and only once per event. The caches are only
+        ever updated from this thread.
+        """
+        fetch_queue = deque(
+            ("source", filename) for filename in filenames if self._count_fetch(filename)
+        )
+        # sourcemap url -> minified files that reference it
+        sourcemap_referrers = {}
+        in_flight = {}
+        hub = Hub.current
+
+        def fetch(kind, url, hub):
+            # Pool threads keep their database connections between fetches, so
+            # drop the ones that errored or outlived `CONN_MAX_AGE`.
+            close_old_connections()
+            with hub, hub.start_span(
+                op=f"JavaScriptStacktraceProcessor.populate_source_cache.fetch_{kind}"
             ) as span:
-                span.set_data("filename", filename)
-                self.cache_source(filename=filename)
+                span.set_data("url", url)
+                if kind == "source":
+                    return self._fetch_file(url)
+                return self._fetch_sourcemap(url)
+
+        def submit():
+            while fetch_queue and len(in_flight) < concurrency:
+                kind, url = fetch_queue.popleft()
+                in_flight[_fetch_thread_pool.submit(fetch, kind, url, Hub(hub))] = (kind, url)
+
+        submit()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, url = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except http.BadSource as exc:
+                    if kind == "source":
+                        self._add_source_error(url, exc)
+                    else:
+                        # see `cache_source`
+                        for filename in sourcemap_referrers[url]:
+                            self.cache.add_error(filename, exc.data)
+                    continue
+
+                if kind == "sourcemap":
+                    self._add_sourcemap(url, result)
+                    continue
+
+                sourcemap_url = self._add_source(url, result)
+                if sourcemap_url is None or sourcemap_url in self.sourcemaps:
+                    continue
+                if sourcemap_url not in sourcemap_referrers:
+                    sourcemap_referrers[sourcemap_url] = []
+                    fetch_queue.append(("sourcemap", sourcemap_url))
+                sourcemap_referrers[sourcemap_url].append(url)
+            submit()
 
     def close(self):
         StacktraceProcessor.close(self)
@@ -13,7 +13,7 @@ from django.conf import settings
 from django.core.files.base import ContentFile
 from django.core.files.base import File as FileObj
 from django.core.files.storage import get_storage_class
-from django.db import IntegrityError, models, router, transaction
+from django.db import models, router, transaction
 from django.utils import timezone
 
 from sentry.app import locks
@@ -138,6 +138,8 @@ class FileBlob(Model):
         checksums_seen = set()
         blobs_created = []
         blobs_to_save = []
+        blobs_to_own = []
+        futures = []
         locks = set()
         semaphore = Semaphore(value=MULTI_BLOB_UPLOAD_CONCURRENCY)
 
@@ -146,43 +148,67 @@ class FileBlob(Model):
                 "FileBlob.from_files._upload_and_pend_chunk.start",
                 extra={"checksum": checksum, "size": size},
             )
-            blob = cls(size=size, checksum=checksum)
-            blob.path = cls.generate_unique_path()
-            storage = get_storage()
-            storage.save(blob.path, fileobj)
-            blobs_to_save.append((blob, lock))
+            try:
+                blob = cls(size=size, checksum=checksum)
+                blob.path = cls.generate_unique_path()
+                storage = get_storage()
+                storage.save(blob.path, fileobj)
+                # `list.append` is atomic, the main thread picks these up in
+                # `_flush_blobs` and writes them to the database in batches.
+                blobs_to_save.append((blob, lock))
+            finally:
+                semaphore.release()
             metrics.timing("filestore.blob-size", size, tags={"function": "from_files"})
             logger.debug(
                 "FileBlob.from_files._upload_and_pend_chunk.end",
                 extra={"checksum": checksum, "path": blob.path},
             )
 
-        def _ensure_blob_owned(blob):
-            if organization is None:
+        def _flush_owners():
+            if organization is None or not blobs_to_own:
+                del blobs_to_own[:]
+                return
+            FileBlobOwner.objects.bulk_create(
+                [
+                    FileBlobOwner(organization_id=organization.id, blob=blob)
+                    for blob in blobs_to_own
+                ],
+                ignore_conflicts=True,
+            )
+            del blobs_to_own[:]
+
+        def _check_futures(wait=False):
+            # Re-raise errors from the upload threads in the main thread.
+            for future in list(futures):
+                if wait or future.done():
+                    futures.remove(future)
+                    future.result()
+
+        def _flush_blobs(min_batch_size=1):
+            _check_futures()
+            if len(blobs_to_save) < min_batch_size:
                 return
-            try:
-                with atomic_transaction(using=router.db_for_write(FileBlobOwner)):
-                    FileBlobOwner.objects.create(organization_id=organization.id, blob=blob)
-            except IntegrityError:
-                pass
-
-        def _save_blob(blob):
-            logger.debug("FileBlob.from_files._save_blob.start", extra={"path": blob.path})
-            blob.save()
-            _ensure_blob_owned(blob)
-            logger.debug("FileBlob.from_files._save_blob.end", extra={"path": blob.path})
 
-        def _flush_blobs():
+            pending = []
             while True:
                 try:
-                    blob, lock = blobs_to_save.pop()
+                    pending.append(blobs_to_save.pop())
                 except IndexError:
                     break
 
-                _save_blob(blob)
+            logger.debug("FileBlob.from_files._flush_blobs.start", extra={"count": len(pending)})
+            with atomic_transaction(
+                using=(router.db_for_write(FileBlob), router.db_for_write(FileBlobOwner))
+            ):
+                cls.objects.bulk_create([blob for blob, _ in pending])
+                blobs_to_own.extend(blob for blob, _ in pending)
+                _flush_owners()
+            metrics.timing("filestore.from_files.batch-size", len(pending))
+            logger.debug("FileBlob.from_files._flush_blobs.end", extra={"count": len(pending)})
+
+            for _, lock in pending:
                 lock.__exit__(None, None, None)
                 locks.discard(lock)
-                semaphore.release()
 
         try:
             with ThreadPoolExecutor(max_workers=MULTI_BLOB_UPLOAD_CONCURRENCY) as exe:
@@ -190,7 +216,7 @@ class FileBlob(Model):
                     logger.debug(
                         "FileBlob.from_files.executor_start", extra={"checksum": reference_checksum}
                     )
-                    _flush_blobs()
+                    _flush_blobs(min_batch_size=MULTI_BLOB_UPLOAD_CONCURRENCY)
 
                     # Before we go and do something with the files we calculate
                     # the checksums and compare it against the reference.  This
@@ -211,7 +237,7 @@ class FileBlob(Model):
                     if existing is not None:
                         lock.__exit__(None, None, None)
                         blobs_created.append(existing)
-                        _ensure_blob_owned(existing)
+                        blobs_to_own.append(existing)
                         continue
 
                     # Remember the lock to force unlock all at the end if we
@@ -219,16 +245,20 @@ class FileBlob(Model):
                     locks.add(lock)
 
                     # Otherwise we leave the blob locked and submit the task.
-                    # We use the semaphore to ensure we never schedule too
-                    # many.  The upload will be done with a certain amount
-                    # of concurrency controlled by the semaphore and the
-                    # `_flush_blobs` call will take all those uploaded
-                    # blobs and associate them with the database.
+                    # We use the semaphore to ensure we never have too many
+                    # uploads in flight.  The semaphore is released by the
+                    # upload thread once the blob is in storage, and the
+                    # `_flush_blobs` call will take all those uploaded blobs
+                    # and associate them with the database in one batch.
                     semaphore.acquire()
-                    exe.submit(_upload_and_pend_chunk(fileobj, size, checksum, lock))
+                    futures.append(
+                        exe.submit(_upload_and_pend_chunk, fileobj, size, checksum, lock)
+                    )
                     logger.debug("FileBlob.from_files.end", extra={"checksum": reference_checksum})
 
+            _check_futures(wait=True)
             _flush_blobs()
+            _flush_owners()
         finally:
             for lock in locks:
                 try:
@@ -135,7 +135,8 @@ class ProjectCodeOwners(DefaultFieldsModel):
     def merge_code_owners_list(self, code_owners_list):
         """
         Merge list of code_owners into a single code_owners object concatenating
-        all the rules. We assume schema version is constant.
+        all the rules. We assume schema version is constant. The merged object
+        is updated whenever any of the merged code_owners is.
         """
         merged_code_owners = None
         for code_owners in code_owners_list:
@@ -147,6 +148,9 @@ class ProjectCodeOwners(DefaultFieldsModel):
                     *merged_code_owners.schema["rules"],
                     *code_owners.schema["rules"],
                 ]
+                merged_code_owners.date_updated = max(
+                    merged_code_owners.date_updated, code_owners.date_updated
+                )
 
         return merged_code_owners
 
@@ -7,7 +7,7 @@ from django.utils import timezone
 from sentry.db.models import Model, sane_repr
 from sentry.db.models.fields import FlexibleForeignKey, JSONField
 from sentry.models import ActorTuple
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
+from sentry.ownership.grammar import Rule, load_compiled_schema, resolve_actors
 from sentry.utils import metrics
 from sentry.utils.cache import cache
 
@@ -58,6 +58,20 @@ class ProjectOwnership(Model):
             )
         return ownership.schema
 
+    @classmethod
+    def get_schema_key(cls, ownership, codeowners):
+        """
+        A cheap key for the schema combined from `ownership` and `codeowners`
+        which changes whenever either of them is updated. Unsaved ownership
+        never has a schema of its own.
+        """
+        return (
+            (ownership.id, ownership.last_updated) if ownership and ownership.id else None,
+            (codeowners.id, codeowners.date_updated, len(codeowners.schema["rules"]))
+            if codeowners and codeowners.schema
+            else None,
+        )
+
     @classmethod
     def get_ownership_cached(cls, project_id):
         """
@@ -105,9 +119,10 @@ class ProjectOwnership(Model):
             ownership = cls(project_id=project_id)
 
         codeowners = ProjectCodeOwners.get_codeowners_cached(project_id)
+        schema_key = cls.get_schema_key(ownership, codeowners)
         ownership.schema = cls.get_combined_schema(ownership, codeowners)
 
-        rules = cls._matching_ownership_rules(ownership, project_id, data)
+        rules = cls._matching_ownership_rules(ownership, project_id, data, schema_key)
 
         if not rules:
             return cls.Everyone if ownership.fallthrough else [], None
@@ -159,9 +174,15 @@ class ProjectOwnership(Model):
             if not ownership:
                 ownership = cls(project_id=project_id)
 
-            ownership_rules = cls._matching_ownership_rules(ownership, project_id, data)
+            ownership_rules = cls._matching_ownership_rules(
+                ownership, project_id, data, cls.get_schema_key(ownership, None)
+            )
             codeowners_rules = (
-                cls._matching_ownership_rules(codeowners, project_id, data) if codeowners else []
+                cls._matching_ownership_rules(
+                    codeowners, project_id, data, cls.get_schema_key(None, codeowners)
+                )
+                if codeowners
+                else []
             )
 
             if not (codeowners_rules or ownership_rules):
@@ -193,15 +214,15 @@ class ProjectOwnership(Model):
 
     @classmethod
     def _matching_ownership_rules(
-        cls, ownership: "ProjectOwnership", project_id: int, data: Mapping[str, Any]
+        cls,
+        ownership: "ProjectOwnership",
+        project_id: int,
+        data: Mapping[str, Any],
+        schema_key: Tuple[Any, ...],
     ) -> Sequence["Rule"]:
-        rules = []
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
-
-        return rules
+        if ownership.schema is None:
+            return []
+        return load_compiled_schema(ownership.schema, schema_key).get_matching_rules(data)
 
 
 # Signals update the cached reads used in post_processing
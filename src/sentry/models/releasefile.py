@@ -1,12 +1,17 @@
 import errno
 import logging
+import mmap
 import os
+import struct
+import threading
 import zipfile
+import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from hashlib import sha1
 from io import BytesIO
-from tempfile import TemporaryDirectory
-from typing import IO, Optional, Tuple
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlsplit, urlunsplit
 
 from django.core.files.base import File as FileObj
@@ -35,6 +40,12 @@ logger = logging.getLogger(__name__)
 ARTIFACT_INDEX_FILENAME = "artifact-index.json"
 ARTIFACT_INDEX_TYPE = "release.artifact-index"
 
+# Number of memory-mapped release archives each process keeps open
+MAPPED_ARCHIVES_MAX = 32
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_ZIP_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
 
 class PublicReleaseFileManager(models.Manager):
     """Manager for all release files that are not internal.
@@ -142,17 +153,19 @@ class ReleaseFile(Model):
 
 
 class ReleaseFileCache:
+    def __init__(self):
+        self._mapped_archives = OrderedDict()
+        self._mapped_archives_lock = threading.Lock()
+
     @property
     def cache_path(self):
         return options.get("releasefile.cache-path")
 
-    def getfile(self, releasefile):
-        cutoff = options.get("releasefile.cache-limit")
-        file_size = releasefile.file.size
-        if file_size < cutoff:
-            metrics.timing("release_file.cache.get.size", file_size, tags={"cutoff": True})
-            return releasefile.file.getfile()
+    def _ensure_cached(self, releasefile) -> Tuple[str, bool]:
+        """Stores the file in the file system cache if it is not there yet.
 
+        Returns the path and whether the file was already cached.
+        """
         file_id = str(releasefile.file.id)
         organization_id = str(releasefile.organization_id)
         file_path = os.path.join(self.cache_path, organization_id, file_id)
@@ -166,9 +179,52 @@ class ReleaseFileCache:
             releasefile.file.save_to(file_path)
             hit = False
 
+        return file_path, hit
+
+    def getfile(self, releasefile):
+        cutoff = options.get("releasefile.cache-limit")
+        file_size = releasefile.file.size
+        if file_size < cutoff:
+            metrics.timing("release_file.cache.get.size", file_size, tags={"cutoff": True})
+            return releasefile.file.getfile()
+
+        file_path, hit = self._ensure_cached(releasefile)
+
         metrics.timing("release_file.cache.get.size", file_size, tags={"hit": hit, "cutoff": False})
         return FileObj(open(file_path, "rb"))
 
+    def get_mapped_archive(self, releasefile) -> "MappedReleaseArchive":
+        """Returns a memory-mapped view of a release archive.
+
+        The archive is stored in the file system cache regardless of its size.
+        The most recently used archives are kept open by the process.
+        """
+        file_path, hit = self._ensure_cached(releasefile)
+
+        with self._mapped_archives_lock:
+            archive = self._mapped_archives.get(file_path)
+            if archive is not None and hit:
+                self._mapped_archives.move_to_end(file_path)
+                metrics.incr("release_file.mapped_archive.hit", skip_internal=True)
+                return archive
+
+        archive = MappedReleaseArchive(file_path)
+        metrics.incr("release_file.mapped_archive.miss", skip_internal=True)
+
+        evicted = []
+        with self._mapped_archives_lock:
+            replaced = self._mapped_archives.pop(file_path, None)
+            if replaced is not None:
+                evicted.append(replaced)
+            self._mapped_archives[file_path] = archive
+            while len(self._mapped_archives) > MAPPED_ARCHIVES_MAX:
+                evicted.append(self._mapped_archives.popitem(last=False)[1])
+
+        for evicted_archive in evicted:
+            evicted_archive.close()
+
+        return archive
+
     def clear_old_entries(self):
         clear_cached_files(self.cache_path)
 
@@ -225,6 +281,109 @@ class ReleaseArchive:
         return temp_dir
 
 
+class MappedReleaseArchive:
+    """Read-only, memory-mapped view of a release archive on disk.
+
+    The position of every file in the archive is written to an index file
+    next to the archive the first time it is opened, so looking up a file
+    neither reads the manifest nor parses the central directory of the ZIP
+    file again. Files stored without compression are returned as a
+    ``memoryview`` into the mapped archive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mmap = self._map()
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _map(self) -> mmap.mmap:
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Unmap the archive.
+
+        If contents returned by ``get_file_by_url`` are still referenced, the
+        mapping is released once they are garbage collected instead.
+        """
+        with self._lock:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+
+    @property
+    def index_path(self) -> str:
+        return self.path + ".index"
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "rb") as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            pass
+
+        with metrics.timer("release_file.mapped_archive.build_index"):
+            index = self._build_index()
+
+        # Write the index atomically, other processes might read it already.
+        with NamedTemporaryFile(
+            dir=os.path.dirname(self.path), prefix="._index-", delete=False
+        ) as f:
+            f.write(json.dumps(index).encode("utf-8"))
+        os.rename(f.name, self.index_path)
+
+        return index
+
+    def _build_index(self) -> dict:
+        index = {}
+        with ReleaseArchive(open(self.path, "rb")) as archive:
+            for url, (filename, entry) in archive._entries_by_url.items():
+                info = archive.info(filename)
+                header = _ZIP_LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+                if header[0] != _ZIP_LOCAL_HEADER_SIGNATURE:
+                    raise zipfile.BadZipFile(f"Bad local file header for {filename}")
+                # The local header is followed by the filename and extra field,
+                # which can differ in length from those in the central directory.
+                offset = info.header_offset + _ZIP_LOCAL_HEADER.size + header[9] + header[10]
+                index[url] = {
+                    "offset": offset,
+                    "length": info.compress_size,
+                    "compression": info.compress_type,
+                    "headers": entry.get("headers", {}),
+                }
+
+        return index
+
+    def get_file_by_url(self, url: str) -> Tuple[Union[memoryview, bytes], dict]:
+        """Return the contents and headers of a file.
+
+        May raise ``KeyError``
+        """
+        entry = self._index[url]
+        offset = entry["offset"]
+
+        if entry["compression"] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            # Leave other compression methods to `zipfile`
+            with ReleaseArchive(open(self.path, "rb")) as archive:
+                fp, _ = archive.get_file_by_url(url)
+                with fp:
+                    return fp.read(), entry["headers"]
+
+        with self._lock:
+            if self._mmap.closed:
+                # The archive was evicted from the cache while in use
+                self._mmap = self._map()
+            data = memoryview(self._mmap)[offset : offset + entry["length"]]
+
+        if entry["compression"] == zipfile.ZIP_DEFLATED:
+            with data:
+                data = zlib.decompress(data, -zlib.MAX_WBITS)
+
+        return data, entry["headers"]
+
+
 class _ArtifactIndexData:
     """Holds data of artifact index and keeps track of changes"""
 
@@ -60,6 +60,33 @@ class Rule(Model):
             cache.set(cache_key, rules_list, 60)
         return rules_list
 
+    @classmethod
+    def get_for_projects(cls, project_ids):
+        """
+        Like `get_for_project`, for many projects at once. Returns a mapping
+        of project IDs to their lists of rules.
+        """
+        cache_keys = {project_id: f"project:{project_id}:rules" for project_id in project_ids}
+        cached = cache.get_many(list(cache_keys.values()))
+
+        rules = {}
+        for project_id, cache_key in cache_keys.items():
+            if cached.get(cache_key) is not None:
+                rules[project_id] = cached[cache_key]
+
+        missing = [project_id for project_id in cache_keys if project_id not in rules]
+        if missing:
+            fetched = {project_id: [] for project_id in missing}
+            for rule in cls.objects.filter(project__in=missing, status=RuleStatus.ACTIVE):
+                fetched[rule.project_id].append(rule)
+            cache.set_many(
+                {cache_keys[project_id]: rules_list for project_id, rules_list in fetched.items()},
+                60,
+            )
+            rules.update(fetched)
+
+        return rules
+
     @property
     def created_by(self):
         try:
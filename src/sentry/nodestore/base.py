@@ -1,8 +1,10 @@
+import struct
 from threading import local
 
 import sentry_sdk
 from django.core.cache import InvalidCacheBackendError, caches
 
+from sentry import options
 from sentry.utils import json
 from sentry.utils.cache import memoize
 from sentry.utils.services import Service
@@ -22,6 +24,14 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json._default_decoder.decode
 
+# Nodes in the indexed format start with this prefix, which can neither start
+# a JSON document (the legacy format) nor a pickle (Django backend).
+INDEXED_FORMAT_MAGIC = b"\x00\x01"
+# Number of payloads, followed by one entry per payload: the length of its
+# subkey, the subkey itself and the payload's offset and length in the node.
+_indexed_header = struct.Struct("<H")
+_indexed_entry = struct.Struct("<II")
+
 
 class NodeStorage(local, Service):
     """
@@ -64,7 +74,9 @@ class NodeStorage(local, Service):
         "get",
         "get_multi",
         "set",
+        "set_multi",
         "set_subkeys",
+        "set_subkeys_multi",
         "cleanup",
         "validate",
         "bootstrap",
@@ -92,25 +104,56 @@ class NodeStorage(local, Service):
         if value is None:
             return None
 
-        lines_iter = iter(value.splitlines())
-        try:
-            if subkey is not None:
-                # Those keys should be statically known identifiers in the app, such as
-                # "unprocessed_event". There is really no reason to allow anything but
-                # ASCII here.
-                subkey = subkey.encode("ascii")
+        if value.startswith(INDEXED_FORMAT_MAGIC):
+            return self._decode_indexed(value, subkey)
+
+        # Legacy format, the default payload followed by alternating subkey
+        # and payload lines. Walk the lines in place instead of splitting the
+        # whole value.
+        if subkey is not None:
+            # Those keys should be statically known identifiers in the app, such as
+            # "unprocessed_event". There is really no reason to allow anything but
+            # ASCII here.
+            subkey = subkey.encode("ascii")
+
+        start = 0
+        is_payload = True
+        while start < len(value):
+            end = value.find(b"\n", start)
+            if end == -1:
+                end = len(value)
 
-                next(lines_iter)
+            if subkey is None:
+                return json_loads(value[start:end])
 
-                for line in lines_iter:
-                    if line.strip() == subkey:
-                        break
+            if is_payload:
+                is_payload = False
+            elif value[start:end].strip() == subkey:
+                # The next line is the payload we are looking for.
+                subkey = None
+            else:
+                is_payload = True
 
-                    next(lines_iter)
+            start = end + 1
 
-            return json_loads(next(lines_iter))
-        except StopIteration:
-            return None
+        return None
+
+    def _decode_indexed(self, value, subkey):
+        view = memoryview(value)
+        key = b"" if subkey is None else subkey.encode("ascii")
+
+        (count,) = _indexed_header.unpack_from(view, len(INDEXED_FORMAT_MAGIC))
+        position = len(INDEXED_FORMAT_MAGIC) + _indexed_header.size
+        for _ in range(count):
+            key_length = view[position]
+            entry_key = view[position + 1 : position + 1 + key_length]
+            offset, length = _indexed_entry.unpack_from(view, position + 1 + key_length)
+            if entry_key == key:
+                return json_loads(str(view[offset : offset + length], "utf8"))
+
+            position += 1 + key_length + _indexed_entry.size
+
+        return None
 
     def _get_bytes(self, id):
         """
@@ -201,6 +244,9 @@ class NodeStorage(local, Service):
         >>> _encode({"unprocessed": {}, None: {"stacktrace": {}}})
         b'{"stacktrace": {}}\nunprocessed\n{}'
         """
+        if options.get("nodestore.indexed-format"):
+            return self._encode_indexed(data)
+
         lines = [json_dumps(data.pop(None)).encode("utf8")]
         for key, value in data.items():
             lines.append(key.encode("ascii"))
@@ -208,6 +254,29 @@ class NodeStorage(local, Service):
 
         return b"\n".join(lines)
 
+    def _encode_indexed(self, data):
+        """
+        Encode data dict with a header of payload offsets so that a single
+        subkey can be decoded without scanning the others. The `None` key is
+        stored as an empty subkey.
+        """
+        payloads = [(b"", json_dumps(data.pop(None)).encode("utf8"))]
+        for key, value in data.items():
+            payloads.append((key.encode("ascii"), json_dumps(value).encode("utf8")))
+
+        offset = len(INDEXED_FORMAT_MAGIC) + _indexed_header.size
+        offset += sum(1 + len(key) + _indexed_entry.size for key, _ in payloads)
+
+        chunks = [INDEXED_FORMAT_MAGIC, _indexed_header.pack(len(payloads))]
+        for key, payload in payloads:
+            chunks.append(bytes((len(key),)))
+            chunks.append(key)
+            chunks.append(_indexed_entry.pack(offset, len(payload)))
+            offset += len(payload)
+
+        chunks.extend(payload for _, payload in payloads)
+        return b"".join(chunks)
+
     def _set_bytes(self, id, data, ttl=None):
         """
         >>> nodestore.set('key1', b"{'foo': 'bar'}")
@@ -246,6 +315,56 @@ class NodeStorage(local, Service):
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
 
+    def _set_bytes_multi(self, items, ttl=None):
+        """
+        >>> nodestore._set_bytes_multi({
+        ...     'key1': b'{"message": "hello world"}',
+        ...     'key2': b'{"message": "hello world"}',
+        ... })
+        """
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl=ttl)
+
+    def set_multi(self, items, ttl=None):
+        """
+        Set values for multiple ids. Like `set`, this deletes existing
+        subkeys for each id.
+
+        Note: This is not guaranteed to be atomic and may result in a partial
+        write.
+
+        >>> nodestore.set_multi({'key1': {'foo': 'bar'}, 'key2': {'foo': 'baz'}})
+        """
+        return self.set_subkeys_multi({id: {None: data} for id, data in items.items()}, ttl=ttl)
+
+    def set_subkeys_multi(self, items, ttl=None):
+        """
+        Set values and subkeys for multiple ids, see `set_subkeys`.
+
+        Note: This is not guaranteed to be atomic and may result in a partial
+        write.
+
+        >>> nodestore.set_subkeys_multi({
+        ...     'key1': {None: {'foo': 'bar'}, "reprocessing": {'foo': 'bam'}},
+        ...     'key2': {None: {'foo': 'baz'}},
+        ... })
+        """
+        with sentry_sdk.start_span(op="nodestore.set_subkeys_multi") as span:
+            span.set_tag("num_ids", len(items))
+            cache_items = {}
+            bytes_items = {}
+            for id, data in items.items():
+                cache_item = data.get(None)
+                if cache_item:
+                    cache_items[id] = cache_item
+                bytes_items[id] = self._encode(data)
+
+            if bytes_items:
+                self._set_bytes_multi(bytes_items, ttl=ttl)
+            # set cache only after encoding and write to nodestore has succeeded
+            if cache_items:
+                self._set_cache_items(cache_items)
+
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
 
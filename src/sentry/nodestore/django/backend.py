@@ -2,10 +2,12 @@ import logging
 import math
 import pickle
 
+from django.db import connections, router
 from django.utils import timezone
+from psycopg2.extras import execute_values
 
 from sentry.db.models import create_or_update
-from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.base import INDEXED_FORMAT_MAGIC, NodeStorage
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
@@ -23,7 +25,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
-            if value.startswith(b"{"):
+            if value.startswith(b"{") or value.startswith(INDEXED_FORMAT_MAGIC):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
             if subkey is None:
@@ -51,6 +53,25 @@ class DjangoNodeStorage(NodeStorage):
     def _set_bytes(self, id, data, ttl=None):
         create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
 
+    def _set_bytes_multi(self, items, ttl=None):
+        if len(items) == 1:
+            for id, data in items.items():
+                self._set_bytes(id, data, ttl=ttl)
+            return
+
+        timestamp = timezone.now()
+        # Rows are written in id order so that concurrent batches touching the
+        # same nodes lock them in the same order.
+        rows = [(id, compress(items[id]), timestamp) for id in sorted(items)]
+        connection = connections[router.db_for_write(Node)]
+        sql = (
+            f"INSERT INTO {connection.ops.quote_name(Node._meta.db_table)} (id, data, timestamp) "
+            "VALUES %s "
+            "ON CONFLICT (id) DO UPDATE SET data = EXCLUDED.data, timestamp = EXCLUDED.timestamp"
+        )
+        with connection.cursor() as cursor:
+            execute_values(cursor, sql, rows, page_size=len(rows))
+
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
 
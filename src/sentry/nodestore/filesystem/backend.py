@@ -0,0 +1,379 @@
+import fcntl
+import mmap
+import os
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+import sentry_sdk
+import zstandard
+
+from sentry.nodestore.base import NodeStorage
+
+# Index records are tab-separated lines of ``id, offset, length``. A record
+# with an empty offset and length is a tombstone for a deleted node. Every
+# segment has its own index: an append-only ``.log`` while the segment is
+# written to, which is sorted by id into an ``.idx`` once the segment is full.
+LOCK_FILENAME = "lock"
+SEQUENCE_FILENAME = "sequence"
+SEGMENT_SUFFIX = ".seg"
+LOG_SUFFIX = ".log"
+SORTED_INDEX_SUFFIX = ".idx"
+
+
+def _parse_location(record):
+    offset, length = record.split(b"\t")
+    if not offset:
+        return None
+    return int(offset), int(length)
+
+
+def _search_sorted_index(data, id):
+    """
+    Binary search the lines of a sorted index for ``id``, returning the rest
+    of its record or ``None`` if the index does not contain it.
+    """
+    lo, hi = 0, len(data)
+    while lo < hi:
+        # `lo` and `hi` always point to the start of a line
+        start = data.rfind(b"\n", lo, (lo + hi) // 2) + 1 or lo
+        end = data.find(b"\n", start)
+        key, _, record = data[start:end].partition(b"\t")
+        if key == id:
+            return record
+        if key < id:
+            lo = end + 1
+        else:
+            hi = start
+    return None
+
+
+class FilesystemNodeStorage(NodeStorage):
+    """
+    A filesystem-based backend for storing node data, intended for
+    single-host installs that do not want event payloads in Postgres.
+
+    Nodes are hashed into ``shards`` directories. Within a shard, compressed
+    nodes are appended to segment files which are rolled over once they grow
+    beyond ``max_segment_size`` bytes. Segments are numbered from a per-shard
+    sequence, so their names are never reused. Each segment has an index of
+    the nodes written while it was the latest one, and a node is looked up in
+    the indexes of the newest segment first. Full segments have their index
+    sorted, so it is binary searched on disk; only the index of the segment
+    currently written to is kept in memory.
+
+    Overwritten and deleted nodes are reclaimed when their segment expires in
+    ``cleanup``, which deletes whole segments that have not been written to
+    since the cutoff.
+
+    Writers take an exclusive ``flock`` on the shard, so the storage can be
+    shared by multiple processes on the same host.
+
+    :param path: Directory the shards are stored in.
+    :param shards: Number of shard directories, fixed for the life of the
+        storage.
+    :param max_segment_size: Size in bytes after which a new segment file is
+        started.
+    :param compression_level: zstd compression level.
+
+    >>> FilesystemNodeStorage(
+    ...     path='/var/lib/sentry/nodestore',
+    ...     shards=16,
+    ... )
+    """
+
+    def __init__(self, path, shards=16, max_segment_size=64 * 1024 * 1024, compression_level=3):
+        self.path = path
+        self.shards = shards
+        self.max_segment_size = max_segment_size
+        self.compressor = zstandard.ZstdCompressor(level=compression_level)
+        self.decompressor = zstandard.ZstdDecompressor()
+        # shard -> (segment, bytes of its log read so far, {id: location})
+        self._logs = {}
+
+    def _get_shard(self, id):
+        return zlib.crc32(id.encode("utf8")) % self.shards
+
+    def _get_shard_path(self, shard):
+        return os.path.join(self.path, f"{shard:03d}")
+
+    @contextmanager
+    def _lock_shard(self, shard):
+        with open(os.path.join(self._get_shard_path(shard), LOCK_FILENAME), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _list_segments(self, shard):
+        return sorted(
+            name[: -len(SEGMENT_SUFFIX)]
+            for name in os.listdir(self._get_shard_path(shard))
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def _next_segment(self, shard, segments):
+        """
+        Take the next segment name from the sequence of a shard. Must be
+        called with the shard locked.
+        """
+        sequence_path = os.path.join(self._get_shard_path(shard), SEQUENCE_FILENAME)
+        try:
+            with open(sequence_path) as f:
+                number = int(f.read())
+        except FileNotFoundError:
+            number = int(segments[-1]) + 1 if segments else 0
+
+        tmp_path = f"{sequence_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(number + 1))
+        os.rename(tmp_path, sequence_path)
+        return f"{number:010d}"
+
+    def _read_log(self, shard, segment):
+        """
+        Return the ``{id: location}`` index of a segment that is still being
+        written to. The log of the latest segment of every shard is cached, and
+        only what was appended since the last call is read.
+        """
+        cached_segment, position, index = self._logs.get(shard, (None, 0, None))
+        if cached_segment != segment:
+            position, index = 0, {}
+
+        log_path = os.path.join(self._get_shard_path(shard), segment + LOG_SUFFIX)
+        with open(log_path, "rb") as f:
+            f.seek(position)
+            data = f.read()
+
+        # A concurrent writer may have only partially appended its records.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            id, _, record = line.partition(b"\t")
+            index[id] = _parse_location(record)
+
+        self._logs[shard] = (segment, position + end, index)
+        return index
+
+    def _search_segment(self, shard, segment, ids):
+        """
+        Look up ``ids`` in the index of a segment. Returns the
+        ``{id: location}`` of those it contains, tombstones included as
+        ``None``.
+        """
+        shard_path = self._get_shard_path(shard)
+        try:
+            f = open(os.path.join(shard_path, segment + SORTED_INDEX_SUFFIX), "rb")
+        except FileNotFoundError:
+            try:
+                index = self._read_log(shard, segment)
+            except FileNotFoundError:
+                # The log was either sorted or removed by a concurrent cleanup
+                # since we checked.
+                try:
+                    f = open(os.path.join(shard_path, segment + SORTED_INDEX_SUFFIX), "rb")
+                except FileNotFoundError:
+                    return {}
+            else:
+                return {id: index[id] for id in ids if id in index}
+
+        rv = {}
+        with f:
+            if not os.fstat(f.fileno()).st_size:
+                return rv
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for id in ids:
+                    record = _search_sorted_index(data, id)
+                    if record is not None:
+                        rv[id] = _parse_location(record)
+        return rv
+
+    def _seal_segment(self, shard, segment):
+        """
+        Sort the log of a segment that will no longer be written to into its
+        index. Must be called with the shard locked.
+        """
+        shard_path = self._get_shard_path(shard)
+        log_path = os.path.join(shard_path, segment + LOG_SUFFIX)
+        try:
+            with open(log_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # The latest record of a node wins
+        records = {}
+        for line in data.splitlines():
+            id, _, record = line.partition(b"\t")
+            records[id] = record
+
+        index_path = os.path.join(shard_path, segment + SORTED_INDEX_SUFFIX)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(id + b"\t" + records[id] + b"\n" for id in sorted(records)))
+        os.rename(tmp_path, index_path)
+        os.unlink(log_path)
+
+    def _read(self, shard, locations):
+        """
+        Read ``{id: (segment, offset, length)}`` from a shard, opening every
+        segment once and reading nodes in file order.
+        """
+        by_segment = defaultdict(list)
+        for id, (segment, offset, length) in locations.items():
+            by_segment[segment].append((offset, length, id))
+
+        rv = {}
+        shard_path = self._get_shard_path(shard)
+        for segment, nodes in by_segment.items():
+            try:
+                f = open(os.path.join(shard_path, segment), "rb")
+            except FileNotFoundError:
+                # The segment was removed by a concurrent cleanup.
+                continue
+
+            with f:
+                for offset, length, id in sorted(nodes):
+                    f.seek(offset)
+                    rv[id] = self.decompressor.decompress(f.read(length))
+
+        return rv
+
+    def _get_bytes(self, id):
+        return self._get_bytes_multi([id])[id]
+
+    def _get_bytes_multi(self, id_list):
+        rv = {id: None for id in id_list}
+
+        by_shard = defaultdict(list)
+        for id in id_list:
+            by_shard[self._get_shard(id)].append(id)
+
+        with sentry_sdk.start_span(op="nodestore.filesystem.get_multi") as span:
+            span.set_tag("num_ids", len(id_list))
+            for shard, ids in by_shard.items():
+                rv.update(self._read(shard, self._locate(shard, ids)))
+
+        return rv
+
+    def _locate(self, shard, ids):
+        """
+        Return the ``{id: (segment, offset, length)}`` of the nodes of a shard
+        that exist, searching from the newest segment to the oldest.
+        """
+        remaining = {id.encode("utf8"): id for id in ids}
+        locations = {}
+        for segment in reversed(self._list_segments(shard)):
+            if not remaining:
+                break
+            for key, location in self._search_segment(shard, segment, remaining).items():
+                id = remaining.pop(key)
+                if location is not None:
+                    locations[id] = (segment + SEGMENT_SUFFIX, *location)
+        return locations
+
+    def _set_bytes(self, id, data, ttl=None):
+        self._set_bytes_multi({id: data}, ttl=ttl)
+
+    def _set_bytes_multi(self, items, ttl=None):
+        by_shard = defaultdict(list)
+        for id, data in items.items():
+            by_shard[self._get_shard(id)].append((id, self.compressor.compress(data)))
+
+        with sentry_sdk.start_span(op="nodestore.filesystem.set_multi") as span:
+            span.set_tag("num_ids", len(items))
+            for shard, nodes in by_shard.items():
+                self._append(shard, nodes)
+
+    def _append(self, shard, nodes):
+        shard_path = self._get_shard_path(shard)
+        with self._lock_shard(shard):
+            segments = self._list_segments(shard)
+            if segments:
+                segment = segments[-1]
+                offset = os.path.getsize(os.path.join(shard_path, segment + SEGMENT_SUFFIX))
+            if not segments or offset >= self.max_segment_size:
+                if segments:
+                    self._seal_segment(shard, segment)
+                segment = self._next_segment(shard, segments)
+                offset = 0
+
+            records = []
+            for id, data in nodes:
+                records.append(f"{id}\t{offset}\t{len(data)}\n")
+                offset += len(data)
+
+            with open(os.path.join(shard_path, segment + SEGMENT_SUFFIX), "ab") as f:
+                f.write(b"".join(data for _, data in nodes))
+            # Only index nodes once their data is on disk.
+            with open(os.path.join(shard_path, segment + LOG_SUFFIX), "a") as f:
+                f.write("".join(records))
+
+    def delete(self, id):
+        self.delete_multi([id])
+
+    def delete_multi(self, id_list):
+        by_shard = defaultdict(list)
+        for id in id_list:
+            by_shard[self._get_shard(id)].append(id)
+
+        with sentry_sdk.start_span(op="nodestore.filesystem.delete_multi") as span:
+            span.set_tag("num_ids", len(id_list))
+            try:
+                for shard, ids in by_shard.items():
+                    with self._lock_shard(shard):
+                        segments = self._list_segments(shard)
+                        if not segments:
+                            # Nothing is stored in the shard
+                            continue
+                        log_path = os.path.join(
+                            self._get_shard_path(shard), segments[-1] + LOG_SUFFIX
+                        )
+                        with open(log_path, "a") as f:
+                            f.write("".join(f"{id}\t\t\n" for id in ids))
+            finally:
+                self._delete_cache_items(id_list)
+
+    def cleanup(self, cutoff_timestamp):
+        cutoff = cutoff_timestamp.timestamp()
+        for shard in range(self.shards):
+            shard_path = self._get_shard_path(shard)
+            with self._lock_shard(shard):
+                for segment in self._list_segments(shard):
+                    segment_path = os.path.join(shard_path, segment + SEGMENT_SUFFIX)
+                    if os.path.getmtime(segment_path) >= cutoff:
+                        continue
+
+                    self._delete_cache_items(self._expire_segment(shard, segment))
+
+    def _expire_segment(self, shard, segment):
+        """
+        Delete a segment with its index, returning the ids of the nodes that
+        were written to it. Must be called with the shard locked.
+        """
+        shard_path = self._get_shard_path(shard)
+        ids = set()
+        for suffix in (SORTED_INDEX_SUFFIX, LOG_SUFFIX):
+            try:
+                with open(os.path.join(shard_path, segment + suffix), "rb") as f:
+                    for line in f:
+                        id, _, record = line.rstrip(b"\n").partition(b"\t")
+                        if _parse_location(record) is not None:
+                            ids.add(id.decode("utf8"))
+            except FileNotFoundError:
+                continue
+
+        # The segment goes first, so that readers never find a node in an
+        # index without its data.
+        os.unlink(os.path.join(shard_path, segment + SEGMENT_SUFFIX))
+        for suffix in (SORTED_INDEX_SUFFIX, LOG_SUFFIX):
+            try:
+                os.unlink(os.path.join(shard_path, segment + suffix))
+            except FileNotFoundError:
+                pass
+
+        return list(ids)
+
+    def bootstrap(self):
+        for shard in range(self.shards):
+            os.makedirs(self._get_shard_path(shard), exist_ok=True)
@@ -93,6 +93,8 @@ register(
 )
 
 register("api.rate-limit.org-create", default=5, flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK)
+# Run the independent fetches of serializers that support it concurrently
+register("api.serializers.concurrent-fetches", type=Bool, default=False, flags=FLAG_PRIORITIZE_DISK)
 
 # Beacon
 register("beacon.anonymous", type=Bool, flags=FLAG_REQUIRED)
@@ -217,7 +219,21 @@ register("snuba.search.max-pre-snuba-candidates", default=5000)
 register("snuba.search.chunk-growth-rate", default=1.5)
 register("snuba.search.max-chunk-size", default=2000)
 register("snuba.search.max-total-chunk-time-seconds", default=30.0)
+# Fetch the next chunk of search results from Snuba while the current one is
+# being post-filtered in Postgres.
+register("snuba.search.pipelined-chunks", type=Bool, default=False)
 register("snuba.search.hits-sample-size", default=100)
+# Cache the closed buckets of timeseries queries and only query Snuba for the
+# buckets that are not cached yet. Buckets are closed once they end more than
+# `settle-seconds` ago.
+register("snuba.timeseries-cache.enabled", type=Bool, default=False)
+register("snuba.timeseries-cache.ttl", default=60 * 60)
+register("snuba.timeseries-cache.settle-seconds", default=5 * 60)
+# Limit the concurrent queries of each referrer, adapting the limit to the
+# latency and rate limits observed from Snuba.
+register("snuba.client.adaptive-concurrency", type=Bool, default=False)
+register("snuba.client.referrer-max-concurrency", default=5)
+register("snuba.client.latency-tolerance", default=2.0)
 register("snuba.track-outcomes-sample-rate", default=0.0)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
@@ -281,6 +297,10 @@ register("outcomes.tsdb-in-consumer-sample-rate", default=0.0)  # unused
 register("nodedata.cache-sample-rate", default=0.0, flags=FLAG_PRIORITIZE_DISK)
 register("nodedata.cache-on-save", default=False, flags=FLAG_PRIORITIZE_DISK)
 
+# Write buffer filters and extras with the msgpack encoding instead of pickle.
+# Only enable once all workers are able to read the new format.
+register("buffer.msgpack-encoding", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Use nodestore for eventstore.get_events
 register("eventstore.use-nodestore", default=False, flags=FLAG_PRIORITIZE_DISK)
 
@@ -314,6 +334,10 @@ register("mocks.jira", default=False)
 # Record statistics about event payloads and their compressibility
 register("store.nodestore-stats-sample-rate", default=0.0)  # unused
 
+# Write nodes with a header of subkey offsets instead of newline-separated
+# payloads. Readers understand both formats.
+register("nodestore.indexed-format", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # Killswitch to stop storing any reprocessing payloads.
 register("store.reprocessing-force-disable", default=False)
 
@@ -332,6 +356,7 @@ register("store.load-shed-symbolicate-event-projects", type=Any, default=[])
 register("store.symbolicate-event-lpq-never", type=Sequence, default=[])
 register("store.symbolicate-event-lpq-always", type=Sequence, default=[])
 register("post_process.get-autoassign-owners", type=Sequence, default=[])
+register("post_process.skip-stages", type=Any, default=[])
 
 # Switch for more performant project counter incr
 register("store.projectcounter-modern-upsert-sample-rate", default=0.0)
@@ -355,6 +380,14 @@ register("processing.release-archive-min-files", default=10)
 # Try to read release artifacts from zip archives
 register("processing.use-release-archives-sample-rate", default=0.0)  # unused
 
+# Number of sources and sourcemaps fetched in parallel per event when
+# processing JavaScript stacktraces. 1 fetches them one after another.
+register("processing.sourcemap-fetch-concurrency", default=1)
+
+# Read artifacts from memory-mapped release archives in the file system cache
+# (see `releasefile.cache-path`) instead of loading archives through the cache
+register("processing.release-archive-mmap", default=False, flags=FLAG_PRIORITIZE_DISK)
+
 # All Relay options (statically authenticated Relays can be registered here)
 register("relay.static_auth", default={}, flags=FLAG_NOSTORE)
 
@@ -366,6 +399,11 @@ register("eventstream:kafka-headers", default=False)
 register("post-process-forwarder:kafka-headers", default=False)
 # Number of threads to use for post processing
 register("post-process-forwarder:concurrency", default=1)
+# Number of events to post process in one task, at most 100. Batching is disabled unless above 1
+register("post-process-forwarder:batch-size", default=0)
+
+# Number of post_process_group stages of a task to run at the same time
+register("post_process.stage-concurrency", default=1)
 
 # Subscription queries sampling rate
 register("subscriptions-query.sample-rate", default=0.01)
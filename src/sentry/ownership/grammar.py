@@ -1,6 +1,7 @@
+import functools
 import operator
 import re
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from functools import reduce
 from typing import Iterable, List, Mapping, Pattern, Tuple
 
@@ -13,7 +14,7 @@ from sentry.models import ActorTuple
 from sentry.utils.glob import glob_match
 from sentry.utils.safe import get_path
 
-__all__ = ("parse_rules", "dump_schema", "load_schema")
+__all__ = ("parse_rules", "dump_schema", "load_schema", "load_compiled_schema")
 
 VERSION = 1
 
@@ -22,6 +23,15 @@ PATH = "path"
 MODULE = "module"
 CODEOWNERS = "codeowners"
 
+# Frame fields the `path` and `module` matchers test.
+FRAME_KEYS = {PATH: ("filename", "abs_path"), MODULE: ("module",)}
+
+# Glob patterns using any of these are never prefiltered, as literals inside of
+# them do not need to appear in a matching value.
+_unindexable_pattern_re = re.compile(r"[\[\]{}\\]")
+_wildcard_re = re.compile(r"[*?]")
+_path_separator_re = re.compile(r"[/\\]")
+
 # Grammar is defined in EBNF syntax.
 ownership_grammar = Grammar(
     fr"""
@@ -233,6 +243,7 @@ class OwnershipVisitor(NodeVisitor):
         return children or node
 
 
+@functools.lru_cache(maxsize=10000)
 def _path_to_regex(pattern: str) -> Pattern[str]:
     """
     ported from https://github.com/hmarr/codeowners/blob/d0452091447bd2a29ee508eebc5a79874fb5d4ff/match.go#L33
@@ -337,6 +348,149 @@ def _iter_frames(data):
             continue
 
 
+def _get_glob_literal(pattern):
+    """
+    Returns the longest literal, case-folded, that every value matched by a
+    `path` or `module` pattern contains, or `None` if there is none that can
+    be determined.
+    """
+    if _unindexable_pattern_re.search(pattern):
+        return None
+
+    # Values are matched with normalized path separators, so separators
+    # cannot be relied upon.
+    literals = [
+        part
+        for literal in _wildcard_re.split(pattern)
+        for part in _path_separator_re.split(literal)
+    ]
+    return max(literals, key=len).casefold() or None
+
+
+def _get_codeowners_prefix(pattern):
+    """
+    Returns `(anchored, prefix)` for a `codeowners` pattern. A path matched by
+    an anchored pattern starts with `prefix`, optionally after a slash, and
+    a path matched by a pattern that is not anchored has a path segment that
+    starts with `prefix`. Returns `None` if there is no prefix.
+
+    This mirrors how `_path_to_regex` builds the regex for the pattern.
+    """
+    if pattern[0] == "\\":
+        return None
+
+    slash_pos = pattern.find("/")
+    anchored = slash_pos > -1 and slash_pos != len(pattern) - 1
+    pattern = pattern.rstrip("/")
+    if anchored and pattern[:1] == "/":
+        pattern = pattern[1:]
+
+    prefix = _wildcard_re.split(pattern, 1)[0]
+    if not prefix:
+        return None
+    return anchored, prefix
+
+
+def _iter_segment_starts(path):
+    yield 0
+    pos = path.find("/")
+    while pos != -1:
+        yield pos + 1
+        pos = path.find("/", pos + 1)
+
+
+class CompiledRules:
+    """
+    A list of ownership rules compiled for matching many events.
+
+    The frame paths and modules of an event are extracted once. `codeowners`
+    rules are indexed by the literal prefix of their pattern and only tested
+    against the paths starting with it, and `path` and `module` rules are
+    skipped when their longest literal appears in none of the values. The
+    matching rules are the same, and in the same order, as when testing
+    every rule against the event.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Indexes of rules tested with `Rule.test`
+        self._other = []
+        # (rule index, type, literal) of `path` and `module` rules
+        self._globs = []
+        # rule index -> regex of `codeowners` rules
+        self._regexes = {}
+        # Indexes of `codeowners` rules tested against every path
+        self._codeowners = []
+        # anchored -> prefix length -> {prefix: [rule index]}
+        self._prefixes = {True: {}, False: {}}
+
+        for idx, rule in enumerate(rules):
+            type, pattern = rule.matcher
+            if type in FRAME_KEYS:
+                self._globs.append((idx, type, _get_glob_literal(pattern)))
+            elif type == CODEOWNERS:
+                self._regexes[idx] = _path_to_regex(pattern)
+                prefix = _get_codeowners_prefix(pattern)
+                if prefix is None:
+                    self._codeowners.append(idx)
+                else:
+                    anchored, prefix = prefix
+                    by_prefix = self._prefixes[anchored].setdefault(len(prefix), defaultdict(list))
+                    by_prefix[prefix].append(idx)
+            else:
+                self._other.append(idx)
+
+    def _get_codeowners_candidates(self, path):
+        candidates = set(self._codeowners)
+
+        anchored = self._prefixes[True]
+        for value in (path, path[1:]) if path[:1] == "/" else (path,):
+            for length, by_prefix in anchored.items():
+                candidates.update(by_prefix.get(value[:length], ()))
+
+        unanchored = self._prefixes[False]
+        if unanchored:
+            for start in _iter_segment_starts(path):
+                for length, by_prefix in unanchored.items():
+                    candidates.update(by_prefix.get(path[start : start + length], ()))
+
+        return candidates
+
+    def get_matching_rules(self, data):
+        """Returns the rules matching the event, in order."""
+        matched = {idx for idx in self._other if self.rules[idx].test(data)}
+
+        frames = list(_iter_frames(data))
+        if self._globs:
+            values = {
+                type: list(dict.fromkeys(v for f in frames for v in map(f.get, keys) if v))
+                for type, keys in FRAME_KEYS.items()
+            }
+            haystacks = {type: "\n".join(v).casefold() for type, v in values.items()}
+            for idx, type, literal in self._globs:
+                if literal is not None and literal not in haystacks[type]:
+                    continue
+                pattern = self.rules[idx].matcher.pattern
+                if any(
+                    glob_match(value, pattern, ignorecase=True, path_normalize=True)
+                    for value in values[type]
+                ):
+                    matched.add(idx)
+
+        if self._regexes:
+            keys = FRAME_KEYS[PATH]
+            paths = dict.fromkeys(
+                next((frame.get(key) for key in keys if frame.get(key)), None) for frame in frames
+            )
+            paths.pop(None, None)
+            for path in paths:
+                for idx in self._get_codeowners_candidates(path):
+                    if idx not in matched and self._regexes[idx].search(path):
+                        matched.add(idx)
+
+        return [self.rules[idx] for idx in sorted(matched)]
+
+
 def parse_rules(data):
     """Convert a raw text input into a Rule tree"""
     tree = ownership_grammar.parse(data)
@@ -355,6 +509,35 @@ def load_schema(schema):
     return [Rule.load(r) for r in schema["rules"]]
 
 
+class _KeyedSchema:
+    """Hashes and compares a schema by `key` alone, for use with `lru_cache`."""
+
+    __slots__ = ("schema", "key")
+
+    def __init__(self, schema, key):
+        self.schema = schema
+        self.key = key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, _KeyedSchema) and self.key == other.key
+
+
+def load_compiled_schema(schema, key):
+    """
+    Convert a JSON schema into `CompiledRules`, which are only compiled once
+    for every `key`. The key must change whenever the schema does.
+    """
+    return _load_compiled_schema(_KeyedSchema(schema, key))
+
+
+@functools.lru_cache(maxsize=100)
+def _load_compiled_schema(keyed_schema):
+    return CompiledRules(load_schema(keyed_schema.schema))
+
+
 def convert_schema_to_rules_text(schema):
     rules = load_schema(schema)
     text = ""
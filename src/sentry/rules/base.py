@@ -85,8 +85,18 @@ class RuleBase(metaclass=RuleDescriptor):
 
 
 class EventState:
-    def __init__(self, is_new, is_regression, is_new_group_environment, has_reappeared):
+    def __init__(
+        self,
+        is_new,
+        is_regression,
+        is_new_group_environment,
+        has_reappeared,
+        frequency_queries=None,
+    ):
         self.is_new = is_new
         self.is_regression = is_regression
         self.is_new_group_environment = is_new_group_environment
         self.has_reappeared = has_reappeared
+        # A `FrequencyQueryBatch` shared by the frequency conditions of all
+        # rules evaluated for the event
+        self.frequency_queries = frequency_queries
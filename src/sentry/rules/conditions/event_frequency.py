@@ -1,6 +1,8 @@
 import logging
 import re
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Iterable, MutableMapping, NamedTuple, Optional
 
 from django import forms
 from django.core.cache import cache
@@ -77,6 +79,101 @@ class EventFrequencyForm(forms.Form):
         return cleaned_data
 
 
+class FrequencyQuery(NamedTuple):
+    """A TSDB query of a frequency condition, for a single issue."""
+
+    method: str  # `get_sums` or `get_distinct_counts_totals`
+    model: Any
+    key: int
+    start: datetime
+    end: datetime
+    environment_id: Optional[int]
+
+
+class FrequencyQueryBatch:
+    """
+    Runs the TSDB queries of the frequency conditions of all rules that are
+    evaluated for an event.
+
+    Every distinct query only runs once. Sums for the same issue and
+    environment that end at the same time and use the same rollup are fetched
+    with a single `get_range` call over the longest of their intervals, and
+    each query sums up the buckets `get_sums` would have fetched for it.
+    Conditions read the end of their intervals from `now`, so that the
+    queries of different rules line up.
+    """
+
+    def __init__(self, tsdb, now: Optional[datetime] = None) -> None:
+        self.tsdb = tsdb
+        self.now = now or timezone.now()
+        self._pending: MutableMapping[FrequencyQuery, None] = {}
+        self._results: MutableMapping[FrequencyQuery, int] = {}
+
+    def add(self, queries: Iterable[FrequencyQuery]) -> None:
+        for query in queries:
+            if query not in self._results:
+                self._pending[query] = None
+
+    def get(self, query: FrequencyQuery) -> int:
+        if query not in self._results:
+            self.add([query])
+            self.execute()
+        return self._results[query]
+
+    def execute(self) -> None:
+        pending = list(self._pending)
+        self._pending.clear()
+        if not pending:
+            return
+
+        sums = defaultdict(list)
+        for query in pending:
+            if query.method == "get_sums":
+                rollup = self.tsdb.get_optimal_rollup(query.start, query.end)
+                sums[(query.model, query.key, query.end, query.environment_id, rollup)].append(
+                    query
+                )
+            else:
+                self._results[query] = self._run(query)
+
+        for (model, key, end, environment_id, rollup), queries in sums.items():
+            if len(queries) == 1:
+                self._results[queries[0]] = self._run(queries[0])
+                continue
+
+            points = self.tsdb.get_range(
+                model=model,
+                keys=[key],
+                start=min(query.start for query in queries),
+                end=end,
+                rollup=rollup,
+                environment_ids=[environment_id] if environment_id is not None else None,
+                use_cache=True,
+            )[key]
+            for query in queries:
+                _, series = self.tsdb.get_optimal_rollup_series(query.start, end, rollup)
+                series = set(series)
+                self._results[query] = sum(
+                    count for timestamp, count in points if timestamp in series
+                )
+
+        metrics.incr("rules.conditions.frequency_queries", amount=len(pending))
+        metrics.incr(
+            "rules.conditions.frequency_queries.requests",
+            amount=len(pending) - sum(len(queries) - 1 for queries in sums.values()),
+        )
+
+    def _run(self, query: FrequencyQuery) -> int:
+        return getattr(self.tsdb, query.method)(
+            model=query.model,
+            keys=[query.key],
+            start=query.start,
+            end=query.end,
+            environment_id=query.environment_id,
+            use_cache=True,
+        )[query.key]
+
+
 class BaseEventFrequencyCondition(EventCondition):
     intervals = standard_intervals
     form_cls = EventFrequencyForm
@@ -110,11 +207,13 @@ class BaseEventFrequencyCondition(EventCondition):
         if not interval:
             return False
 
-        current_value = self.get_rate(event, interval, self.rule.environment_id)
+        current_value = self.get_rate(
+            event, interval, self.rule.environment_id, state.frequency_queries
+        )
         return current_value > value
 
-    def query(self, event, start, end, environment_id):
-        query_result = self.query_hook(event, start, end, environment_id)
+    def query(self, event, start, end, environment_id, frequency_queries):
+        query_result = self.query_hook(event, start, end, environment_id, frequency_queries)
         metrics.incr(
             "rules.conditions.queried_snuba",
             tags={
@@ -124,23 +223,66 @@ class BaseEventFrequencyCondition(EventCondition):
         )
         return query_result
 
-    def query_hook(self, event, start, end, environment_id):
-        """ """
+    def query_hook(self, event, start, end, environment_id, frequency_queries):
+        return frequency_queries.get(
+            self.get_frequency_query(event, start, end, environment_id=environment_id)
+        )
+
+    def get_frequency_query(self, event, start, end, environment_id):
+        """
+        Returns the `FrequencyQuery` counting the issue of `event` between
+        `start` and `end`.
+        """
         raise NotImplementedError  # subclass must implement
 
-    def get_rate(self, event, interval, environment_id):
+    def get_intervals(self, interval, end):
+        """
+        Returns the `(start, end)` intervals `get_rate` queries, the second one
+        only for percent comparisons.
+        """
         _, duration = self.intervals[interval]
-        end = timezone.now()
-        result = self.query(event, end - duration, end, environment_id=environment_id)
+        intervals = [(end - duration, end)]
         comparison_type = self.get_option("comparisonType", COMPARISON_TYPE_COUNT)
         if comparison_type == COMPARISON_TYPE_PERCENT:
             comparison_interval = comparison_intervals[self.get_option("comparisonInterval")][1]
             comparison_end = end - comparison_interval
+            intervals.append((comparison_end - duration, comparison_end))
+        return intervals
+
+    def get_frequency_queries(self, event, frequency_queries):
+        """
+        Returns the queries `passes` is going to run, so that they can be
+        prefetched together with the ones of other rules.
+        """
+        interval = self.get_option("interval")
+        if interval not in self.intervals:
+            return []
+
+        return [
+            self.get_frequency_query(event, start, end, environment_id=self.rule.environment_id)
+            for start, end in self.get_intervals(interval, frequency_queries.now)
+        ]
+
+    def get_rate(self, event, interval, environment_id, frequency_queries=None):
+        if frequency_queries is None:
+            frequency_queries = FrequencyQueryBatch(self.tsdb)
+
+        intervals = self.get_intervals(interval, frequency_queries.now)
+        start, end = intervals[0]
+        result = self.query(
+            event, start, end, environment_id=environment_id, frequency_queries=frequency_queries
+        )
+        if len(intervals) > 1:
+            comparison_start, comparison_end = intervals[1]
             # TODO: Figure out if there's a way we can do this less frequently. All queries are
             # automatically cached for 10s. We could consider trying to cache this and the main
             # query for 20s to reduce the load.
             comparison_result = self.query(
-                event, comparison_end - duration, comparison_end, environment_id=environment_id
+                event,
+                comparison_start,
+                comparison_end,
+                environment_id=environment_id,
+                frequency_queries=frequency_queries,
             )
             result = (
                 int(max(0, ((result / comparison_result) * 100) - 100))
@@ -165,29 +307,29 @@ class BaseEventFrequencyCondition(EventCondition):
 class EventFrequencyCondition(BaseEventFrequencyCondition):
     label = "The issue is seen more than {value} times in {interval}"
 
-    def query_hook(self, event, start, end, environment_id):
-        return self.tsdb.get_sums(
+    def get_frequency_query(self, event, start, end, environment_id):
+        return FrequencyQuery(
+            method="get_sums",
             model=self.tsdb.models.group,
-            keys=[event.group_id],
+            key=event.group_id,
             start=start,
             end=end,
             environment_id=environment_id,
-            use_cache=True,
-        )[event.group_id]
+        )
 
 
 class EventUniqueUserFrequencyCondition(BaseEventFrequencyCondition):
     label = "The issue is seen by more than {value} users in {interval}"
 
-    def query_hook(self, event, start, end, environment_id):
-        return self.tsdb.get_distinct_counts_totals(
+    def get_frequency_query(self, event, start, end, environment_id):
+        return FrequencyQuery(
+            method="get_distinct_counts_totals",
             model=self.tsdb.models.users_affected_by_group,
-            keys=[event.group_id],
+            key=event.group_id,
             start=start,
             end=end,
             environment_id=environment_id,
-            use_cache=True,
-        )[event.group_id]
+        )
 
 
 percent_intervals = {
@@ -252,7 +394,22 @@ class EventFrequencyPercentCondition(BaseEventFrequencyCondition):
             ],
         }
 
-    def query_hook(self, event, start, end, environment_id):
+    def get_frequency_query(self, event, start, end, environment_id):
+        return FrequencyQuery(
+            method="get_sums",
+            model=self.tsdb.models.group,
+            key=event.group_id,
+            start=start,
+            end=end,
+            environment_id=environment_id,
+        )
+
+    def get_frequency_queries(self, event, frequency_queries):
+        # The issue count is only queried for projects with enough sessions, which `query_hook`
+        # checks first. Prefetching it would query Snuba for every other project as well.
+        return []
+
+    def query_hook(self, event, start, end, environment_id, frequency_queries):
         project_id = event.project_id
         cache_key = f"r.c.spc:{project_id}-{environment_id}"
         session_count_last_hour = cache.get(cache_key)
@@ -273,14 +430,9 @@ class EventFrequencyPercentCondition(BaseEventFrequencyCondition):
                 percent_intervals[self.get_option("interval")][1].total_seconds() // 60
             )
             avg_sessions_in_interval = session_count_last_hour / (60 / interval_in_minutes)
-            issue_count = self.tsdb.get_sums(
-                model=self.tsdb.models.group,
-                keys=[event.group_id],
-                start=start,
-                end=end,
-                environment_id=environment_id,
-                use_cache=True,
-            )[event.group_id]
+            issue_count = frequency_queries.get(
+                self.get_frequency_query(event, start, end, environment_id=environment_id)
+            )
             if issue_count > avg_sessions_in_interval:
                 # We want to better understand when and why this is happening, so we're logging it for now
                 self.logger.info(
@@ -1,26 +1,99 @@
 import logging
-from collections import namedtuple
+import threading
+from collections import OrderedDict, namedtuple
+from copy import deepcopy
 from datetime import timedelta
 from random import randrange
-from typing import Mapping, Sequence, Set
+from typing import Mapping, Optional, Sequence, Set
 
 from django.core.cache import cache
 from django.utils import timezone
 
-from sentry import analytics
+from sentry import analytics, tsdb
 from sentry.models import GroupRuleStatus, Rule
 from sentry.rules import EventState, history, rules
+from sentry.rules.conditions.event_frequency import (
+    BaseEventFrequencyCondition,
+    FrequencyQueryBatch,
+)
+from sentry.utils import metrics
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
 RuleFuture = namedtuple("RuleFuture", ["rule", "kwargs"])
 SLOW_CONDITION_MATCHES = ["event_frequency"]
+# Maximum number of compiled rules kept by a process
+COMPILED_RULE_CACHE_SIZE = 10000
+
+
+class CompiledRule:
+    """
+    A rule with its filters and conditions instantiated. Slow conditions (see
+    `SLOW_CONDITION_MATCHES`) are kept apart, so that they are only evaluated
+    for rules that the other conditions don't decide already.
+
+    Filters and conditions don't keep any state between evaluations, so a
+    compiled rule is shared by all events until the rule changes.
+    """
+
+    def __init__(self, rule, filters, conditions, slow_conditions):
+        self.rule = rule
+        self.condition_match = rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH
+        self.filter_match = rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH
+        self.frequency = rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY
+        self.filters = filters
+        self.conditions = conditions
+        self.slow_conditions = slow_conditions
+        self._definition = self.get_definition(rule, copy=True)
+
+    @staticmethod
+    def get_definition(rule, copy=False):
+        data = deepcopy(rule.data) if copy else rule.data
+        return rule.project_id, rule.environment_id, rule.label, rule.date_added, data
+
+    def is_compiled_from(self, rule):
+        return self._definition == self.get_definition(rule)
+
+
+class CompiledRuleCache:
+    """A bounded, thread-safe LRU mapping of rule IDs to their `CompiledRule`."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, rule):
+        with self._lock:
+            compiled = self._entries.get(rule.id)
+            if compiled is not None:
+                self._entries.move_to_end(rule.id)
+
+        if compiled is not None and compiled.is_compiled_from(rule):
+            return compiled
+        return None
+
+    def set(self, rule, compiled):
+        with self._lock:
+            self._entries[rule.id] = compiled
+            self._entries.move_to_end(rule.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_rules = CompiledRuleCache(COMPILED_RULE_CACHE_SIZE)
 
 
 class RuleProcessor:
     logger = logging.getLogger("sentry.rules")
 
-    def __init__(self, event, is_new, is_regression, is_new_group_environment, has_reappeared):
+    def __init__(
+        self, event, is_new, is_regression, is_new_group_environment, has_reappeared, rules=None
+    ):
         self.event = event
         self.group = event.group
         self.project = event.project
@@ -29,15 +102,19 @@ class RuleProcessor:
         self.is_regression = is_regression
         self.is_new_group_environment = is_new_group_environment
         self.has_reappeared = has_reappeared
+        self.rules = rules
 
         self.grouped_futures = {}
 
     def get_rules(self):
         """
-        Get all of the rules for this project from the DB (or cache).
+        Get all of the rules for this project from the DB (or cache), unless
+        they have been passed in already.
 
         :return: a list of `Rule`s
         """
+        if self.rules is not None:
+            return self.rules
         return Rule.get_for_project(self.project.id)
 
     def _build_rule_status_cache_key(self, rule_id: int) -> str:
@@ -101,13 +178,9 @@ class RuleProcessor:
 
         return rule_statuses
 
-    def condition_matches(self, condition, state, rule):
-        condition_cls = rules.get(condition["id"])
-        if condition_cls is None:
-            self.logger.warning("Unregistered condition %r", condition["id"])
-            return
-
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
+    def condition_matches(self, condition_inst, state):
+        if condition_inst is None:
+            return None
         return safe_execute(condition_inst.passes, self.event, state, _with_transaction=False)
 
     def get_rule_type(self, condition):
@@ -118,12 +191,57 @@ class RuleProcessor:
 
         return rule_cls.rule_type
 
+    def compile_rule(self, rule):
+        """
+        Instantiates the filters and conditions of a rule.
+
+        :param rule: `Rule` object
+        :return: `CompiledRule`
+        """
+        filters = []
+        conditions = []
+        slow_conditions = []
+        for rule_cond in rule.data.get("conditions", ()):
+            rule_cls = rules.get(rule_cond["id"])
+            if rule_cls is None:
+                # Unregistered conditions are treated as filters that never pass
+                self.logger.warning("Unregistered condition or filter %r", rule_cond["id"])
+                filters.append(None)
+                continue
+
+            condition_inst = rule_cls(self.project, data=rule_cond, rule=rule)
+            if rule_cls.rule_type != "condition/event":
+                filters.append(condition_inst)
+            elif any(match in rule_cond["id"] for match in SLOW_CONDITION_MATCHES):
+                # Slow conditions are evaluated last, so that they can be skipped if cheaper
+                # conditions decide the rule already.
+                slow_conditions.append(condition_inst)
+            else:
+                conditions.append(condition_inst)
+
+        return CompiledRule(rule, filters, conditions, slow_conditions)
+
+    def get_compiled_rules(self, rules_list):
+        compiled_list = []
+        compiled_count = 0
+        for rule in rules_list:
+            compiled = compiled_rules.get(rule)
+            if compiled is None:
+                compiled = self.compile_rule(rule)
+                compiled_rules.set(rule, compiled)
+                compiled_count += 1
+            compiled_list.append(compiled)
+
+        metrics.incr("rules.processor.compiled", amount=compiled_count)
+        return compiled_list
+
     def get_state(self):
         return EventState(
             is_new=self.is_new,
             is_regression=self.is_regression,
             is_new_group_environment=self.is_new_group_environment,
             has_reappeared=self.has_reappeared,
+            frequency_queries=FrequencyQueryBatch(tsdb),
         )
 
     def get_match_function(self, match_name):
@@ -135,62 +253,83 @@ class RuleProcessor:
             return lambda bool_iter: not any(bool_iter)
         return None
 
-    def apply_rule(self, rule, status):
-        """
-        If all conditions and filters pass, execute every action.
+    def predicates_pass(self, predicates, match, state):
+        predicate_func = self.get_match_function(match)
+        return predicate_func(self.condition_matches(p, state) for p in predicates)
 
-        :param rule: `Rule` object
-        :return: void
+    def check_rule(self, compiled, status, state) -> Optional[bool]:
         """
-        condition_match = rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH
-        filter_match = rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH
-        rule_condition_list = rule.data.get("conditions", ())
-        frequency = rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY
+        Evaluates everything but the slow conditions of a rule.
 
+        :param compiled: `CompiledRule` object
+        :return: whether the rule passes, or `None` if that depends on its slow
+            conditions
+        """
+        rule = compiled.rule
         if (
             rule.environment_id is not None
             and self.event.get_environment().id != rule.environment_id
         ):
-            return
+            return False
 
-        now = timezone.now()
-        freq_offset = now - timedelta(minutes=frequency)
+        freq_offset = timezone.now() - timedelta(minutes=compiled.frequency)
         if status.last_active and status.last_active > freq_offset:
-            return
-
-        state = self.get_state()
-
-        condition_list = []
-        filter_list = []
-        for rule_cond in rule_condition_list:
-            if self.get_rule_type(rule_cond) == "condition/event":
-                condition_list.append(rule_cond)
-            else:
-                filter_list.append(rule_cond)
-
-        # Sort `condition_list` so that most expensive conditions run last.
-        condition_list.sort(
-            key=lambda condition: any(
-                condition_match in condition["id"] for condition_match in SLOW_CONDITION_MATCHES
-            )
-        )
+            return False
 
         for predicate_list, match, name in (
-            (filter_list, filter_match, "filter"),
-            (condition_list, condition_match, "condition"),
+            (compiled.filters, compiled.filter_match, "filter"),
+            (compiled.conditions + compiled.slow_conditions, compiled.condition_match, "condition"),
         ):
-            if not predicate_list:
-                continue
-            predicate_iter = (self.condition_matches(f, state, rule) for f in predicate_list)
-            predicate_func = self.get_match_function(match)
-            if predicate_func:
-                if not predicate_func(predicate_iter):
-                    return
-            else:
+            if predicate_list and self.get_match_function(match) is None:
                 self.logger.error(
-                    f"Unsupported {name}_match {match!r} for rule {rule.id}", filter_match, rule.id
+                    f"Unsupported {name}_match {match!r} for rule {rule.id}", match, rule.id
                 )
-                return
+                return False
+
+        if compiled.filters and not self.predicates_pass(
+            compiled.filters, compiled.filter_match, state
+        ):
+            return False
+
+        if not compiled.conditions:
+            return True if not compiled.slow_conditions else None
+
+        passed = self.predicates_pass(compiled.conditions, compiled.condition_match, state)
+        # With `any` a passing condition decides the rule, otherwise a failing one does.
+        if not compiled.slow_conditions or passed == (compiled.condition_match == "any"):
+            return passed
+        return None
+
+    def prefetch_slow_conditions(self, compiled_list, state):
+        """
+        Runs the queries of all slow conditions of `compiled_list` in as few
+        requests as possible, rather than one by one as they get evaluated.
+        """
+        frequency_queries = state.frequency_queries
+        for compiled in compiled_list:
+            for condition_inst in compiled.slow_conditions:
+                if isinstance(condition_inst, BaseEventFrequencyCondition):
+                    queries = safe_execute(
+                        condition_inst.get_frequency_queries,
+                        self.event,
+                        frequency_queries,
+                        _with_transaction=False,
+                    )
+                    frequency_queries.add(queries or ())
+
+        # Conditions run any queries that failed here on their own
+        safe_execute(frequency_queries.execute, _with_transaction=False)
+
+    def apply_rule(self, rule, status, state):
+        """
+        Execute every action of a rule whose conditions and filters passed.
+
+        :param rule: `Rule` object
+        :return: void
+        """
+        frequency = rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY
+        now = timezone.now()
+        freq_offset = now - timedelta(minutes=frequency)
 
         updated = (
             GroupRuleStatus.objects.filter(id=status.id)
@@ -243,6 +382,22 @@ class RuleProcessor:
         self.grouped_futures.clear()
         rules = self.get_rules()
         rule_statuses = self.bulk_get_rule_status(rules)
-        for rule in rules:
-            self.apply_rule(rule, rule_statuses[rule.id])
+        compiled_list = self.get_compiled_rules(rules)
+        state = self.get_state()
+
+        results = [
+            self.check_rule(compiled, rule_statuses[rule.id], state)
+            for rule, compiled in zip(rules, compiled_list)
+        ]
+        pending = [compiled for compiled, passed in zip(compiled_list, results) if passed is None]
+        if pending:
+            self.prefetch_slow_conditions(pending, state)
+
+        for rule, compiled, passed in zip(rules, compiled_list, results):
+            if passed is None:
+                passed = self.predicates_pass(
+                    compiled.slow_conditions, compiled.condition_match, state
+                )
+            if passed:
+                self.apply_rule(rule, rule_statuses[rule.id], state)
         return self.grouped_futures.values()
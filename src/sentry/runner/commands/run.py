@@ -495,6 +495,12 @@ def batching_kafka_options(group):
     default=None,
     help="Thread pool size (only utilitized for message types that support concurrent processing)",
 )
+@click.option(
+    "--save-transactions-in-batch",
+    default=False,
+    is_flag=True,
+    help="Save the transactions of each batch in the consumer instead of spawning a task per transaction.",
+)
 @configuration
 def ingest_consumer(consumer_types, all_consumer_types, **options):
     """
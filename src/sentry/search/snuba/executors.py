@@ -3,13 +3,16 @@ from __future__ import annotations
 import logging
 import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime, timedelta
 from hashlib import md5
 from typing import Any, List, Mapping, Sequence, Set, Tuple
 
 import sentry_sdk
+from django.db import close_old_connections
 from django.utils import timezone
+from sentry_sdk import Hub
 from snuba_sdk import Direction, Op
 from snuba_sdk.expressions import Expression
 from snuba_sdk.query import Column, Condition, Entity, Function, Join, Limit, OrderBy, Query
@@ -27,6 +30,19 @@ from sentry.search.utils import validate_cdc_search_filters
 from sentry.utils import json, metrics, snuba
 from sentry.utils.cursors import Cursor, CursorResult
 
+# Fetches the next chunk of Snuba search results while the current one is
+# post-filtered, see `snuba.search.pipelined-chunks`.
+_chunk_thread_pool = ThreadPoolExecutor(max_workers=10)
+
+
+def _search_chunk_in_thread(hub: Hub, search_chunk: Any, *args: Any) -> Any:
+    # Worker threads keep their database connections between searches, so
+    # drop the ones that errored or outlived `CONN_MAX_AGE`, like Django does
+    # between requests.
+    close_old_connections()
+    with hub:
+        return search_chunk(*args)
+
 
 def get_search_filter(search_filters: Sequence[SearchFilter], name: str, operator: str) -> Any:
     """
@@ -449,30 +465,26 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
             return self.empty_result
 
         paginator_results = self.empty_result
-        result_groups = []
+        paginator = SequencePaginator([], reverse=True, **paginator_options)
         result_group_ids = set()
 
-        max_time = options.get("snuba.search.max-total-chunk-time-seconds")
-        time_start = time.time()
-        more_results = False
-
-        # Do smaller searches in chunks until we have enough results
-        # to answer the query (or hit the end of possible results). We do
-        # this because a common case for search is to return 100 groups
-        # sorted by `last_seen`, and we want to avoid returning all of
-        # a project's groups and then post-sorting them all in Postgres
-        # when typically the first N results will do.
-        while (time.time() - time_start) < max_time:
-            num_chunks += 1
+        # Without candidates every chunk is post-filtered in Postgres, and the
+        # next chunk can be fetched from Snuba in the meantime. It is discarded
+        # if the current chunk already satisfies the query.
+        pipelined = not group_ids and options.get("snuba.search.pipelined-chunks")
+        next_chunk = None
+        chunk_tags = {"pipelined": pipelined}
 
+        def next_chunk_limit(chunk_limit: int) -> int:
             # grow the chunk size on each iteration to account for huge projects
             # and weird queries, up to a max size
             chunk_limit = min(int(chunk_limit * chunk_growth), max_chunk_size)
             # but if we have group_ids always query for at least that many items
-            chunk_limit = max(chunk_limit, len(group_ids))
+            return max(chunk_limit, len(group_ids))
 
+        def search_chunk(chunk_limit: int, offset: int) -> Tuple[List[Tuple[int, Any]], int]:
             # {group_id: group_score, ...}
-            snuba_groups, total = self.snuba_search(
+            return self.snuba_search(
                 start=start,
                 end=end,
                 project_ids=[p.id for p in projects],
@@ -485,56 +497,100 @@ class PostgresSnubaQueryExecutor(AbstractQueryExecutor):
                 offset=offset,
                 search_filters=search_filters,
             )
-            metrics.timing("snuba.search.num_snuba_results", len(snuba_groups))
-            count = len(snuba_groups)
-            more_results = count >= limit and (offset + limit) < total
-            offset += len(snuba_groups)
-
-            if not snuba_groups:
-                break
 
-            if group_ids:
-                # pre-filtered candidates were passed down to Snuba, so we're
-                # finished with filtering and these are the only results. Note
-                # that because we set the chunk size to at least the size of
-                # the group_ids, we know we got all of them (ie there are
-                # no more chunks after the first)
-                result_groups = snuba_groups
-                if count_hits and hits is None:
-                    hits = len(snuba_groups)
-            else:
-                # pre-filtered candidates were *not* passed down to Snuba,
-                # so we need to do post-filtering to verify Sentry DB predicates
-                filtered_group_ids = group_queryset.filter(
-                    id__in=[gid for gid, _ in snuba_groups]
-                ).values_list("id", flat=True)
-
-                group_to_score = dict(snuba_groups)
-                for group_id in filtered_group_ids:
-                    if group_id in result_group_ids:
-                        # because we're doing multiple Snuba queries, which
-                        # happen outside of a transaction, there is a small possibility
-                        # of groups moving around in the sort scoring underneath us,
-                        # so we at least want to protect against duplicates
-                        continue
+        max_time = options.get("snuba.search.max-total-chunk-time-seconds")
+        time_start = time.time()
+        more_results = False
 
-                    group_score = group_to_score[group_id]
-                    result_group_ids.add(group_id)
-                    result_groups.append((group_id, group_score))
+        # Do smaller searches in chunks until we have enough results
+        # to answer the query (or hit the end of possible results). We do
+        # this because a common case for search is to return 100 groups
+        # sorted by `last_seen`, and we want to avoid returning all of
+        # a project's groups and then post-sorting them all in Postgres
+        # when typically the first N results will do.
+        while (time.time() - time_start) < max_time:
+            num_chunks += 1
+            chunk_limit = next_chunk_limit(chunk_limit)
+
+            with sentry_sdk.start_span(op="snuba_search.chunk") as span:
+                span.set_data("Chunk", num_chunks)
+                span.set_data("Chunk Limit", chunk_limit)
+                span.set_data("Prefetched", next_chunk is not None)
+
+                # For a prefetched chunk this only measures the time spent
+                # waiting on it.
+                with metrics.timer("snuba.search.chunk.snuba_duration", tags=chunk_tags):
+                    if next_chunk is not None:
+                        snuba_groups, total = next_chunk.result()
+                        next_chunk = None
+                    else:
+                        snuba_groups, total = search_chunk(chunk_limit, offset)
+
+                metrics.timing("snuba.search.num_snuba_results", len(snuba_groups))
+                count = len(snuba_groups)
+                more_results = count >= limit and (offset + limit) < total
+                offset += len(snuba_groups)
+
+                if not snuba_groups:
+                    break
+
+                if group_ids:
+                    # pre-filtered candidates were passed down to Snuba, so we're
+                    # finished with filtering and these are the only results. Note
+                    # that because we set the chunk size to at least the size of
+                    # the group_ids, we know we got all of them (ie there are
+                    # no more chunks after the first)
+                    paginator.extend([(score, id) for (id, score) in snuba_groups])
+                    if count_hits and hits is None:
+                        hits = len(snuba_groups)
+                else:
+                    if pipelined and more_results:
+                        next_chunk = _chunk_thread_pool.submit(
+                            _search_chunk_in_thread,
+                            Hub(Hub.current),
+                            search_chunk,
+                            next_chunk_limit(chunk_limit),
+                            offset,
+                        )
+
+                    # pre-filtered candidates were *not* passed down to Snuba,
+                    # so we need to do post-filtering to verify Sentry DB predicates
+                    with metrics.timer("snuba.search.chunk.postfilter_duration", tags=chunk_tags):
+                        filtered_group_ids = group_queryset.filter(
+                            id__in=[gid for gid, _ in snuba_groups]
+                        ).values_list("id", flat=True)
+
+                        group_to_score = dict(snuba_groups)
+                        chunk_groups = []
+                        for group_id in filtered_group_ids:
+                            if group_id in result_group_ids:
+                                # because we're doing multiple Snuba queries, which
+                                # happen outside of a transaction, there is a small possibility
+                                # of groups moving around in the sort scoring underneath us,
+                                # so we at least want to protect against duplicates
+                                continue
+
+                            result_group_ids.add(group_id)
+                            chunk_groups.append((group_to_score[group_id], group_id))
+
+                    span.set_data("Result Size", len(chunk_groups))
+                    paginator.extend(chunk_groups)
 
             # break the query loop for one of three reasons:
             # * we started with Postgres candidates and so only do one Snuba query max
             # * the paginator is returning enough results to satisfy the query (>= the limit)
             # * there are no more groups in Snuba to post-filter
-            # TODO do we actually have to rebuild this SequencePaginator every time
-            # or can we just make it after we've broken out of the loop?
-            paginator_results = SequencePaginator(
-                [(score, id) for (id, score) in result_groups], reverse=True, **paginator_options
-            ).get_result(limit, cursor, known_hits=hits, max_hits=max_hits)
+            paginator_results = paginator.get_result(
+                limit, cursor, known_hits=hits, max_hits=max_hits
+            )
 
             if group_ids or len(paginator_results.results) >= limit or not more_results:
                 break
 
+        if next_chunk is not None:
+            next_chunk.cancel()
+            metrics.incr("snuba.search.chunk.discarded")
+
         # HACK: We're using the SequencePaginator to mask the complexities of going
         # back and forth between two databases. This causes a problem with pagination
         # because we're 'lying' to the SequencePaginator (it thinks it has the entire
@@ -1,4 +1,11 @@
-from typing import Any, List, Mapping, MutableMapping, Optional, Sequence, Set
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Generic, List, Mapping, MutableMapping, Optional, Sequence, Set, TypeVar
+
+from django.db import connections, router
+from django.utils import timezone
+from psycopg2.extras import execute_values
 
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
 from sentry.utils import metrics
@@ -7,40 +14,150 @@ from sentry.utils.services import Service
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
 _INDEXER_CACHE_HIT_METRIC = "sentry_metrics.indexer.memcache.hit"
 _INDEXER_CACHE_MISS_METRIC = "sentry_metrics.indexer.memcache.miss"
+_INDEXER_LOCAL_CACHE_HIT_METRIC = "sentry_metrics.indexer.local_cache.hit"
+_INDEXER_LOCAL_CACHE_MISS_METRIC = "sentry_metrics.indexer.local_cache.miss"
+
+# How long a lookup that found nothing is remembered. Strings can be recorded
+# by other processes at any time, so this is kept short.
+NEGATIVE_CACHE_TTL = 60
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class _LocalCache(Generic[K, V]):
+    """
+    A bounded, thread-safe LRU mapping. Mappings between strings and ids never
+    change once recorded, so positive entries never expire; entries for keys
+    that were not found expire after `NEGATIVE_CACHE_TTL`.
+    """
+
+    def __init__(self, name: str, max_size: int) -> None:
+        self.name = name
+        self.max_size = max_size
+        self._entries: "OrderedDict[K, Optional[V]]" = OrderedDict()
+        self._missing: MutableMapping[K, float] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[K]) -> Mapping[K, Optional[V]]:
+        """
+        Return cached entries for `keys`. Keys known not to exist map to
+        `None`, keys not in the cache are left out.
+        """
+        rv = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    rv[key] = self._entries[key]
+                elif key in self._missing:
+                    if self._missing[key] > now:
+                        rv[key] = None
+                    else:
+                        del self._missing[key]
+
+        metrics.incr(_INDEXER_LOCAL_CACHE_HIT_METRIC, amount=len(rv), tags={"cache": self.name})
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_MISS_METRIC, amount=len(keys) - len(rv), tags={"cache": self.name}
+        )
+        return rv
+
+    def set_many(self, items: Mapping[K, V]) -> None:
+        if not self.max_size:
+            return
+
+        with self._lock:
+            for key, value in items.items():
+                self._missing.pop(key, None)
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_missing(self, keys: Sequence[K]) -> None:
+        if not self.max_size:
+            return
+
+        expires = time.monotonic() + NEGATIVE_CACHE_TTL
+        with self._lock:
+            for key in keys:
+                self._missing[key] = expires
+
+            # Negative entries are not ordered, drop all of them once there
+            # are too many rather than tracking their recency.
+            if len(self._missing) > self.max_size:
+                self._missing.clear()
 
 
 class PGStringIndexer(Service):
     """
     Provides integer IDs for metric names, tag keys and tag values
     and the corresponding reverse lookup.
+
+    Lookups go through a process-local LRU of `local_cache_size` entries per
+    direction before hitting memcache and the database.
     """
 
     __all__ = ("record", "resolve", "reverse_resolve", "bulk_record")
 
-    def _bulk_record(self, unmapped_strings: Set[str]) -> Any:
-        records = [MetricsKeyIndexer(string=string) for string in unmapped_strings]
-        # We use `ignore_conflicts=True` here to avoid race conditions where metric indexer
-        # records might have be created between when we queried in `bulk_record` and the
-        # attempt to create the rows down below.
+    def __init__(self, local_cache_size: int = 10000) -> None:
+        self._string_cache: _LocalCache[str, int] = _LocalCache("string", local_cache_size)
+        self._id_cache: _LocalCache[int, str] = _LocalCache("id", local_cache_size)
+
+    def _remember(self, mapping: Mapping[str, int]) -> None:
+        self._string_cache.set_many(mapping)
+        self._id_cache.set_many({id: string for string, id in mapping.items()})
+
+    def _bulk_record(self, unmapped_strings: Set[str]) -> Mapping[str, int]:
+        using = router.db_for_write(MetricsKeyIndexer)
+        connection = connections[using]
+        now = timezone.now()
+        # Strings that already exist are skipped by `ON CONFLICT DO NOTHING`
+        # and therefore not returned. That only happens when a concurrent
+        # consumer inserted them since we queried in `bulk_record`, so they
+        # are fetched in a second query.
+        sql = (
+            f"INSERT INTO {connection.ops.quote_name(MetricsKeyIndexer._meta.db_table)} "
+            "(string, date_added) VALUES %s "
+            "ON CONFLICT (string) DO NOTHING RETURNING string, id"
+        )
+        rows = [(string, now) for string in sorted(unmapped_strings)]
         with metrics.timer("sentry_metrics.indexer.pg_bulk_create"):
-            MetricsKeyIndexer.objects.bulk_create(records, ignore_conflicts=True)
-        # Using `ignore_conflicts=True` prevents the pk from being set on the model
-        # instances.
-        #
-        # Using `get_many_from_cache` will not only re-query the database to fetch the rows
-        # (which should all exist point at this point), but also cache the results
-        return MetricsKeyIndexer.objects.get_many_from_cache(list(unmapped_strings), key="string")
+            with connection.cursor() as cursor:
+                result = execute_values(cursor, sql, rows, page_size=len(rows), fetch=True)
+
+        mapped: MutableMapping[str, int] = dict(result)
+        conflicts = unmapped_strings.difference(mapped.keys())
+        metrics.incr("sentry_metrics.indexer.pg_bulk_create.conflicts", amount=len(conflicts))
+        if conflicts:
+            mapped.update(
+                MetricsKeyIndexer.objects.filter(string__in=conflicts).values_list("string", "id")
+            )
+
+        return mapped
 
     def bulk_record(self, strings: List[str]) -> Mapping[str, int]:
+        mapped_result: MutableMapping[str, int] = {}
+        for string, id in self._string_cache.get_many(strings).items():
+            # Strings that were not found before are about to be recorded
+            if id is not None:
+                mapped_result[string] = id
+
+        strings = [string for string in strings if string not in mapped_result]
+        if not strings:
+            return mapped_result
 
         cache_results: Sequence[Any] = MetricsKeyIndexer.objects.get_many_from_cache(
             strings, key="string"
         )
-
-        mapped_result: MutableMapping[str, int] = {r.string: r.id for r in cache_results}
+        cached: MutableMapping[str, int] = {r.string: r.id for r in cache_results}
+        self._remember(cached)
+        mapped_result.update(cached)
 
         metrics.incr(_INDEXER_CACHE_FETCH_METRIC, amount=len(strings))
-        unmapped = set(strings).difference(mapped_result.keys())
+        unmapped = set(strings).difference(cached.keys())
         if not unmapped:
             # This will probably be very rare in practice since for each batch of strings
             # it's almost certain there would be a value we haven't seen before
@@ -55,8 +172,8 @@ class PGStringIndexer(Service):
         with metrics.timer("sentry_metrics.indexer._bulk_record"):
             new_mapped = self._bulk_record(unmapped)
 
-        for new in new_mapped:
-            mapped_result[new.string] = new.id
+        self._remember(new_mapped)
+        mapped_result.update(new_mapped)
 
         return mapped_result
 
@@ -70,11 +187,17 @@ class PGStringIndexer(Service):
 
         Returns None if the entry cannot be found.
         """
+        cached = self._string_cache.get_many([string])
+        if string in cached:
+            return cached[string]
+
         try:
             id: int = MetricsKeyIndexer.objects.get_from_cache(string=string).id
         except MetricsKeyIndexer.DoesNotExist:
+            self._string_cache.set_missing([string])
             return None
 
+        self._remember({string: id})
         return id
 
     def reverse_resolve(self, id: int) -> Optional[str]:
@@ -82,9 +205,15 @@ class PGStringIndexer(Service):
 
         Returns None if the entry cannot be found.
         """
+        cached = self._id_cache.get_many([id])
+        if id in cached:
+            return cached[id]
+
         try:
             string: str = MetricsKeyIndexer.objects.get_from_cache(pk=id).string
         except MetricsKeyIndexer.DoesNotExist:
+            self._id_cache.set_missing([id])
             return None
 
+        self._remember({string: id})
         return string
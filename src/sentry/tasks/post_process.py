@@ -1,8 +1,12 @@
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, MutableMapping, NamedTuple, Tuple
 
 import sentry_sdk
+from django.db import close_old_connections
+from sentry_sdk import Hub
 
-from sentry import analytics, features
+from sentry import analytics, features, options
 from sentry.app import locks
 from sentry.exceptions import PluginError
 from sentry.killswitches import killswitch_matches_context
@@ -16,6 +20,11 @@ from sentry.utils.sdk import bind_organization_context, set_current_event_projec
 
 logger = logging.getLogger("sentry")
 
+# Runs the stages of `post_process_group` when `post_process.stage-concurrency`
+# is above 1. How many stages of a single task run at once is limited by that
+# option.
+_stage_thread_pool = ThreadPoolExecutor(max_workers=16)
+
 
 def _get_service_hooks(project_id):
     from sentry.models import ServiceHook
@@ -236,9 +245,8 @@ def post_process_group(
     """
     Fires post processing hooks for a group.
     """
-    from sentry.eventstore.models import Event
     from sentry.eventstore.processing import event_processing_store
-    from sentry.reprocessing2 import is_reprocessed_event
+    from sentry.models import Organization, Project
     from sentry.utils import snuba
 
     with snuba.options_override({"consistent": True}):
@@ -252,201 +260,482 @@ def post_process_group(
                 extra={"cache_key": cache_key, "reason": "missing_cache"},
             )
             return
-        event = Event(
-            project_id=data["project"], event_id=data["event_id"], group_id=group_id, data=data
-        )
-
-        set_current_event_project(event.project_id)
-
-        is_transaction_event = not bool(event.group_id)
-
-        from sentry.models import EventDict, Organization, Project
-
-        # Re-bind node data to avoid renormalization. We only want to
-        # renormalize when loading old data from the database.
-        event.data = EventDict(event.data, skip_renormalization=True)
 
         with metrics.timer("tasks.post_process.delete_event_cache"):
             event_processing_store.delete_by_key(cache_key)
 
         # Re-bind Project and Org since we're reading the Event object
         # from cache which may contain stale parent models.
-        event.project = Project.objects.get_from_cache(id=event.project_id)
-        event.project.set_cached_field_value(
-            "organization", Organization.objects.get_from_cache(id=event.project.organization_id)
+        project = Project.objects.get_from_cache(id=data["project"])
+        project.set_cached_field_value(
+            "organization", Organization.objects.get_from_cache(id=project.organization_id)
         )
 
-        # Simplified post processing for transaction events.
-        # This should eventually be completely removed and transactions
-        # will not go through any post processing.
-        if is_transaction_event:
-            transaction_processed.send_robust(
-                sender=post_process_group,
-                project=event.project,
-                event=event,
-            )
+        _post_process_event(
+            data,
+            project,
+            group_id,
+            is_new,
+            is_regression,
+            is_new_group_environment,
+            primary_hash=kwargs.get("primary_hash"),
+        )
 
-            return
 
-        is_reprocessed = is_reprocessed_event(event.data)
-        sentry_sdk.set_tag("is_reprocessed", is_reprocessed)
+@instrumented_task(
+    name="sentry.tasks.post_process.post_process_group_batch",
+    time_limit=300,
+    soft_time_limit=290,
+)
+def post_process_group_batch(events, **kwargs):
+    """
+    Fires post processing hooks for a batch of events. Every item of `events`
+    holds the arguments of a `post_process_group` call.
 
-        # NOTE: we must pass through the full Event object, and not an
-        # event_id since the Event object may not actually have been stored
-        # in the database due to sampling.
-        from sentry.models import Commit, GroupInboxReason
-        from sentry.models.group import get_group_with_redirect
-        from sentry.models.groupinbox import add_group_to_inbox
-        from sentry.rules.processor import RuleProcessor
-        from sentry.tasks.groupowner import process_suspect_commits
-        from sentry.tasks.servicehooks import process_service_hook
+    Payloads are fetched from the processing store, and projects,
+    organizations, groups and rules are loaded, once for the whole batch.
+    """
+    from sentry.eventstore.processing import event_processing_store
+    from sentry.models import Group, Organization, Project, Rule
+    from sentry.utils import snuba
 
-        # Re-bind Group since we're reading the Event object
-        # from cache, which may contain a stale group and project
-        event.group, _ = get_group_with_redirect(event.group_id)
-        event.group_id = event.group.id
-        # We fetch buffered updates to group aggregates here and populate them on the Group. This
-        # helps us avoid problems with processing group ignores and alert rules that rely on these
-        # stats.
-        fetch_buffered_group_stats(event.group)
+    with snuba.options_override({"consistent": True}):
+        metrics.timing("tasks.post_process.batch.size", len(events))
+
+        with metrics.timer("tasks.post_process.batch.get_event_cache"):
+            data_by_key = event_processing_store.get_many([e["cache_key"] for e in events])
+
+        # Like in `post_process_group`, events that are missing from the
+        # processing store have already been processed. This also skips
+        # events that are in the batch more than once.
+        events_to_process = []
+        seen_cache_keys = set()
+        for event in events:
+            cache_key = event["cache_key"]
+            if data_by_key.get(cache_key) and cache_key not in seen_cache_keys:
+                events_to_process.append(event)
+                seen_cache_keys.add(cache_key)
+            else:
+                logger.info(
+                    "post_process.skipped",
+                    extra={"cache_key": cache_key, "reason": "missing_cache"},
+                )
 
-        event.group.project = event.project
-        event.group.project.set_cached_field_value("organization", event.project.organization)
+        if not events_to_process:
+            return
 
-        bind_organization_context(event.project.organization)
+        with metrics.timer("tasks.post_process.delete_event_cache"):
+            event_processing_store.delete_many_by_key([e["cache_key"] for e in events_to_process])
+
+        with metrics.timer("tasks.post_process.batch.fetch_models"):
+            project_ids = {data_by_key[e["cache_key"]]["project"] for e in events_to_process}
+            projects = {p.id: p for p in Project.objects.get_many_from_cache(project_ids)}
+            organizations = {
+                o.id: o
+                for o in Organization.objects.get_many_from_cache(
+                    {p.organization_id for p in projects.values()}
+                )
+            }
+            for project in projects.values():
+                project.set_cached_field_value(
+                    "organization", organizations.get(project.organization_id)
+                )
 
-        _capture_stats(event, is_new)
+            group_ids = {e["group_id"] for e in events_to_process if e.get("group_id")}
+            groups = {g.id: g for g in Group.objects.get_many_from_cache(group_ids)}
+            # Transactions are not run through rules.
+            rules = Rule.get_for_projects(
+                {
+                    data_by_key[e["cache_key"]]["project"]
+                    for e in events_to_process
+                    if e.get("group_id")
+                }
+            )
 
-        with sentry_sdk.start_span(op="tasks.post_process_group.add_group_to_inbox"):
+        for event in events_to_process:
+            data = data_by_key[event["cache_key"]]
+            group_id = event.get("group_id")
             try:
-                if is_reprocessed and is_new:
-                    add_group_to_inbox(event.group, GroupInboxReason.REPROCESSED)
+                project = projects[data["project"]]
+                _post_process_event(
+                    data,
+                    project,
+                    group_id,
+                    event["is_new"],
+                    event["is_regression"],
+                    event["is_new_group_environment"],
+                    primary_hash=event.get("primary_hash"),
+                    group=groups.get(group_id),
+                    rules=rules.get(project.id),
+                )
             except Exception:
-                logger.exception("Failed to add group to inbox for reprocessed groups")
+                logger.exception(
+                    "post_process.batch.failed", extra={"cache_key": event["cache_key"]}
+                )
 
-        if not is_reprocessed:
-            # we process snoozes before rules as it might create a regression
-            # but not if it's new because you can't immediately snooze a new group
-            has_reappeared = not is_new
-            try:
-                if has_reappeared:
-                    has_reappeared = process_snoozes(event.group)
-            except Exception:
-                logger.exception("Failed to process snoozes for group")
 
-            try:
-                if not has_reappeared:  # If true, we added the .UNIGNORED reason already
-                    if is_new:
-                        add_group_to_inbox(event.group, GroupInboxReason.NEW)
-                    elif is_regression:
-                        add_group_to_inbox(event.group, GroupInboxReason.REGRESSION)
-            except Exception:
-                logger.exception("Failed to add group to inbox for non-reprocessed groups")
+def _post_process_event(
+    data,
+    project,
+    group_id,
+    is_new,
+    is_regression,
+    is_new_group_environment,
+    primary_hash=None,
+    group=None,
+    rules=None,
+):
+    """
+    Runs the post processing of a single event, whose payload has been
+    removed from the processing store already.
 
-            with sentry_sdk.start_span(op="tasks.post_process_group.handle_owner_assignment"):
-                try:
-                    handle_owner_assignment(event.project, event.group, event)
-                except Exception:
-                    logger.exception("Failed to handle owner assignments")
+    `group` and `rules` may be given when they have been loaded in bulk,
+    otherwise they are loaded from cache.
+    """
+    from sentry.eventstore.models import Event
+    from sentry.reprocessing2 import is_reprocessed_event
 
-            rp = RuleProcessor(
-                event, is_new, is_regression, is_new_group_environment, has_reappeared
-            )
-            has_alert = False
-            with sentry_sdk.start_span(op="tasks.post_process_group.rule_processor_callbacks"):
-                # TODO(dcramer): ideally this would fanout, but serializing giant
-                # objects back and forth isn't super efficient
-                for callback, futures in rp.apply():
-                    has_alert = True
-                    safe_execute(callback, event, futures, _with_transaction=False)
+    event = Event(
+        project_id=data["project"], event_id=data["event_id"], group_id=group_id, data=data
+    )
 
-            try:
-                lock = locks.get(
-                    f"w-o:{event.group_id}-d-l",
-                    duration=10,
-                )
-                with lock.acquire():
-                    has_commit_key = f"w-o:{event.project.organization_id}-h-c"
-                    org_has_commit = cache.get(has_commit_key)
-                    if org_has_commit is None:
-                        org_has_commit = Commit.objects.filter(
-                            organization_id=event.project.organization_id
-                        ).exists()
-                        cache.set(has_commit_key, org_has_commit, 3600)
-
-                    if org_has_commit:
-                        group_cache_key = f"w-o-i:g-{event.group_id}"
-                        if cache.get(group_cache_key):
-                            metrics.incr(
-                                "sentry.tasks.process_suspect_commits.debounce",
-                                tags={"detail": "w-o-i:g debounce"},
-                            )
-                        else:
-                            from sentry.utils.committers import get_frame_paths
-
-                            cache.set(group_cache_key, True, 604800)  # 1 week in seconds
-                            event_frames = get_frame_paths(event.data)
-                            process_suspect_commits.delay(
-                                event_id=event.event_id,
-                                event_platform=event.platform,
-                                event_frames=event_frames,
-                                group_id=event.group_id,
-                                project_id=event.project_id,
-                            )
-            except UnableToAcquireLock:
-                pass
-            except Exception:
-                logger.exception("Failed to process suspect commits")
+    set_current_event_project(event.project_id)
 
-            if features.has("projects:servicehooks", project=event.project):
-                allowed_events = {"event.created"}
-                if has_alert:
-                    allowed_events.add("event.alert")
+    is_transaction_event = not bool(event.group_id)
 
-                if allowed_events:
-                    for servicehook_id, events in _get_service_hooks(project_id=event.project_id):
-                        if any(e in allowed_events for e in events):
-                            process_service_hook.delay(servicehook_id=servicehook_id, event=event)
+    from sentry.models import EventDict
 
-            from sentry.tasks.sentry_apps import process_resource_change_bound
+    # Re-bind node data to avoid renormalization. We only want to
+    # renormalize when loading old data from the database.
+    event.data = EventDict(event.data, skip_renormalization=True)
 
-            if event.get_event_type() == "error" and _should_send_error_created_hooks(
-                event.project
-            ):
-                process_resource_change_bound.delay(
-                    action="created", sender="Error", instance_id=event.event_id, instance=event
-                )
-            if is_new:
-                process_resource_change_bound.delay(
-                    action="created", sender="Group", instance_id=event.group_id
-                )
+    event.project = project
 
-            from sentry.plugins.base import plugins
+    # Simplified post processing for transaction events.
+    # This should eventually be completely removed and transactions
+    # will not go through any post processing.
+    if is_transaction_event:
+        transaction_processed.send_robust(
+            sender=post_process_group,
+            project=event.project,
+            event=event,
+        )
 
-            for plugin in plugins.for_project(event.project):
-                plugin_post_process_group(
-                    plugin_slug=plugin.slug, event=event, is_new=is_new, is_regresion=is_regression
-                )
+        return
 
-            from sentry import similarity
+    is_reprocessed = is_reprocessed_event(event.data)
+    sentry_sdk.set_tag("is_reprocessed", is_reprocessed)
 
-            with sentry_sdk.start_span(op="tasks.post_process_group.similarity"):
-                safe_execute(similarity.record, event.project, [event], _with_transaction=False)
+    # NOTE: we must pass through the full Event object, and not an
+    # event_id since the Event object may not actually have been stored
+    # in the database due to sampling.
+    from sentry.models import GroupInboxReason
+    from sentry.models.group import get_group_with_redirect
+    from sentry.models.groupinbox import add_group_to_inbox
 
-        # Patch attachments that were ingested on the standalone path.
-        with sentry_sdk.start_span(op="tasks.post_process_group.update_existing_attachments"):
-            try:
-                update_existing_attachments(event)
-            except Exception:
-                logger.exception("Failed to update existing attachments")
-
-        if not is_reprocessed:
-            event_processed.send_robust(
-                sender=post_process_group,
-                project=event.project,
-                event=event,
-                primary_hash=kwargs.get("primary_hash"),
-            )
+    # Re-bind Group since we're reading the Event object
+    # from cache, which may contain a stale group and project
+    if group is None:
+        group, _ = get_group_with_redirect(event.group_id)
+    event.group = group
+    event.group_id = event.group.id
+    # We fetch buffered updates to group aggregates here and populate them on the Group. This
+    # helps us avoid problems with processing group ignores and alert rules that rely on these
+    # stats.
+    fetch_buffered_group_stats(event.group)
+
+    event.group.project = event.project
+    event.group.project.set_cached_field_value("organization", event.project.organization)
+
+    bind_organization_context(event.project.organization)
+
+    _capture_stats(event, is_new)
+
+    with sentry_sdk.start_span(op="tasks.post_process_group.add_group_to_inbox"):
+        try:
+            if is_reprocessed and is_new:
+                add_group_to_inbox(event.group, GroupInboxReason.REPROCESSED)
+        except Exception:
+            logger.exception("Failed to add group to inbox for reprocessed groups")
+
+    job = {
+        "event": event,
+        "is_new": is_new,
+        "is_regression": is_regression,
+        "is_new_group_environment": is_new_group_environment,
+        "has_reappeared": False,
+        "has_alert": False,
+    }
+    if rules is not None:
+        job["rules"] = rules
+    stages = [stage for stage in POST_PROCESS_STAGES if stage.for_reprocessed or not is_reprocessed]
+    run_post_process_stages(stages, job, concurrency=options.get("post_process.stage-concurrency"))
+
+    if not is_reprocessed:
+        event_processed.send_robust(
+            sender=post_process_group,
+            project=event.project,
+            event=event,
+            primary_hash=primary_hash,
+        )
+
+
+def process_snoozes_stage(job):
+    # we process snoozes before rules as it might create a regression
+    # but not if it's new because you can't immediately snooze a new group
+    event = job["event"]
+    has_reappeared = not job["is_new"]
+    try:
+        if has_reappeared:
+            has_reappeared = process_snoozes(event.group)
+    except Exception:
+        logger.exception("Failed to process snoozes for group")
+    job["has_reappeared"] = has_reappeared
+
+
+def add_group_to_inbox_stage(job):
+    from sentry.models import GroupInboxReason
+    from sentry.models.groupinbox import add_group_to_inbox
+
+    event = job["event"]
+    try:
+        if not job["has_reappeared"]:  # If true, we added the .UNIGNORED reason already
+            if job["is_new"]:
+                add_group_to_inbox(event.group, GroupInboxReason.NEW)
+            elif job["is_regression"]:
+                add_group_to_inbox(event.group, GroupInboxReason.REGRESSION)
+    except Exception:
+        logger.exception("Failed to add group to inbox for non-reprocessed groups")
+
+
+def handle_owner_assignment_stage(job):
+    event = job["event"]
+    try:
+        handle_owner_assignment(event.project, event.group, event)
+    except Exception:
+        logger.exception("Failed to handle owner assignments")
+
+
+def process_rules_stage(job):
+    from sentry.rules.processor import RuleProcessor
+
+    event = job["event"]
+    # Rules are only passed along when they have been loaded for a batch.
+    rules_kwargs = {"rules": job["rules"]} if "rules" in job else {}
+    rp = RuleProcessor(
+        event,
+        job["is_new"],
+        job["is_regression"],
+        job["is_new_group_environment"],
+        job["has_reappeared"],
+        **rules_kwargs,
+    )
+    # TODO(dcramer): ideally this would fanout, but serializing giant
+    # objects back and forth isn't super efficient
+    for callback, futures in rp.apply():
+        job["has_alert"] = True
+        safe_execute(callback, event, futures, _with_transaction=False)
+
+
+def process_suspect_commits_stage(job):
+    from sentry.models import Commit
+    from sentry.tasks.groupowner import process_suspect_commits
+
+    event = job["event"]
+    try:
+        lock = locks.get(
+            f"w-o:{event.group_id}-d-l",
+            duration=10,
+        )
+        with lock.acquire():
+            has_commit_key = f"w-o:{event.project.organization_id}-h-c"
+            org_has_commit = cache.get(has_commit_key)
+            if org_has_commit is None:
+                org_has_commit = Commit.objects.filter(
+                    organization_id=event.project.organization_id
+                ).exists()
+                cache.set(has_commit_key, org_has_commit, 3600)
+
+            if org_has_commit:
+                group_cache_key = f"w-o-i:g-{event.group_id}"
+                if cache.get(group_cache_key):
+                    metrics.incr(
+                        "sentry.tasks.process_suspect_commits.debounce",
+                        tags={"detail": "w-o-i:g debounce"},
+                    )
+                else:
+                    from sentry.utils.committers import get_frame_paths
+
+                    cache.set(group_cache_key, True, 604800)  # 1 week in seconds
+                    event_frames = get_frame_paths(event.data)
+                    process_suspect_commits.delay(
+                        event_id=event.event_id,
+                        event_platform=event.platform,
+                        event_frames=event_frames,
+                        group_id=event.group_id,
+                        project_id=event.project_id,
+                    )
+    except UnableToAcquireLock:
+        pass
+    except Exception:
+        logger.exception("Failed to process suspect commits")
+
+
+def process_service_hooks_stage(job):
+    from sentry.tasks.servicehooks import process_service_hook
+
+    event = job["event"]
+    if features.has("projects:servicehooks", project=event.project):
+        allowed_events = {"event.created"}
+        if job["has_alert"]:
+            allowed_events.add("event.alert")
+
+        if allowed_events:
+            for servicehook_id, events in _get_service_hooks(project_id=event.project_id):
+                if any(e in allowed_events for e in events):
+                    process_service_hook.delay(servicehook_id=servicehook_id, event=event)
+
+
+def process_resource_change_bound_stage(job):
+    from sentry.tasks.sentry_apps import process_resource_change_bound
+
+    event = job["event"]
+    if event.get_event_type() == "error" and _should_send_error_created_hooks(event.project):
+        process_resource_change_bound.delay(
+            action="created", sender="Error", instance_id=event.event_id, instance=event
+        )
+    if job["is_new"]:
+        process_resource_change_bound.delay(
+            action="created", sender="Group", instance_id=event.group_id
+        )
+
+
+def process_plugins_stage(job):
+    from sentry.plugins.base import plugins
+
+    event = job["event"]
+    for plugin in plugins.for_project(event.project):
+        plugin_post_process_group(
+            plugin_slug=plugin.slug,
+            event=event,
+            is_new=job["is_new"],
+            is_regresion=job["is_regression"],
+        )
+
+
+def process_similarity_stage(job):
+    from sentry import similarity
+
+    event = job["event"]
+    safe_execute(similarity.record, event.project, [event], _with_transaction=False)
+
+
+def update_existing_attachments_stage(job):
+    # Patch attachments that were ingested on the standalone path.
+    try:
+        update_existing_attachments(job["event"])
+    except Exception:
+        logger.exception("Failed to update existing attachments")
+
+
+class PostProcessStage(NamedTuple):
+    name: str
+    func: Callable[[MutableMapping[str, Any]], None]
+    # Names of the stages that need to complete before this one starts
+    dependencies: Tuple[str, ...] = ()
+    # Whether the stage also runs for reprocessed events
+    for_reprocessed: bool = False
+
+
+# The stages of `post_process_group`. They share a job mapping to pass along
+# results, such as whether the group has reappeared or whether any alert fired.
+# Stages only depend on stages listed before them.
+POST_PROCESS_STAGES = (
+    PostProcessStage("process_snoozes", process_snoozes_stage),
+    PostProcessStage("add_group_to_inbox", add_group_to_inbox_stage, ("process_snoozes",)),
+    PostProcessStage("handle_owner_assignment", handle_owner_assignment_stage),
+    # Rules may filter on the assignee, so owner assignment goes first.
+    PostProcessStage(
+        "process_rules", process_rules_stage, ("process_snoozes", "handle_owner_assignment")
+    ),
+    PostProcessStage("process_suspect_commits", process_suspect_commits_stage),
+    PostProcessStage("process_service_hooks", process_service_hooks_stage, ("process_rules",)),
+    PostProcessStage("process_resource_change_bound", process_resource_change_bound_stage),
+    PostProcessStage("process_plugins", process_plugins_stage),
+    PostProcessStage("process_similarity", process_similarity_stage),
+    PostProcessStage(
+        "update_existing_attachments", update_existing_attachments_stage, for_reprocessed=True
+    ),
+)
+
+
+def _run_stage(stage, job):
+    event = job["event"]
+    if killswitch_matches_context(
+        "post_process.skip-stages",
+        {
+            "stage": stage.name,
+            "project_id": event.project_id,
+            "organization_id": event.project.organization_id,
+        },
+    ):
+        return
+
+    try:
+        with metrics.timer(
+            "tasks.post_process_group.stage", tags={"stage": stage.name}
+        ), sentry_sdk.start_span(op="tasks.post_process_group.stage", description=stage.name):
+            stage.func(job)
+    except Exception:
+        logger.exception("post_process.stage.failed", extra={"stage": stage.name})
+
+
+def _run_stage_in_thread(hub, stage, job):
+    # Worker threads keep their database connections between stages, so
+    # drop the ones that errored or outlived `CONN_MAX_AGE`.
+    close_old_connections()
+    with hub:
+        _run_stage(stage, job)
+
+
+def run_post_process_stages(stages, job, concurrency=1):
+    """
+    Runs each of `stages` once all of its dependencies have completed, with
+    up to `concurrency` stages running at the same time. Stages that are
+    ready at the same time are started in the order they are given.
+
+    With a concurrency of 1, stages run one after another on the calling
+    thread. Dependencies on stages that are not given are ignored. Stages
+    that fail or are skipped count as completed.
+    """
+    if concurrency <= 1:
+        for stage in stages:
+            _run_stage(stage, job)
+        return
+
+    names = {stage.name for stage in stages}
+    completed = set()
+    pending = list(stages)
+    running = {}
+
+    while pending or running:
+        for stage in list(pending):
+            if len(running) >= concurrency:
+                break
+            if all(name in completed or name not in names for name in stage.dependencies):
+                pending.remove(stage)
+                future = _stage_thread_pool.submit(
+                    _run_stage_in_thread, Hub(Hub.current), stage, job
+                )
+                running[future] = stage
+
+        if not running:
+            raise ValueError(f"Unsatisfiable stage dependencies: {[s.name for s in pending]}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            future.result()
+            completed.add(running.pop(future).name)
 
 
 def process_snoozes(group):
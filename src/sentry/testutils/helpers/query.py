@@ -1,7 +1,11 @@
+from contextlib import contextmanager
+
 import sqlparse
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
 from sqlparse.tokens import DML
 
-__all__ = ("parse_queries",)
+__all__ = ("parse_queries", "assert_query_budget")
 
 
 def parse_queries(captured_queries):
@@ -23,3 +27,24 @@ def parse_queries(captured_queries):
                     real_queries[table_name] += 1
 
     return real_queries
+
+
+@contextmanager
+def assert_query_budget(budget, using=DEFAULT_DB_ALIAS):
+    """
+    Fail if the block executes more than `budget` queries against the
+    database `using`. Unlike `assertNumQueries`, fewer queries pass, so the
+    budget does not need to change whenever a query is saved.
+
+    >>> with assert_query_budget(3):
+    >>>     serialize(groups, user)
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    assert executed <= budget, "%d queries executed, budget is %d:\n%s" % (
+        executed,
+        budget,
+        "\n".join(query["sql"] for query in context.captured_queries),
+    )
@@ -124,6 +124,7 @@ class BaseTSDB(Service):
             "record_frequency_multi",
             "merge_frequencies",
             "delete_frequencies",
+            "write_batch",
             "flush",
         ]
     )
@@ -464,6 +465,47 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def write_batch(self, increments=(), records=(), frequencies=()):
+        """
+        Apply counter increments, distinct counter records and frequency table
+        updates at once. Every item has its own ``timestamp`` and
+        ``environment_id``, so writes for a batch of events can be combined:
+
+        >>> write_batch(
+        ...     increments=[(TimeSeriesModel.project, 1, {"timestamp": ..., "count": 1})],
+        ...     records=[
+        ...         (TimeSeriesModel.users_affected_by_project, 1, ("user",), {"timestamp": ...})
+        ...     ],
+        ...     frequencies=[
+        ...         (TimeSeriesModel.frequent_environments_by_group, {5: {2: 1}}, {"timestamp": ...})
+        ...     ],
+        ... )
+        """
+        for model, key, options in increments:
+            self.incr(
+                model,
+                key,
+                timestamp=options.get("timestamp"),
+                count=options.get("count", 1),
+                environment_id=options.get("environment_id"),
+            )
+
+        for model, key, values, options in records:
+            self.record(
+                model,
+                key,
+                values,
+                timestamp=options.get("timestamp"),
+                environment_id=options.get("environment_id"),
+            )
+
+        for model, request, options in frequencies:
+            self.record_frequency_multi(
+                [(model, request)],
+                timestamp=options.get("timestamp"),
+                environment_id=options.get("environment_id"),
+            )
+
     def get_most_frequent(
         self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
     ):
@@ -12,6 +12,7 @@ from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.utils import metrics
 from sentry.utils.compat import crc32, map, zip
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -50,6 +51,27 @@ class SuppressionWrapper:
         return True
 
 
+class _WriteBatch:
+    """
+    Writes of ``RedisTSDB.write_batch`` for a single cluster, aggregated by
+    the Redis keys they apply to.
+    """
+
+    def __init__(self):
+        # (hash_key, hash_field) -> count
+        self.counters = defaultdict(int)
+        # (routing_key, key) -> {value: None}
+        self.distinct_counters = defaultdict(dict)
+        # (routing_key, keys) -> {member: score}
+        self.frequencies = defaultdict(lambda: defaultdict(int))
+        # key -> (routing_key, max expiration encountered)
+        self.expiries = {}
+
+    def expire(self, routing_key, key, expiry):
+        if key not in self.expiries or self.expiries[key][1] < expiry:
+            self.expiries[key] = (routing_key, expiry)
+
+
 class RedisTSDB(BaseTSDB):
     """
     A time series storage backend for Redis.
@@ -695,6 +717,111 @@ class RedisTSDB(BaseTSDB):
                 if durable:
                     raise
 
+    def write_batch(self, increments=(), records=(), frequencies=()):
+        """
+        Apply all writes with a single pipeline per Redis host.
+
+        Writes are aggregated in memory first: increments of the same counter
+        field are summed up, and records of the same distinct counter and
+        updates of the same frequency tables are merged into one command.
+        Keys are routed to the same hosts as with ``incr_multi``,
+        ``record_multi`` and ``record_frequency_multi``.
+        """
+        now = timezone.now()
+        # (cluster, durable) -> _WriteBatch
+        batches = defaultdict(_WriteBatch)
+
+        for model, key, options in increments:
+            environment_id = options.get("environment_id")
+            self.validate_arguments([model], [environment_id])
+            timestamp = options.get("timestamp") or now
+            count = options.get("count", 1)
+
+            for cluster_group, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_group]
+                for rollup, max_values in self.rollups.items():
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                    for environment_id in environment_ids:
+                        hash_key, hash_field = self.make_counter_key(
+                            model, rollup, timestamp, key, environment_id
+                        )
+                        batch.counters[(hash_key, hash_field)] += count
+                        batch.expire(hash_key, hash_key, expiry)
+
+        for model, key, values, options in records:
+            environment_id = options.get("environment_id")
+            self.validate_arguments([model], [environment_id])
+            timestamp = options.get("timestamp") or now
+            ts = int(to_timestamp(timestamp))
+
+            for cluster_group, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_group]
+                for rollup, max_values in self.rollups.items():
+                    expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                    for environment_id in environment_ids:
+                        k = self.make_key(model, rollup, ts, key, environment_id)
+                        batch.distinct_counters[(key, k)].update(dict.fromkeys(values))
+                        batch.expire(key, k, expiry)
+
+        for model, request, options in frequencies:
+            environment_id = options.get("environment_id")
+            self.validate_arguments([model], [environment_id])
+            if not self.enable_frequency_sketches:
+                continue
+
+            timestamp = options.get("timestamp") or now
+            ts = int(to_timestamp(timestamp))
+
+            for cluster_group, environment_ids in self.get_cluster_groups({None, environment_id}):
+                batch = batches[cluster_group]
+                for key, items in request.items():
+                    keys = []
+                    for rollup, max_values in self.rollups.items():
+                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                        for environment_id in environment_ids:
+                            chunk = self.make_frequency_table_keys(
+                                model, rollup, ts, key, environment_id
+                            )
+                            keys.extend(chunk)
+                            for k in chunk:
+                                batch.expire(key, k, expiry)
+
+                    scores = batch.frequencies[(key, tuple(keys))]
+                    for member, score in items.items():
+                        scores[member] += score
+
+        metrics.timing("tsdb.write_batch.items", len(increments) + len(records) + len(frequencies))
+
+        for (cluster, durable), batch in batches.items():
+            commands = defaultdict(list)
+            for (hash_key, hash_field), count in batch.counters.items():
+                commands[hash_key].append(("HINCRBY", hash_key, hash_field, count))
+            for (routing_key, k), values in batch.distinct_counters.items():
+                commands[routing_key].append(("PFADD", k, *values))
+            for (routing_key, keys), scores in batch.frequencies.items():
+                arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+                for member, score in scores.items():
+                    arguments.extend((score, member))
+                commands[routing_key].append((CountMinScript, keys, arguments))
+            # Keys only expire once they exist, so this comes after all writes
+            # routed to the same host.
+            for k, (routing_key, expiry) in batch.expiries.items():
+                commands[routing_key].append(("EXPIREAT", k, expiry))
+
+            for name, count in (
+                ("counters", len(batch.counters)),
+                ("distinct_counters", len(batch.distinct_counters)),
+                ("frequencies", len(batch.frequencies)),
+                ("expiries", len(batch.expiries)),
+            ):
+                metrics.timing("tsdb.write_batch.commands", count, tags={"type": name})
+
+            try:
+                cluster.execute_commands(commands)
+            except Exception:
+                if durable:
+                    raise
+
     def get_most_frequent(
         self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
     ):
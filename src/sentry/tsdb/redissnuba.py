@@ -1,5 +1,6 @@
 import inspect
 import time
+from collections import defaultdict
 
 from sentry.tsdb.base import BaseTSDB
 from sentry.tsdb.dummy import DummyTSDB
@@ -18,6 +19,14 @@ def multiple_model_argument(callargs):
     return set(callargs["models"])
 
 
+def batch_model_arguments(callargs):
+    return {
+        item[0]
+        for items in (callargs["increments"], callargs["records"], callargs["frequencies"])
+        for item in items
+    }
+
+
 def dont_do_this(callargs):
     raise NotImplementedError("do not run this please")
 
@@ -47,6 +56,7 @@ method_specifications = {
     ),
     "merge_frequencies": (WRITE, single_model_argument),
     "delete_frequencies": (WRITE, multiple_model_argument),
+    "write_batch": (WRITE, batch_model_arguments),
     "flush": (WRITE, dont_do_this),
 }
 
@@ -92,7 +102,7 @@ def make_method(key):
 class RedisSnubaTSDBMeta(type):
     def __new__(cls, name, bases, attrs):
         for key in method_specifications.keys():
-            attrs[key] = make_method(key)
+            attrs.setdefault(key, make_method(key))
         return type.__new__(cls, name, bases, attrs)
 
 
@@ -121,3 +131,22 @@ class RedisSnubaTSDB(BaseTSDB, metaclass=RedisSnubaTSDBMeta):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super().__init__(**options)
+
+    def write_batch(self, increments=(), records=(), frequencies=()):
+        """
+        Split the batch by the backend each model is written to, as a batch
+        usually contains models that are written to different backends.
+        """
+        batches = defaultdict(lambda: {"increments": [], "records": [], "frequencies": []})
+        for name, items in (
+            ("increments", increments),
+            ("records", records),
+            ("frequencies", frequencies),
+        ):
+            for item in items:
+                callargs = {"increments": [], "records": [], "frequencies": [], name: [item]}
+                backend = selector_func("write_batch", callargs, self.switchover_timestamp)
+                batches[backend][name].append(item)
+
+        for backend, batch in batches.items():
+            self.backends[backend].write_batch(**batch)
@@ -1,8 +1,10 @@
 import functools
 import logging
+import math
 import os
 import random
 import re
+import threading
 import time
 from collections import OrderedDict, namedtuple
 from concurrent.futures import ThreadPoolExecutor
@@ -24,6 +26,7 @@ from sentry_sdk import Hub
 from snuba_sdk.legacy import json_to_snql
 from snuba_sdk.query import Query
 
+from sentry import options
 from sentry.exceptions import InvalidSearchQuery
 from sentry.models import (
     Environment,
@@ -339,9 +342,98 @@ _snuba_pool = connection_from_url(
         method_whitelist={"GET", "POST", "DELETE"},
     ),
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
-    maxsize=10,
+    maxsize=settings.SENTRY_SNUBA_QUERY_CONCURRENCY,
 )
-_query_thread_pool = ThreadPoolExecutor(max_workers=10)
+_query_thread_pool = ThreadPoolExecutor(max_workers=settings.SENTRY_SNUBA_QUERY_CONCURRENCY)
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the number of concurrent queries of a referrer, adapting the limit
+    to how well Snuba copes with them.
+
+    The limit grows by one for every `limit` queries completing within
+    `latency_tolerance` times the average latency of the referrer. Slower
+    queries reduce it by a tenth, and queries that are rate limited or fail
+    halve it, down to `min_limit`.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1, latency_tolerance: float = 2.0):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.average_latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = self.limit / 2
+            elif (
+                self.average_latency is not None
+                and latency > self.average_latency * self.latency_tolerance
+            ):
+                self.limit = self.limit * 0.9
+            else:
+                self.limit = self.limit + 1 / self.limit
+            self.limit = max(self.min_limit, min(self.max_limit, self.limit))
+
+            if not overloaded:
+                self.average_latency = (
+                    latency
+                    if self.average_latency is None
+                    else self.average_latency * 0.95 + latency * 0.05
+                )
+            self._condition.notify_all()
+
+
+_referrer_limiters: MutableMapping[str, ConcurrencyLimiter] = {}
+_referrer_limiters_lock = threading.Lock()
+
+
+def _get_referrer_limiter(referrer: str) -> Optional[ConcurrencyLimiter]:
+    if not options.get("snuba.client.adaptive-concurrency"):
+        return None
+
+    max_limit = options.get("snuba.client.referrer-max-concurrency")
+    with _referrer_limiters_lock:
+        limiter = _referrer_limiters.get(referrer)
+        if limiter is None:
+            limiter = _referrer_limiters[referrer] = ConcurrencyLimiter(max_limit)
+    limiter.max_limit = max_limit
+    limiter.latency_tolerance = options.get("snuba.client.latency-tolerance")
+    return limiter
+
+
+def _run_limited_query(
+    query_fn: Callable[[Tuple["SnubaQueryBody", Hub, Mapping[str, str]]], "RawResult"],
+    params: Tuple["SnubaQueryBody", Hub, Mapping[str, str]],
+    limiter: Optional[ConcurrencyLimiter],
+    queued_at: float,
+) -> "RawResult":
+    started_at = time.time()
+    referrer = params[2].get("referer", "<unknown>")
+    metrics.timing("snuba.client.queue_wait", started_at - queued_at, tags={"referrer": referrer})
+
+    overloaded = True
+    try:
+        result = query_fn(params)
+        overloaded = result[0].status == 429 or result[0].status >= 500
+        return result
+    finally:
+        duration = time.time() - started_at
+        metrics.timing("snuba.client.execution", duration, tags={"referrer": referrer})
+        if limiter is not None:
+            limiter.release(duration, overloaded)
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -715,6 +807,131 @@ def get_cache_key(query: SnubaQuery) -> str:
     return f"sqc:{sha1(hashable.encode('utf-8')).hexdigest()}"
 
 
+class _TimeseriesCachePlan:
+    """
+    Serves a timeseries query from cached buckets where possible.
+
+    The time range of the query is aligned to its rollup. Buckets that ended
+    before the settle period are closed and no longer expected to change.
+    They are cached under a key that does not include the time range, so
+    that they can be reused by queries over a later range, such as those of
+    an auto refreshing dashboard. Snuba is only queried for the tail of
+    the range that is not cached. That tail includes the open trailing
+    bucket and is cached with the short TTL of the regular query cache.
+    """
+
+    def __init__(self, query_body: SnubaQueryBody, start: int, end: int, rollup: int) -> None:
+        self.query_body = query_body
+        self.start = start
+        self.end = end
+        self.rollup = rollup
+        self.closed_end = max(
+            start,
+            min(
+                end,
+                (int(time.time()) - options.get("snuba.timeseries-cache.settle-seconds"))
+                // rollup
+                * rollup,
+            ),
+        )
+
+        query = query_body[0]
+        hashable = json.dumps(
+            {k: v for k, v in query.items() if k not in ("from_date", "to_date")}, sort_keys=True
+        )
+        self.cache_key = f"sqc:ts:{sha1(hashable.encode('utf-8')).hexdigest()}"
+        self.prefix = None
+        self.tail_start = start
+
+    @classmethod
+    def create(cls, query_body: SnubaQueryBody) -> Optional["_TimeseriesCachePlan"]:
+        query = query_body[0]
+        if (
+            not isinstance(query, dict)
+            or query.get("groupby") != ["time"]
+            or query.get("orderby") not in ("time", "-time")
+            or query.get("totals")
+            or query.get("offset")
+            or not query.get("granularity")
+            or "from_date" not in query
+            or "to_date" not in query
+        ):
+            return None
+
+        rollup = int(query["granularity"])
+        start = int(_to_timestamp(query["from_date"])) // rollup * rollup
+        end = -(-int(math.ceil(_to_timestamp(query["to_date"]))) // rollup) * rollup
+        return cls(query_body, start, end, rollup)
+
+    def get_tail_cache_key(self, tail_start: int) -> str:
+        return f"{self.cache_key}:{tail_start}:{self.end}"
+
+    def set_prefix(self, cached: Optional[str]) -> None:
+        """Use the cached closed buckets, if they cover the start of the query."""
+        if cached is None:
+            return
+
+        prefix = json.loads(cached)
+        if prefix["start"] <= self.start < prefix["end"]:
+            self.prefix = prefix
+            self.tail_start = min(prefix["end"], self.end)
+
+    def get_tail_query(self) -> SnubaQueryBody:
+        query, forward, reverse = self.query_body
+        query = dict(query)
+        query["from_date"] = datetime.fromtimestamp(self.tail_start, pytz.utc).isoformat()
+        query["to_date"] = datetime.fromtimestamp(self.end, pytz.utc).isoformat()
+        return query, forward, reverse
+
+    def build_result(self, tail: Mapping[str, Any]) -> Mapping[str, Any]:
+        rows = []
+        if self.prefix is not None:
+            rows = [
+                row
+                for row in self.prefix["data"]
+                if self.start <= _to_timestamp(row["time"]) < self.tail_start
+            ]
+        rows.extend(tail["data"])
+        rows.sort(
+            key=lambda row: _to_timestamp(row["time"]),
+            reverse=self.query_body[0]["orderby"] == "-time",
+        )
+        return {**tail, "data": rows}
+
+    def get_prefix_update(self, tail: Mapping[str, Any]) -> Optional[Mapping[str, Any]]:
+        """
+        Return the closed buckets to cache after querying the tail, or `None`
+        if there are no new ones.
+        """
+        limit = self.query_body[0].get("limit")
+        if self.closed_end <= self.tail_start or (limit and len(tail["data"]) >= limit):
+            return None
+
+        rows = [row for row in tail["data"] if _to_timestamp(row["time"]) < self.closed_end]
+        if self.prefix is not None:
+            # Buckets before the start of this query are dropped, so a rolling
+            # time range does not grow the cached buckets indefinitely.
+            rows = [
+                row for row in self.prefix["data"] if _to_timestamp(row["time"]) >= self.start
+            ] + rows
+
+        return {
+            "start": self.start,
+            "end": self.closed_end,
+            "meta": tail.get("meta", []),
+            "data": rows,
+        }
+
+
+def _to_timestamp(value: Union[str, int, float]) -> float:
+    if isinstance(value, (int, float)):
+        return value
+    dt = parse_datetime(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=pytz.utc)
+    return to_timestamp(dt)
+
+
 def bulk_raw_query(
     snuba_param_list: Sequence[SnubaQueryParams],
     referrer: Optional[str] = None,
@@ -738,6 +955,18 @@ def _apply_cache_and_build_results(
 
     results = []
 
+    timeseries_plans: MutableMapping[int, _TimeseriesCachePlan] = {}
+    if options.get("snuba.timeseries-cache.enabled"):
+        for query_pos, query_params in query_param_list:
+            plan = _TimeseriesCachePlan.create(query_params)
+            if plan is not None:
+                timeseries_plans[query_pos] = plan
+        query_param_list = [
+            (query_pos, query_params)
+            for query_pos, query_params in query_param_list
+            if query_pos not in timeseries_plans
+        ]
+
     if use_cache:
         cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
         cache_data = cache.get_many(cache_keys)
@@ -754,10 +983,16 @@ def _apply_cache_and_build_results(
     else:
         to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
 
+    if timeseries_plans:
+        to_query.extend(_apply_timeseries_cache(timeseries_plans, results, referrer))
+
     if to_query:
         query_results = _bulk_snuba_query(map(itemgetter(1), to_query), headers)
         for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
+            plan = timeseries_plans.get(query_pos)
+            if plan is not None:
+                result = _store_timeseries_result(plan, result)
+            elif cache_key:
                 cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
             results.append((query_pos, result))
 
@@ -767,6 +1002,67 @@ def _apply_cache_and_build_results(
     return map(itemgetter(1), results)
 
 
+def _apply_timeseries_cache(
+    plans: Mapping[int, _TimeseriesCachePlan],
+    results: List[Tuple[int, Mapping[str, Any]]],
+    referrer: Optional[str],
+) -> List[Tuple[int, SnubaQueryBody, Optional[str]]]:
+    """
+    Add the results of timeseries queries that are fully cached to `results`
+    and return the tail queries of the others.
+    """
+    prefixes = cache.get_many([plan.cache_key for plan in plans.values()])
+    for plan in plans.values():
+        plan.set_prefix(prefixes.get(plan.cache_key))
+    tails = cache.get_many([plan.get_tail_cache_key(plan.tail_start) for plan in plans.values()])
+
+    to_query = []
+    for query_pos, plan in plans.items():
+        if plan.prefix is not None and plan.tail_start == plan.end:
+            tail = {"data": [], "meta": plan.prefix["meta"]}
+        else:
+            cached_tail = tails.get(plan.get_tail_cache_key(plan.tail_start))
+            tail = json.loads(cached_tail) if cached_tail is not None else None
+
+        if tail is None:
+            result = "partial" if plan.prefix is not None else "miss"
+            to_query.append((query_pos, plan.get_tail_query(), None))
+        else:
+            result = "hit"
+            results.append((query_pos, plan.build_result(tail)))
+
+        metric_tags = {"result": result}
+        if referrer:
+            metric_tags["referrer"] = referrer
+        metrics.incr("snuba.timeseries_cache", tags=metric_tags)
+
+    return to_query
+
+
+def _store_timeseries_result(
+    plan: _TimeseriesCachePlan, tail: Mapping[str, Any]
+) -> Mapping[str, Any]:
+    result = plan.build_result(tail)
+
+    tail_start = plan.tail_start
+    prefix = plan.get_prefix_update(tail)
+    if prefix is not None:
+        cache.set(plan.cache_key, json.dumps(prefix), options.get("snuba.timeseries-cache.ttl"))
+        # Later queries read the newly closed buckets from the prefix.
+        tail_start = prefix["end"]
+        tail = {
+            **tail,
+            "data": [row for row in tail["data"] if _to_timestamp(row["time"]) >= tail_start],
+        }
+
+    cache.set(
+        plan.get_tail_cache_key(tail_start),
+        json.dumps(tail),
+        settings.SENTRY_SNUBA_CACHE_TTL_SECONDS,
+    )
+    return result
+
+
 def _bulk_snuba_query(
     snuba_param_list: Sequence[SnubaQueryBody],
     headers: Mapping[str, str],
@@ -810,16 +1106,35 @@ def _bulk_snuba_query(
                         extra={"parent_api": parent_api},
                     )
 
+        # Queries wait for the limiter of their referrer before being submitted,
+        # so that waiting does not hold up threads of the pool.
+        limiter = _get_referrer_limiter(query_referrer)
         if len(snuba_param_list) > 1:
-            query_results = list(
-                _query_thread_pool.map(
-                    query_fn,
-                    [(params, Hub(Hub.current), headers) for params in snuba_param_list],
+            futures = []
+            for params in snuba_param_list:
+                queued_at = time.time()
+                if limiter is not None:
+                    limiter.acquire()
+                futures.append(
+                    _query_thread_pool.submit(
+                        _run_limited_query,
+                        query_fn,
+                        (params, Hub(Hub.current), headers),
+                        limiter,
+                        queued_at,
+                    )
                 )
-            )
+            query_results = [future.result() for future in futures]
         else:
             # No need to submit to the thread pool if we're just performing a single query
-            query_results = [query_fn((snuba_param_list[0], Hub(Hub.current), headers))]
+            queued_at = time.time()
+            if limiter is not None:
+                limiter.acquire()
+            query_results = [
+                _run_limited_query(
+                    query_fn, (snuba_param_list[0], Hub(Hub.current), headers), limiter, queued_at
+                )
+            ]
 
     results = []
     for response, _, reverse in query_results:
@@ -1,5 +1,11 @@
-from sentry.api.serializers import Serializer, serialize
+import threading
+
+import pytest
+
+from sentry.api.serializers import Serializer, get_serializer_memo, serialize, serializer_memo
+from sentry.models import Project, User
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import assert_query_budget
 
 
 class Foo:
@@ -16,6 +22,26 @@ class VariadicSerializer(Serializer):
         return {"kw": kw}
 
 
+class UserIdSerializer(Serializer):
+    def get_attrs(self, item_list, user, **kwargs):
+        users = get_serializer_memo().get_many(User, item_list)
+        return {id: {"user": users.get(id)} for id in item_list}
+
+    def serialize(self, obj, attrs, user, **kwargs):
+        return attrs["user"] and attrs["user"].username
+
+
+class NestedUserIdSerializer(UserIdSerializer):
+    def get_dependencies(self, item_list, user, **kwargs):
+        return {User: [id for ids in item_list for id in ids]}
+
+    def get_attrs(self, item_list, user, **kwargs):
+        return {ids: {"users": serialize(list(ids), user, UserIdSerializer())} for ids in item_list}
+
+    def serialize(self, obj, attrs, user, **kwargs):
+        return attrs["users"]
+
+
 class BaseSerializerTest(TestCase):
     def test_serialize(self):
         assert serialize([]) == []
@@ -53,3 +79,106 @@ class BaseSerializerTest(TestCase):
         user = self.create_user()
         result = serialize(foo, user, VariadicSerializer(), kw="keyword")
         assert result["kw"] == "keyword"
+
+
+class SerializerMemoTest(TestCase):
+    def test_nested_serialize(self):
+        users = [self.create_user(), self.create_user()]
+        ids = (users[0].id, users[1].id, 0)
+
+        # Dependencies are loaded in one query, nested serializers reuse them
+        with self.assertNumQueries(1):
+            result = serialize([ids, ids[:1]], serializer=NestedUserIdSerializer())
+        assert result == [[users[0].username, users[1].username, None], [users[0].username]]
+
+        # Separate calls do not share their memo
+        with self.assertNumQueries(2):
+            serialize(list(ids), serializer=UserIdSerializer())
+            serialize(list(ids), serializer=UserIdSerializer())
+
+    def test_serializer_memo(self):
+        user = self.create_user()
+
+        with self.assertNumQueries(1), serializer_memo() as memo:
+            assert serialize(user.id, serializer=UserIdSerializer()) == user.username
+            assert serialize(user.id, serializer=UserIdSerializer()) == user.username
+            assert get_serializer_memo() is memo
+        assert get_serializer_memo() is not memo
+
+    def test_attach(self):
+        projects = [self.create_project(), self.create_project()]
+        items = [Project.objects.get(id=project.id) for project in projects * 2]
+
+        memo = get_serializer_memo()
+        with self.assertNumQueries(1):
+            memo.attach(items, "organization")
+        with self.assertNumQueries(0):
+            memo.attach(items, "organization")
+            assert [item.organization for item in items] == [self.organization] * 4
+        assert items[0].organization is items[1].organization
+
+    def test_fetch_concurrently(self):
+        user = self.create_user()
+
+        def fetch():
+            return get_serializer_memo().get_many(User, [user.id])
+
+        with self.options({"api.serializers.concurrent-fetches": True}):
+            with self.assertNumQueries(1), serializer_memo() as memo:
+                memo.get_many(User, [user.id])
+                results = Serializer().fetch_concurrently({"first": fetch, "second": fetch})
+        assert results["first"][user.id] is results["second"][user.id]
+
+    def test_assert_query_budget(self):
+        user = self.create_user()
+
+        with assert_query_budget(1):
+            serialize(user.id, serializer=UserIdSerializer())
+
+        with pytest.raises(AssertionError):
+            with assert_query_budget(1):
+                serialize(user.id, serializer=UserIdSerializer())
+                serialize(user.id, serializer=UserIdSerializer())
+
+
+class FetchConcurrentlyTest(TestCase):
+    def test_fetch_concurrently(self):
+        serializer = Serializer()
+        calling_thread = threading.current_thread()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(value):
+            # Only passes once all fetches are running at the same time
+            barrier.wait()
+            return value, threading.current_thread() is calling_thread
+
+        def nested_fetch():
+            return serializer.fetch_concurrently(
+                {"a": threading.current_thread, "b": threading.current_thread}
+            )
+
+        with self.options({"api.serializers.concurrent-fetches": True}):
+            results = serializer.fetch_concurrently(
+                {"first": lambda: fetch(1), "second": lambda: fetch(2), "third": lambda: fetch(3)}
+            )
+            assert results == {"first": (1, True), "second": (2, False), "third": (3, False)}
+
+            nested = serializer.fetch_concurrently({"first": lambda: None, "nested": nested_fetch})
+            assert nested["nested"]["a"] is nested["nested"]["b"]
+
+    def test_fetch_concurrently_disabled(self):
+        serializer = Serializer()
+        calling_thread = threading.current_thread()
+
+        results = serializer.fetch_concurrently(
+            {"first": threading.current_thread, "second": threading.current_thread}
+        )
+        assert results == {"first": calling_thread, "second": calling_thread}
+
+    def test_fetch_concurrently_error(self):
+        def fail():
+            raise ValueError("fetch failed")
+
+        with self.options({"api.serializers.concurrent-fetches": True}):
+            with pytest.raises(ValueError):
+                Serializer().fetch_concurrently({"first": lambda: None, "second": fail})
@@ -1,6 +1,7 @@
 import datetime
 import os
 from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.test import SimpleTestCase
@@ -14,6 +15,7 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    event_search_grammar,
     parse_search_query,
 )
 from sentry.constants import MODULE_ROOT
@@ -221,6 +223,38 @@ class ParseSearchQueryBackendTest(SimpleTestCase):
             ),
         ]
 
+    def test_parse_cache(self):
+        query = "user.email:foo@example.com release:[1.0, 2.0] failure_rate():>0.5"
+        config = SearchConfig()
+        expected = parse_search_query(query, config=config)
+
+        with mock.patch.object(
+            event_search_grammar, "parse", wraps=event_search_grammar.parse
+        ) as parse:
+            result = parse_search_query(query, config=config)
+            assert result == expected
+            assert result is not expected
+            assert not parse.called
+
+            # Modifying the result does not affect the cache
+            result.pop()
+            assert parse_search_query(query, config=config) == expected
+            assert not parse.called
+
+            # Parsed queries are cached per config
+            assert parse_search_query(query, config=SearchConfig()) == expected
+            assert parse.call_count == 1
+
+    def test_parse_cache_skips_dependent_queries(self):
+        config = SearchConfig(date_keys={"time"})
+        for query in ("time:-24h", "last_seen():-24h", "p95():>1s", "failure_count():>50%"):
+            with mock.patch.object(
+                event_search_grammar, "parse", wraps=event_search_grammar.parse
+            ) as parse:
+                parse_search_query(query, config=config)
+                parse_search_query(query, config=config)
+                assert parse.call_count == 2, query
+
     def test_rel_time_filter(self):
         now = timezone.now()
         with freeze_time(now):
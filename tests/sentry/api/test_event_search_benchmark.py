@@ -0,0 +1,48 @@
+"""
+Throughput of parsing search queries, with and without the parse cache. The
+queries are taken from the search syntax fixtures shared with the frontend.
+"""
+import os
+
+import pytest
+
+from sentry.api import event_search
+from sentry.api.event_search import parse_search_query
+from sentry.constants import MODULE_ROOT
+from sentry.exceptions import InvalidSearchQuery
+from sentry.testutils.skips import requires_pytest_benchmark
+from sentry.utils import json
+
+fixtures_path = os.path.join(MODULE_ROOT, os.pardir, os.pardir, "tests/fixtures/search-syntax")
+
+
+def load_queries():
+    queries = []
+    for file in sorted(os.listdir(fixtures_path)):
+        with open(os.path.join(fixtures_path, file)) as fp:
+            for case in json.load(fp):
+                try:
+                    parse_search_query(case["query"])
+                except InvalidSearchQuery:
+                    continue
+                queries.append(case["query"])
+    return queries
+
+
+def parse_queries(queries):
+    for query in queries:
+        parse_search_query(query)
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("cached", [False, True], ids=["uncached", "cached"])
+def test_benchmark_parse_search_query(cached, benchmark):
+    queries = load_queries()
+
+    def setup():
+        if not cached:
+            event_search._parse_cache.clear()
+        return (queries,), {}
+
+    benchmark.pedantic(parse_queries, setup=setup, rounds=50)
+    benchmark.extra_info["queries_per_round"] = len(queries)
@@ -514,6 +514,21 @@ class SequencePaginatorTestCase(SimpleTestCase):
         paginator = SequencePaginator([(i, i) for i in range(n)])
         assert paginator.get_result(5, count_hits=True).hits == n
 
+    def test_extend(self):
+        for reverse in (False, True):
+            data = [(i % 4, i) for i in range(10)]
+            expected = SequencePaginator(data, reverse=reverse)
+
+            paginator = SequencePaginator([], reverse=reverse)
+            paginator.extend(data[::2])
+            paginator.extend([])
+            paginator.extend(data[1::2])
+            assert paginator.scores == expected.scores
+            assert paginator.values == expected.values
+
+            result = paginator.get_result(5, Cursor(2, 1, False))
+            assert list(result) == list(expected.get_result(5, Cursor(2, 1, False)))
+
 
 class GenericOffsetPaginatorTest(TestCase):
     def test_simple(self):
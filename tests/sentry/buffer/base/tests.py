@@ -73,3 +73,51 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch(self):
+        groups = [Group.objects.create(project=Project(id=1)) for _ in range(3)]
+        the_date = timezone.now() + timedelta(days=5)
+        batch = [
+            ({"times_seen": i + 1}, {"id": group.id}, {"last_seen": the_date}, None)
+            for i, group in enumerate(groups)
+        ]
+
+        with self.assertNumQueries(1):
+            self.buf.process_batch(Group, batch)
+
+        for i, group in enumerate(groups):
+            group_ = Group.objects.get(id=group.id)
+            assert group_.times_seen == group.times_seen + i + 1
+            assert group_.last_seen == the_date
+
+    def test_process_batch_without_existing_row(self):
+        group = Group.objects.create(project=Project(id=1))
+        batch = [
+            ({"times_seen": 1}, {"id": group.id, "project_id": 1}, None, None),
+            ({"times_seen": 1}, {"message": "foo bar", "project_id": 1}, None, None),
+        ]
+        self.buf.process_batch(Group, batch)
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen + 1
+        assert Group.objects.get(message="foo bar").times_seen == 2
+
+    @mock.patch("sentry.buffer.base.buffer_incr_complete")
+    def test_process_batch_sends_signal(self, buffer_incr_complete):
+        group = Group.objects.create(project=Project(id=1))
+        self.buf.process_batch(Group, [({"times_seen": 1}, {"id": group.id}, None, None)])
+        buffer_incr_complete.send_robust.assert_called_once_with(
+            model=Group,
+            columns={"times_seen": 1},
+            filters={"id": group.id},
+            extra=None,
+            created=False,
+            sender=Group,
+        )
+
+    @mock.patch("sentry.models.Group.objects.create_or_update")
+    def test_process_batch_signal_only(self, create_or_update):
+        group = Group.objects.create(project=Project(id=1))
+        prev_times_seen = group.times_seen
+        self.buf.process_batch(Group, [({"times_seen": 1}, {"id": group.id}, None, True)])
+        group.refresh_from_db()
+        assert group.times_seen == prev_times_seen
+        assert not create_or_update.called
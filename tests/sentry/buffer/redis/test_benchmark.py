@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+
+from sentry.buffer.redis import RedisBuffer
+from sentry.event_manager import ScoreClause
+from sentry.models import Group
+from sentry.testutils.helpers import override_options
+from sentry.testutils.skips import requires_pytest_benchmark
+
+GROUP = Group(id=123456789, project_id=1, times_seen=1000)
+
+# What `_process_existing_aggregate` buffers for every event of an existing group
+FILTERS = {"id": GROUP.id}
+EXTRA = {
+    "last_seen": datetime(2021, 11, 2, 13, 37, 42, 123456, tzinfo=timezone.utc),
+    "score": ScoreClause(GROUP),
+    "data": {
+        "last_received": 1635860262.123,
+        "type": "error",
+        "metadata": {
+            "type": "TypeError",
+            "value": "Cannot read property 'id' of undefined",
+            "filename": "/static/app/views/organizationGroupDetails.tsx",
+            "function": "GroupDetails.renderContent",
+        },
+        "title": "TypeError: Cannot read property 'id' of undefined",
+        "location": "/static/app/views/organizationGroupDetails.tsx",
+    },
+    "message": "TypeError Cannot read property 'id' of undefined",
+    "culprit": "GroupDetails.renderContent(app/views/organizationGroupDetails)",
+}
+
+
+def encode_increment(buf):
+    return [buf._encode(FILTERS)] + [buf._encode(value) for value in EXTRA.values()]
+
+
+def decode_increment(buf, encoded):
+    return [buf._decode(value) for value in encoded]
+
+
+@requires_pytest_benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("msgpack_encoding", [False, True], ids=["pickle", "msgpack"])
+def test_benchmark_encode(msgpack_encoding, benchmark):
+    buf = RedisBuffer()
+    with override_options({"buffer.msgpack-encoding": msgpack_encoding}):
+        encoded = benchmark(encode_increment, buf)
+    benchmark.extra_info["bytes_per_key"] = sum(len(value) for value in encoded)
+
+
+@requires_pytest_benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("msgpack_encoding", [False, True], ids=["pickle", "msgpack"])
+def test_benchmark_decode(msgpack_encoding, benchmark):
+    buf = RedisBuffer()
+    with override_options({"buffer.msgpack-encoding": msgpack_encoding}):
+        encoded = encode_increment(buf)
+    benchmark(decode_increment, buf, encoded)
+    benchmark.extra_info["bytes_per_key"] = sum(len(value) for value in encoded)
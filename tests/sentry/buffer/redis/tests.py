@@ -132,6 +132,69 @@ class RedisBufferTest(TestCase):
         pending = client.zrange("b:p", 0, -1)
         assert pending == [key.encode("utf-8")]
 
+    def test_incr_saves_to_redis_msgpack(self):
+        now = datetime(2017, 5, 3, 6, 6, 6, 123456, tzinfo=timezone.utc)
+        client = self.buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        columns = {"times_seen": 1}
+        filters = {"pk": 1, "datetime": now}
+        key = self.buf._make_key(model, filters=filters)
+        with self.options({"buffer.msgpack-encoding": True}):
+            self.buf.incr(
+                model, columns, filters, extra={"foo": "bar", "datetime": now, "score": 1.5}
+            )
+        result = client.hgetall(key)
+        # Force keys to strings
+        result = {force_text(k): v for k, v in result.items()}
+
+        for value in result.values():
+            assert not value.startswith(pickle.PROTO)
+        assert self.buf._decode(result.pop("f")) == {"pk": 1, "datetime": now}
+        assert self.buf._decode(result.pop("e+datetime")) == now
+        assert self.buf._decode(result.pop("e+foo")) == "bar"
+        assert self.buf._decode(result.pop("e+score")) == 1.5
+        assert result == {"i+times_seen": b"1", "m": b"unittest.mock.Mock"}
+
+    def test_msgpack_encoding_model_and_score(self):
+        from sentry.event_manager import ScoreClause
+
+        project = self.create_project()
+        with self.options({"buffer.msgpack-encoding": True}):
+            filters = self.buf._encode({"project": project, "key": "foo"})
+            score = self.buf._encode(ScoreClause(Group(id=1)))
+
+        decoded = self.buf._decode(filters)
+        assert decoded["key"] == "foo"
+        assert isinstance(decoded["project"], Project)
+        assert decoded["project"].id == project.id
+        assert isinstance(self.buf._decode(score), ScoreClause)
+
+    def test_msgpack_encoding_falls_back_to_pickle(self):
+        with self.options({"buffer.msgpack-encoding": True}):
+            value = self.buf._encode({"foo": {1, 2}})
+        assert value.startswith(pickle.PROTO)
+        assert self.buf._decode(value) == {"foo": {1, 2}}
+
+    def test_msgpack_encoding_falls_back_to_pickle_for_big_integers(self):
+        with self.options({"buffer.msgpack-encoding": True}):
+            value = self.buf._encode({"foo": 2 ** 64})
+        assert value.startswith(pickle.PROTO)
+        assert self.buf._decode(value) == {"foo": 2 ** 64}
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_does_bubble_up_msgpack(self, process):
+        now = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        with self.options({"buffer.msgpack-encoding": True}):
+            self.buf.incr(
+                Group, {"times_seen": 2}, {"pk": 1}, extra={"foo": "bar", "datetime": now}
+            )
+        self.buf.process("foo")
+        process.assert_called_once_with(
+            Group, {"times_seen": 2}, {"pk": 1}, {"foo": "bar", "datetime": now}, None
+        )
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
@@ -194,6 +257,43 @@ class RedisBufferTest(TestCase):
         self.buf.process("foo")
         process.assert_called_once_with(mock.Mock, {"times_seen": 1}, {"pk": 1}, {}, True)
 
+    def test_process_batch_flush(self):
+        self.buf.batch_flush = True
+        project = self.create_project()
+        groups = [self.create_group(project=project) for _ in range(3)]
+        the_date = timezone.now()
+        for group in groups:
+            self.buf.incr(Group, {"times_seen": 2}, {"id": group.id}, {"last_seen": the_date})
+
+        client = self.buf.cluster.get_routing_client()
+        keys = [key.decode("utf-8") for key in client.zrange("b:p", 0, -1)]
+        assert len(keys) == 3
+
+        self.buf.process(batch_keys=keys)
+
+        for group in groups:
+            group_ = Group.objects.get(id=group.id)
+            assert group_.times_seen == group.times_seen + 2
+            assert group_.last_seen == the_date
+        assert client.zrange("b:p", 0, -1) == []
+        assert not any(client.exists(key) for key in keys)
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process_batch")
+    def test_process_batch_flush_skips_locked_keys(self, process_batch):
+        self.buf.batch_flush = True
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo", {"f": '{"pk": ["i","1"]}', "i+times_seen": "1", "m": "sentry.models.Group"}
+        )
+        client.hmset(
+            "bar", {"f": '{"pk": ["i","2"]}', "i+times_seen": "1", "m": "sentry.models.Group"}
+        )
+        client.set("l:bar", "1")
+        self.buf.process(batch_keys=["foo", "bar"])
+        process_batch.assert_called_once_with(Group, [({"times_seen": 1}, {"pk": 1}, {}, None)])
+        assert client.exists("bar")
+
 
 #    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
 #    def test_incr_uses_signal_only(self):
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import MagicMock, Mock, call, patch
 
 import pytest
 
@@ -8,8 +8,10 @@ from sentry.eventstream.kafka.postprocessworker import (
     ErrorsPostProcessForwarderWorker,
     PostProcessForwarderWorker,
     TransactionsPostProcessForwarderWorker,
+    dispatch_post_process_group_batch_tasks,
 )
 from sentry.eventstream.kafka.protocol import InvalidVersion
+from sentry.testutils.helpers import override_options
 from sentry.utils import json
 
 
@@ -286,3 +288,59 @@ def test_transactions_post_process_forwarder_true_headers(
     )
 
     forwarder.shutdown()
+
+
+@pytest.mark.django_db
+@patch("sentry.eventstream.kafka.postprocessworker.post_process_group_batch")
+@patch("sentry.eventstream.kafka.postprocessworker.dispatch_post_process_group_task")
+def test_post_process_forwarder_batched(
+    dispatch_post_process_group_task, post_process_group_batch, kafka_message_payload
+):
+    """
+    Tests that the post process forwarder dispatches batch tasks when a batch size is set.
+    """
+    messages = []
+    for event_id in ("a" * 32, "b" * 32, "c" * 32):
+        kafka_message_payload[2]["event_id"] = event_id
+        mock_message = Mock()
+        mock_message.value = MagicMock(return_value=json.dumps(kafka_message_payload))
+        mock_message.partition = MagicMock("1")
+        messages.append(mock_message)
+
+    with override_options({"post-process-forwarder:batch-size": 2}):
+        forwarder = PostProcessForwarderWorker(concurrency=2)
+        futures = [forwarder.process_message(message) for message in messages]
+        forwarder.flush_batch(futures)
+
+    assert not dispatch_post_process_group_task.called
+    assert post_process_group_batch.delay.call_args_list == [
+        call(
+            events=[
+                {
+                    "is_new": False,
+                    "is_regression": None,
+                    "is_new_group_environment": False,
+                    "primary_hash": "311ee66a5b8e697929804ceb1c456ffe",
+                    "cache_key": f"e:{event_id}:1",
+                    "group_id": 43,
+                }
+                for event_id in event_ids
+            ]
+        )
+        for event_ids in (("a" * 32, "b" * 32), ("c" * 32,))
+    ]
+
+    forwarder.shutdown()
+
+
+@patch("sentry.eventstream.kafka.postprocessworker.MAX_BATCH_SIZE", 2)
+@patch("sentry.eventstream.kafka.postprocessworker.post_process_group_batch")
+def test_post_process_batch_size_capped(post_process_group_batch):
+    events = [{"cache_key": f"e:{i}:1"} for i in range(5)]
+    dispatch_post_process_group_batch_tasks(events, 10)
+
+    assert post_process_group_batch.delay.call_args_list == [
+        call(events=events[0:2]),
+        call(events=events[2:4]),
+        call(events=events[4:5]),
+    ]
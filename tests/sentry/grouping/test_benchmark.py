@@ -1,6 +1,11 @@
+from unittest import mock
+
 import pytest
 
-from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.api import get_default_enhancements, get_default_grouping_config_dict
+from sentry.grouping.component import GroupingComponent
+from sentry.grouping.enhancer import Enhancements
+from sentry.grouping.enhancer.index import RuleIndex
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
@@ -37,3 +42,77 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+def make_native_frames(count):
+    frames = []
+    for i in range(count):
+        if i % 4 == 0:
+            frames.append(
+                {"function": f"std::panicking::try::{i}", "package": "/usr/lib/libstd.so"}
+            )
+        elif i % 4 == 1:
+            frames.append({"function": f"__pthread_start_{i}", "package": "/lib/libc.so.6"})
+        else:
+            frames.append(
+                {
+                    "function": f"app::module_{i}::handler",
+                    "package": "/Users/sentry/Library/Developer/Xcode/App.app/Contents/MacOS/App",
+                }
+            )
+    return frames
+
+
+def make_javascript_frames(count):
+    frames = []
+    for i in range(count):
+        if i % 3 == 0:
+            frames.append(
+                {
+                    "function": f"Module._compile_{i}",
+                    "abs_path": f"webpack:///./node_modules/react-dom/cjs/react-dom_{i}.js",
+                    "module": "react-dom/cjs/react-dom.development",
+                }
+            )
+        else:
+            frames.append(
+                {
+                    "function": f"Component.render_{i}",
+                    "abs_path": f"https://example.com/static/js/main_{i}.js",
+                    "module": f"static/js/main_{i}",
+                }
+            )
+    return frames
+
+
+STACKTRACES = {
+    "native": make_native_frames(200),
+    "javascript": make_javascript_frames(200),
+}
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("platform", sorted(STACKTRACES))
+@pytest.mark.parametrize("indexed", [True, False], ids=["indexed", "unindexed"])
+def test_benchmark_enhancements(platform, indexed, benchmark):
+    enhancements = Enhancements.loads(get_default_enhancements())
+
+    def setup():
+        frames = [dict(frame) for frame in STACKTRACES[platform]]
+        components = [GroupingComponent(id="frame") for _ in frames]
+        return (frames, components), {}
+
+    def run(frames, components):
+        enhancements.apply_modifications_to_frame(frames, platform, None)
+        enhancements.assemble_stacktrace_component(components, frames, platform)
+
+    if indexed:
+        benchmark.pedantic(run, setup=setup, rounds=50)
+    else:
+        # Evaluate every rule against every frame
+        with mock.patch.object(
+            RuleIndex,
+            "_get_candidate_frames",
+            lambda self, match_frames: [None] * len(self.rules),
+        ):
+            benchmark.pedantic(run, setup=setup, rounds=50)
@@ -2,6 +2,8 @@ import pytest
 
 from sentry.grouping.component import GroupingComponent
 from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer.index import RuleIndex, get_required_literal
+from sentry.grouping.enhancer.matchers import FrameMatch
 
 
 def dump_obj(obj):
@@ -418,3 +420,60 @@ def test_sentinel_and_prefix(action, type):
     actions[0][1].update_frame_components_contributions([component], frames, 0)
     expected = True if action == "+" else False
     assert getattr(component, f"is_{type}_frame") is expected
+
+
+@pytest.mark.parametrize(
+    "key,pattern,literal",
+    [
+        ("function", "std::*", b"std::"),
+        ("function", "*panic*begin*", b"panic"),
+        ("function", "?", None),
+        ("function", "[ab]*", None),
+        ("module", "@babel/core", b"@babel/core"),
+        ("path", "**/node_modules/**", b"node_modules"),
+        ("package", "/usr/lib/**", b"usr"),
+        ("family", "native", None),
+        ("app", "yes", None),
+    ],
+)
+def test_required_literal(key, pattern, literal):
+    assert get_required_literal(FrameMatch.from_key(key, pattern, False)) == literal
+    assert get_required_literal(FrameMatch.from_key(key, pattern, True)) is None
+
+
+def test_rule_index_matches_every_rule():
+    enhancement = Enhancements.from_config_string(
+        """
+        family:native function:std::*                   -app
+        family:native package:/usr/lib/**               -app
+        family:native                                   -group
+        !function:foo*                                  +app
+        path:**/node_modules/**                         -app
+        [ function:foo ] | function:bar                 -app
+        function:bar | [ path:**/baz.js ]               +app
+        app:yes                                         +group
+        """
+    )
+    frames = [
+        {"function": "std::io::read", "package": "/usr/lib/libstd.so", "platform": "native"},
+        {"function": "main", "package": "/Users/sentry/app", "platform": "native"},
+        {"function": "foo", "abs_path": "/app/node_modules/foo.js"},
+        {"function": "bar", "abs_path": "/app/src/bar.js"},
+        {"function": "bar", "abs_path": "/app/src/baz.js", "in_app": True},
+    ]
+    match_frames = [create_match_frame(frame, "javascript") for frame in frames]
+
+    index = RuleIndex(enhancement.rules)
+    indexed = [
+        (rule, matches)
+        for rule, matches in index.iter_matching_frame_actions(match_frames, "javascript", None, {})
+        if matches
+    ]
+    expected = [
+        (rule, matches)
+        for rule in enhancement.rules
+        for matches in [rule.get_matching_frame_actions(match_frames, "javascript", None, {})]
+        if matches
+    ]
+    assert indexed == expected
+    assert len(expected) == 8
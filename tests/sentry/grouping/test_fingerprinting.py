@@ -1,7 +1,16 @@
+from unittest import mock
+
 import pytest
 
-from sentry.grouping.api import get_default_grouping_config_dict
-from sentry.grouping.fingerprinting import FingerprintingRules, InvalidFingerprintingConfig
+from sentry.grouping.api import (
+    get_default_grouping_config_dict,
+    get_fingerprinting_config_for_project,
+)
+from sentry.grouping.fingerprinting import (
+    FingerprintingRules,
+    InvalidFingerprintingConfig,
+    get_required_literal,
+)
 from tests.sentry.grouping import with_fingerprint_input
 
 GROUPING_CONFIG = get_default_grouping_config_dict()
@@ -157,6 +166,78 @@ app:true                                        -> {{ default }}
     )
 
 
+@pytest.mark.parametrize(
+    "key,pattern,literal",
+    [
+        ("type", "DatabaseUnavailable", "DatabaseUnavailable"),
+        ("function", "*assert*failed", "assert"),
+        ("message", "*Connection REFUSED*", "connection refused"),
+        ("path", "**/node_modules/**", "node_modules"),
+        ("tags.server_name", "web-*", "web-"),
+        ("logger", "sentry.[ab]*", None),
+        ("level", "*", None),
+        ("family", "native", None),
+        ("app", "true", None),
+    ],
+)
+def test_required_literal(key, pattern, literal):
+    assert get_required_literal(key, pattern) == literal
+
+
+def test_required_literal_prefilter():
+    rules = FingerprintingRules.from_config_string(
+        """
+type:DatabaseUnavailable                        -> DatabaseUnavailable
+function:assertion_failed module:foo            -> AssertionFailed, foo
+message:"*connection refused*"                  -> connection-refused
+!function:main                                  -> not-main
+"""
+    )
+    event = {
+        "platform": "python",
+        "exception": {
+            "values": [
+                {
+                    "type": "OperationalError",
+                    "value": "Connection REFUSED by host",
+                    "stacktrace": {"frames": [{"function": "main", "module": "foo"}]},
+                }
+            ]
+        },
+    }
+
+    with mock.patch("sentry.grouping.fingerprinting.glob_match") as glob_match:
+        glob_match.return_value = True
+        rule, fingerprint, _ = rules.get_fingerprint_values_for_event(event)
+
+    # The first two rules are ruled out by their literals without matching globs
+    assert rule is rules.rules[2]
+    assert fingerprint == ["connection-refused"]
+    assert {call[0][1] for call in glob_match.call_args_list} == {"*connection refused*"}
+
+    rule, fingerprint, _ = rules.get_fingerprint_values_for_event(event)
+    assert fingerprint == ["connection-refused"]
+
+    event["exception"]["values"][0]["value"] = "Timeout"
+    assert rules.get_fingerprint_values_for_event(event) is None
+
+    event["exception"]["values"][0]["stacktrace"]["frames"][0]["function"] = "handler"
+    rule, fingerprint, _ = rules.get_fingerprint_values_for_event(event)
+    assert fingerprint == ["not-main"]
+
+
+def test_fingerprinting_config_is_cached():
+    project = mock.Mock()
+    project.get_option.return_value = "type:DatabaseUnavailable -> DatabaseUnavailable"
+
+    config = get_fingerprinting_config_for_project(project)
+    assert config.rules[0].fingerprint == ["DatabaseUnavailable"]
+
+    with mock.patch.object(FingerprintingRules, "from_json") as from_json:
+        assert get_fingerprinting_config_for_project(project) is config
+    assert not from_json.called
+
+
 @with_fingerprint_input("input")
 def test_event_hash_variant(insta_snapshot, input):
     config, evt = input.create_event()
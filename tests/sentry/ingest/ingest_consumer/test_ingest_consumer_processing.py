@@ -1,12 +1,15 @@
 import datetime
 import time
 import uuid
+from unittest import mock
 from unittest.mock import Mock
 
 import pytest
 
-from sentry.event_manager import EventManager
+from sentry.event_manager import EventManager, save_transaction_events
+from sentry.eventstore.processing import event_processing_store
 from sentry.ingest.ingest_consumer import (
+    IngestConsumerWorker,
     process_attachment_chunk,
     process_event,
     process_individual_attachment,
@@ -118,6 +121,90 @@ def test_transactions_spawn_save_event_transaction(
     )
 
 
+@pytest.mark.django_db
+def test_transactions_saved_in_batch(
+    default_project,
+    task_runner,
+    preprocess_event,
+    save_event_transaction,
+):
+    project_id = default_project.id
+    now = datetime.datetime.now()
+    start_time = time.time() - 3600
+    messages = []
+    for _ in range(3):
+        event = {
+            "type": "transaction",
+            "timestamp": now.isoformat(),
+            "start_timestamp": now.isoformat(),
+            "spans": [],
+            "contexts": {
+                "trace": {
+                    "parent_span_id": "8988cec7cc0779c1",
+                    "type": "trace",
+                    "op": "foobar",
+                    "trace_id": "a7d67cf796774551a95be6543cacd459",
+                    "span_id": "babaae0d4b7512d9",
+                    "status": "ok",
+                }
+            },
+        }
+        payload = get_normalized_event(event, default_project)
+        messages.append(
+            {
+                "type": "event",
+                "payload": json.dumps(payload),
+                "start_time": start_time,
+                "event_id": payload["event_id"],
+                "project_id": project_id,
+                "remote_addr": "127.0.0.1",
+            }
+        )
+
+    # A redelivered message is only saved once
+    messages.append(dict(messages[0]))
+
+    payload = get_normalized_event({"message": "hello world"}, default_project)
+    messages.append(
+        {
+            "type": "event",
+            "payload": json.dumps(payload),
+            "start_time": start_time,
+            "event_id": payload["event_id"],
+            "project_id": project_id,
+            "remote_addr": "127.0.0.1",
+        }
+    )
+
+    def save_stored_transaction_events(jobs, projects):
+        # Payloads are in the processing store before events reach eventstream
+        for job in jobs:
+            cache_key = f"e:{job['data']['event_id']}:{project_id}"
+            assert event_processing_store.get(cache_key) is not None
+        return save_transaction_events(jobs, projects)
+
+    worker = IngestConsumerWorker(save_transactions_in_batch=True)
+    with mock.patch(
+        "sentry.ingest.ingest_consumer.save_transaction_events",
+        side_effect=save_stored_transaction_events,
+    ) as save_transactions:
+        worker.flush_batch(messages)
+
+    assert not save_event_transaction.delay.called
+    assert len(preprocess_event) == 1
+
+    assert save_transactions.call_count == 1
+    (jobs, projects), _ = save_transactions.call_args
+    assert [job["event"].event_id for job in jobs] == [m["event_id"] for m in messages[:3]]
+    assert projects == {project_id: default_project}
+
+    for message in messages[:3]:
+        cache_key = f"e:{message['event_id']}:{project_id}"
+        data = event_processing_store.get(cache_key)
+        assert data["type"] == "transaction"
+        assert data["event_id"] == message["event_id"]
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("missing_chunks", (True, False))
 def test_with_attachments(default_project, task_runner, missing_chunks, monkeypatch):
@@ -1,6 +1,6 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 
-from sentry.lang.javascript.cache import SourceCache
+from sentry.lang.javascript.cache import ParsedArtifactCache, SourceCache
 
 
 class BasicCacheTest(TestCase):
@@ -37,3 +37,57 @@ class BasicCacheTest(TestCase):
         # fall back to utf-8
         cache.add(url, "foobar".encode("utf-32"), encoding="utf-32")
         assert cache.get(url)[0] == "foobar"
+
+
+class ParsedArtifactCacheTest(TestCase):
+    def test_get_set(self):
+        cache = ParsedArtifactCache("test", max_size=10)
+        assert cache.get("a") is None
+        cache.set("a", "view a", 4)
+        assert cache.get("a") == "view a"
+        assert cache.size == 4
+
+        # replacing an entry does not count it twice
+        cache.set("a", "view a2", 5)
+        assert cache.get("a") == "view a2"
+        assert cache.size == 5
+
+    def test_evicts_least_recently_used(self):
+        cache = ParsedArtifactCache("test", max_size=10)
+        cache.set("a", "view a", 4)
+        cache.set("b", "view b", 4)
+        # touch "a" so that "b" is evicted first
+        assert cache.get("a") == "view a"
+        cache.set("c", "view c", 4)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "view a"
+        assert cache.get("c") == "view c"
+        assert cache.size == 8
+        assert len(cache) == 2
+
+    def test_skips_too_large(self):
+        cache = ParsedArtifactCache("test", max_size=10)
+        cache.set("a", "view a", 4)
+        cache.set("b", "view b", 11)
+        assert cache.get("b") is None
+        assert cache.get("a") == "view a"
+
+    @mock.patch("sentry.lang.javascript.cache.metrics")
+    def test_metrics(self, metrics):
+        cache = ParsedArtifactCache("test", max_size=4)
+        cache.get("a")
+        cache.set("a", "view a", 4)
+        cache.get("a")
+        cache.set("b", "view b", 4)
+
+        assert metrics.incr.mock_calls == [
+            mock.call("sourcemaps.parsed_cache.miss", tags={"type": "test"}, skip_internal=True),
+            mock.call("sourcemaps.parsed_cache.hit", tags={"type": "test"}, skip_internal=True),
+            mock.call(
+                "sourcemaps.parsed_cache.eviction",
+                amount=1,
+                tags={"type": "test"},
+                skip_internal=True,
+            ),
+        ]
@@ -12,6 +12,7 @@ from requests.exceptions import RequestException
 from symbolic import SourceMapTokenMatch
 
 from sentry import http, options
+from sentry.lang.javascript.cache import ParsedArtifactCache
 from sentry.lang.javascript.errormapping import REACT_MAPPING_URL, rewrite_exception
 from sentry.lang.javascript.processor import (
     CACHE_CONTROL_MAX,
@@ -579,6 +580,49 @@ class FetchFileTest(TestCase):
         result2 = fetch_file("/example.js", release=release)
         assert result2 == result
 
+    @responses.activate
+    def test_non_url_with_mapped_release_archive(self):
+        compressed = BytesIO()
+        with zipfile.ZipFile(compressed, mode="w") as zip_file:
+            zip_file.writestr("example.js", b"foo", compress_type=zipfile.ZIP_STORED)
+            zip_file.writestr("example2.js", b"bar" * 100, compress_type=zipfile.ZIP_DEFLATED)
+            zip_file.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "example.js": {
+                                "url": "/example.js",
+                                "headers": {"content-type": "application/json"},
+                            },
+                            "example2.js": {"url": "/example2.js"},
+                        }
+                    }
+                ),
+            )
+
+        release = Release.objects.create(version="1", organization_id=self.project.organization_id)
+        release.add_project(self.project)
+
+        compressed.seek(0)
+        file_ = File.objects.create(name="foo", type="release.bundle")
+        file_.putfile(compressed)
+        update_artifact_index(release, None, file_)
+
+        with override_options({"processing.release-archive-mmap": True}):
+            with pytest.raises(http.BadSource):
+                fetch_file("does-not-exist.js", release=release)
+
+            result = fetch_file("/example.js", release=release)
+            assert result.url == "/example.js"
+            assert result.body == b"foo"
+            assert isinstance(result.body, bytes)
+            assert result.headers == {"content-type": "application/json"}
+            assert result.encoding == "utf-8"
+
+            result = fetch_file("/example2.js", release=release)
+            assert result.body == b"bar" * 100
+
     def _create_archive(self, release, url):
         pseudo_archive = File.objects.create(name="", type="release.bundle")
         pseudo_archive.putfile(BytesIO(b"0123456789"))
@@ -1010,6 +1054,13 @@ class FetchSourcemapTest(TestCase):
         assert sv.get_source() == 'console.log("hello, World!")'
         assert smap_view.get_source_name(0) == "/test.js"
 
+    def test_parsed_sourcemap_cache(self):
+        parsed_cache = ParsedArtifactCache("sourcemap", max_size=1024 * 1024)
+        with patch("sentry.lang.javascript.processor.parsed_sourcemap_cache", parsed_cache):
+            smap_view = fetch_sourcemap(base64_sourcemap)
+            assert len(parsed_cache) == 1
+            assert fetch_sourcemap(base64_sourcemap) is smap_view
+
     def test_broken_base64(self):
         with pytest.raises(UnparseableSourcemap):
             fetch_sourcemap("data:application/json;base64,xxx")
@@ -1372,3 +1423,60 @@ class CacheSourceTest(TestCase):
         # now we have an error
         assert len(processor.cache.get_errors(abs_path)) == 1
         assert processor.cache.get_errors(abs_path)[0] == {"url": map_url, "type": "js_no_source"}
+
+
+class PopulateSourceCacheTest(TestCase):
+    def fetch_file(self, url, **kwargs):
+        if "missing" in url:
+            raise http.BadSource({"type": EventError.JS_MISSING_SOURCE, "url": url})
+        body = b"console.log('hello')\n//# sourceMappingURL=" + base64_sourcemap.encode("utf-8")
+        return http.UrlResult(url, {}, body, 200, None)
+
+    def get_processor(self, filenames):
+        processor = JavaScriptStacktraceProcessor(
+            data={}, stacktrace_infos=None, project=self.create_project()
+        )
+        frames = [{"abs_path": filename, "lineno": 1, "colno": 1} for filename in filenames]
+        return processor, frames
+
+    @patch("sentry.lang.javascript.processor.fetch_sourcemap", wraps=fetch_sourcemap)
+    def test_concurrent(self, mock_fetch_sourcemap):
+        filenames = ["app:///a.js", "app:///b.js", "app:///missing.js"]
+        processor, frames = self.get_processor(filenames)
+
+        with override_options({"processing.sourcemap-fetch-concurrency": 4}), patch(
+            "sentry.lang.javascript.processor.fetch_file", side_effect=self.fetch_file
+        ):
+            processor.populate_source_cache(frames)
+
+        for filename in ("app:///a.js", "app:///b.js"):
+            assert processor.cache.get(filename)
+            assert processor.cache.get_errors(filename) == []
+            assert processor.sourcemaps.get_link(filename)[0] == base64_sourcemap
+        assert processor.cache.get_errors("app:///missing.js") == [
+            {"type": EventError.JS_MISSING_SOURCE, "url": "app:///missing.js"}
+        ]
+        # inlined sources of the sourcemap
+        assert processor.cache.get("/test.js")
+        # the shared sourcemap is only fetched once
+        assert mock_fetch_sourcemap.call_count == 1
+        assert processor.fetch_count == 3
+
+    def test_concurrent_max_fetches(self):
+        filenames = [f"app:///{i}.js" for i in range(5)]
+        processor, frames = self.get_processor(filenames)
+        processor.max_fetches = 3
+
+        with override_options({"processing.sourcemap-fetch-concurrency": 2}), patch(
+            "sentry.lang.javascript.processor.fetch_file", side_effect=self.fetch_file
+        ) as mock_fetch_file:
+            processor.populate_source_cache(frames)
+
+        assert mock_fetch_file.call_count == 3
+        too_many = [
+            filename
+            for filename in filenames
+            if processor.cache.get_errors(filename)
+            == [{"type": EventError.JS_TOO_MANY_REMOTE_SOURCES}]
+        ]
+        assert len(too_many) == 2
@@ -1,11 +1,12 @@
 import os
+from hashlib import sha1
 from io import BytesIO
 from unittest.mock import patch
 
 from django.core.files.base import ContentFile
 from django.db import DatabaseError
 
-from sentry.models import File, FileBlob, FileBlobIndex
+from sentry.models import File, FileBlob, FileBlobIndex, FileBlobOwner
 from sentry.testutils import TestCase
 
 
@@ -25,6 +26,40 @@ class FileBlobTest(TestCase):
         assert my_file1.checksum == my_file2.checksum
         assert my_file1.path == my_file2.path
 
+    def test_from_files(self):
+        contents = [f"chunk {i}".encode() for i in range(20)]
+        files = [ContentFile(c) for c in contents]
+        # duplicates within one request are only uploaded once
+        files.append(ContentFile(contents[0]))
+
+        FileBlob.from_files(files, organization=self.organization)
+
+        checksums = {sha1(c).hexdigest() for c in contents}
+        blobs = FileBlob.objects.filter(checksum__in=checksums)
+        assert len(blobs) == len(contents)
+        for blob in blobs:
+            with blob.getfile() as f:
+                assert sha1(f.read()).hexdigest() == blob.checksum
+
+        assert FileBlobOwner.objects.filter(
+            organization_id=self.organization.id, blob__in=blobs
+        ).count() == len(contents)
+
+    def test_from_files_existing_blobs(self):
+        existing = FileBlob.from_file(ContentFile(b"foo bar"))
+
+        FileBlob.from_files(
+            [ContentFile(b"foo bar"), ContentFile(b"bar baz")], organization=self.organization
+        )
+
+        assert FileBlob.objects.filter(checksum=existing.checksum).count() == 1
+        assert FileBlobOwner.objects.filter(organization_id=self.organization.id).count() == 2
+
+    def test_from_files_checksum_mismatch(self):
+        with self.assertRaises(OSError):
+            FileBlob.from_files([(ContentFile(b"foo bar"), "0" * 40)])
+        assert not FileBlob.objects.exists()
+
     def test_generate_unique_path(self):
         path = FileBlob.generate_unique_path()
         assert path
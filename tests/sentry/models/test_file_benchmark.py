@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+
+from sentry.models import FileBlob
+from sentry.models.file import DEFAULT_BLOB_SIZE
+from sentry.testutils.helpers import override_options
+from sentry.testutils.skips import requires_pytest_benchmark
+
+# A large artifact bundle as uploaded by sentry-cli in one chunk-upload request
+CHUNK_COUNT = 64
+
+
+@pytest.fixture
+def filesystem_storage(tmpdir):
+    with override_options(
+        {
+            "filestore.backend": "filesystem",
+            "filestore.options": {"location": str(tmpdir)},
+        }
+    ):
+        yield
+
+
+@requires_pytest_benchmark
+@pytest.mark.django_db
+def test_benchmark_from_files(filesystem_storage, default_organization, benchmark):
+    def setup():
+        files = [ContentFile(os.urandom(DEFAULT_BLOB_SIZE)) for _ in range(CHUNK_COUNT)]
+        return (files,), {"organization": default_organization}
+
+    benchmark.pedantic(FileBlob.from_files, setup=setup, rounds=5)
+    benchmark.extra_info["megabytes_per_round"] = CHUNK_COUNT * DEFAULT_BLOB_SIZE / 1024 / 1024
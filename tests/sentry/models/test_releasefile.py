@@ -4,7 +4,8 @@ from datetime import datetime, timezone
 from io import BytesIO
 from threading import Thread
 from time import sleep
-from zipfile import ZipFile
+from unittest.mock import patch
+from zipfile import ZIP_BZIP2, ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 import pytest
 
@@ -14,6 +15,7 @@ from sentry.models.distribution import Distribution
 from sentry.models.file import File
 from sentry.models.releasefile import (
     ARTIFACT_INDEX_FILENAME,
+    MappedReleaseArchive,
     _ArtifactIndexGuard,
     delete_from_artifact_index,
     read_artifact_index,
@@ -114,6 +116,85 @@ class ReleaseFileCacheTest(TestCase):
             assert False, "file should not exist"
 
 
+class MappedReleaseArchiveTest(TestCase):
+    def create_archive_file(self):
+        buffer = BytesIO()
+        with ZipFile(buffer, mode="w") as zf:
+            zf.writestr(
+                "manifest.json",
+                json.dumps(
+                    {
+                        "files": {
+                            "foo.js": {"url": "~/foo.js", "headers": {"x-foo": "1"}},
+                            "bar.js": {"url": "~/bar.js"},
+                            "qux.js": {"url": "~/qux.js"},
+                        }
+                    }
+                ),
+            )
+            zf.writestr("foo.js", b"foo" * 100, compress_type=ZIP_STORED)
+            zf.writestr("bar.js", b"bar" * 100, compress_type=ZIP_DEFLATED)
+            zf.writestr("qux.js", b"qux" * 100, compress_type=ZIP_BZIP2)
+
+        buffer.seek(0)
+        file = File.objects.create(name="release-artifacts.zip")
+        file.putfile(buffer)
+        return self.create_release_file(file=file, name="release-artifacts.zip")
+
+    def test_get_file_by_url(self):
+        release_file = self.create_archive_file()
+        archive = ReleaseFile.cache.get_mapped_archive(release_file)
+
+        data, headers = archive.get_file_by_url("~/foo.js")
+        assert isinstance(data, memoryview)
+        assert bytes(data) == b"foo" * 100
+        assert headers == {"x-foo": "1"}
+
+        data, headers = archive.get_file_by_url("~/bar.js")
+        assert data == b"bar" * 100
+        assert headers == {}
+
+        # Other compression methods are read with zipfile
+        data, headers = archive.get_file_by_url("~/qux.js")
+        assert data == b"qux" * 100
+
+        with pytest.raises(KeyError):
+            archive.get_file_by_url("~/baz.js")
+
+    def test_index_is_persisted(self):
+        release_file = self.create_archive_file()
+        archive = ReleaseFile.cache.get_mapped_archive(release_file)
+        assert os.path.exists(archive.index_path)
+
+        # Opening it again does not need the zip file's central directory
+        with patch("sentry.models.releasefile.ReleaseArchive") as mock_archive:
+            archive = MappedReleaseArchive(archive.path)
+            assert bytes(archive.get_file_by_url("~/foo.js")[0]) == b"foo" * 100
+        assert not mock_archive.called
+
+    def test_mapped_archives_are_reused(self):
+        release_file = self.create_archive_file()
+        archive = ReleaseFile.cache.get_mapped_archive(release_file)
+        assert ReleaseFile.cache.get_mapped_archive(release_file) is archive
+
+    def test_evicted_archives_are_closed(self):
+        archive = ReleaseFile.cache.get_mapped_archive(self.create_archive_file())
+        data, _ = archive.get_file_by_url("~/foo.js")
+
+        with patch("sentry.models.releasefile.MAPPED_ARCHIVES_MAX", 1):
+            ReleaseFile.cache.get_mapped_archive(self.create_archive_file())
+
+        # Still referenced contents keep the mapping alive
+        assert not archive._mmap.closed
+        assert bytes(data) == b"foo" * 100
+        data.release()
+        archive.close()
+        assert archive._mmap.closed
+
+        # An archive evicted while in use maps itself again
+        assert bytes(archive.get_file_by_url("~/foo.js")[0]) == b"foo" * 100
+
+
 class ReleaseArchiveTestCase(TestCase):
     def create_archive(self, fields, files, dist=None):
         manifest = dict(
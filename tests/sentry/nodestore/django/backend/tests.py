@@ -51,6 +51,22 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    def test_set_multi(self):
+        Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=compress(b'{"foo": "x"}'))
+
+        self.ns.set_multi(
+            {
+                "d2502ebbd7df41ceba8d3275595cac33": {"foo": "bar"},
+                "5394aa025b8e401ca6bc3ddee3130edc": {"foo": "baz"},
+            }
+        )
+        assert Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data == compress(
+            b'{"foo":"bar"}'
+        )
+        assert Node.objects.get(id="5394aa025b8e401ca6bc3ddee3130edc").data == compress(
+            b'{"foo":"baz"}'
+        )
+
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
 
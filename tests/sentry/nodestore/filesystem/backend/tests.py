@@ -0,0 +1,87 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from sentry.nodestore.filesystem.backend import FilesystemNodeStorage
+
+
+class TestFilesystemNodeStorage:
+    @pytest.fixture(autouse=True)
+    def setup_ns(self, tmpdir):
+        self.path = str(tmpdir)
+        self.ns = FilesystemNodeStorage(path=self.path, shards=2, max_segment_size=1024)
+        self.ns.bootstrap()
+
+    def list_segments(self):
+        return [name for shard in range(self.ns.shards) for name in self.ns._list_segments(shard)]
+
+    def test_get_multi_missing(self):
+        self.ns.set("a" * 32, {"foo": "bar"})
+        assert self.ns.get_multi(["a" * 32, "b" * 32]) == {"a" * 32: {"foo": "bar"}, "b" * 32: None}
+
+    def test_segments_roll_over(self):
+        for i in range(20):
+            self.ns.set(f"node_{i}", {"payload": os.urandom(128).hex()})
+
+        assert len(self.list_segments()) > 2
+        for i in range(20):
+            assert self.ns.get(f"node_{i}")["payload"]
+
+    def test_sorted_index(self):
+        for i in range(20):
+            self.ns.set(f"node_{i}", {"payload": os.urandom(128).hex()})
+        # Overwrite and delete nodes of full segments
+        self.ns.set("node_0", {"foo": "a"})
+        self.ns.delete("node_1")
+
+        # Only the index of the latest segment is kept in memory
+        other = FilesystemNodeStorage(path=self.path, shards=2, max_segment_size=1024)
+        assert other.get("node_0") == {"foo": "a"}
+        assert other.get("node_1") is None
+        assert other.get("node_missing") is None
+        for i in range(2, 20):
+            assert other.get(f"node_{i}")["payload"]
+        for shard, (segment, _, index) in other._logs.items():
+            assert segment == other._list_segments(shard)[-1]
+            assert len(index) < 20
+
+    def test_shared_between_instances(self):
+        other = FilesystemNodeStorage(path=self.path, shards=2)
+        self.ns.set("node_1", {"foo": "a"})
+        assert other.get("node_1") == {"foo": "a"}
+
+        # Overwrites and deletes by one instance are seen by the other
+        self.ns.set("node_1", {"foo": "b"})
+        assert other.get("node_1") == {"foo": "b"}
+        self.ns.delete("node_1")
+        assert other.get("node_1") is None
+
+    def test_cleanup(self):
+        self.ns.set_multi({"old_1": {"foo": "a"}, "old_2": {"foo": "b"}})
+        past = (timezone.now() - timedelta(days=2)).timestamp()
+        for shard in range(self.ns.shards):
+            for segment in self.ns._list_segments(shard):
+                os.utime(os.path.join(self.ns._get_shard_path(shard), segment), (past, past))
+
+        # Prime the index of another instance before the cleanup
+        other = FilesystemNodeStorage(path=self.path, shards=2)
+        assert other.get("old_1") == {"foo": "a"}
+
+        with mock.patch.object(self.ns, "_delete_cache_items") as delete_cache_items:
+            self.ns.cleanup(timezone.now() - timedelta(days=1))
+        assert sorted(id for call in delete_cache_items.call_args_list for id in call[0][0]) == [
+            "old_1",
+            "old_2",
+        ]
+        self.ns.set("new", {"foo": "c"})
+
+        # Segment names are never reused
+        assert self.list_segments() == ["0000000001"]
+        assert other.get_multi(["old_1", "old_2", "new"]) == {
+            "old_1": None,
+            "old_2": None,
+            "new": {"foo": "c"},
+        }
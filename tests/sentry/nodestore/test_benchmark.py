@@ -0,0 +1,152 @@
+"""
+Throughput of writing a batch of saved transactions to nodestore, comparing
+one write per event with a single batched write, and of reading it back.
+"""
+import tracemalloc
+import uuid
+
+import pytest
+
+from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.filesystem.backend import FilesystemNodeStorage
+from sentry.testutils.helpers import override_options
+from sentry.testutils.skips import requires_pytest_benchmark
+from tests.sentry.nodestore.bigtable.backend.tests import MockedBigtableNodeStorage
+
+# Size of a batch of transactions as saved by the ingest consumer
+BATCH_SIZE = 100
+
+
+def make_transaction(event_id):
+    return {
+        "event_id": event_id,
+        "type": "transaction",
+        "transaction": "/api/0/organizations/{organization_slug}/issues/",
+        "contexts": {"trace": {"trace_id": uuid.uuid4().hex, "span_id": event_id[:16]}},
+        "spans": [
+            {
+                "op": "db",
+                "description": f"SELECT * FROM sentry_groupedmessage WHERE id = {i}",
+                "span_id": uuid.uuid4().hex[:16],
+                "start_timestamp": 1600000000 + i,
+                "timestamp": 1600000001 + i,
+            }
+            for i in range(50)
+        ],
+    }
+
+
+@pytest.fixture(
+    params=["bigtable-mocked", pytest.param("django", marks=pytest.mark.django_db), "filesystem"]
+)
+def ns(request, tmpdir):
+    if request.param == "django":
+        ns = DjangoNodeStorage()
+    elif request.param == "filesystem":
+        ns = FilesystemNodeStorage(path=str(tmpdir))
+    else:
+        ns = MockedBigtableNodeStorage(project="test")
+    ns.bootstrap()
+    return ns
+
+
+def make_batch():
+    batch = {}
+    for _ in range(BATCH_SIZE):
+        event_id = uuid.uuid4().hex
+        batch[event_id] = {None: make_transaction(event_id)}
+    return (batch,), {}
+
+
+@requires_pytest_benchmark
+def test_benchmark_set_subkeys(ns, benchmark):
+    def save(batch):
+        for id, data in batch.items():
+            ns.set_subkeys(id, data)
+
+    benchmark.pedantic(save, setup=make_batch, rounds=10)
+    benchmark.extra_info["events_per_round"] = BATCH_SIZE
+
+
+@requires_pytest_benchmark
+def test_benchmark_set_subkeys_multi(ns, benchmark):
+    benchmark.pedantic(ns.set_subkeys_multi, setup=make_batch, rounds=10)
+    benchmark.extra_info["events_per_round"] = BATCH_SIZE
+
+
+@requires_pytest_benchmark
+def test_benchmark_get(ns, benchmark):
+    (batch,), _ = make_batch()
+    ns.set_subkeys_multi(batch)
+
+    def get():
+        # Bypass the nodedata cache to measure the backend itself
+        for id in batch:
+            ns._decode(ns._get_bytes(id), subkey=None)
+
+    benchmark.pedantic(get, rounds=10)
+    benchmark.extra_info["events_per_round"] = BATCH_SIZE
+
+
+@requires_pytest_benchmark
+def test_benchmark_get_multi(ns, benchmark):
+    (batch,), _ = make_batch()
+    ns.set_subkeys_multi(batch)
+    ids = list(batch)
+
+    benchmark.pedantic(ns._get_bytes_multi, args=(ids,), rounds=10)
+    benchmark.extra_info["events_per_round"] = BATCH_SIZE
+
+
+def make_native_event():
+    """
+    A large native event with many threads and a full image list, roughly
+    the shape of what gets stored with an unprocessed copy for reprocessing.
+    """
+    frames = [
+        {
+            "instruction_addr": hex(0x100000000 + i * 64),
+            "package": "/usr/lib/system/libsystem_kernel.dylib",
+            "function": f"function_{i}",
+            "symbol": f"_ZN7mozilla3dom8function_{i}Ev",
+        }
+        for i in range(100)
+    ]
+    return {
+        "platform": "native",
+        "threads": {"values": [{"id": i, "stacktrace": {"frames": frames}} for i in range(50)]},
+        "debug_meta": {
+            "images": [
+                {
+                    "type": "macho",
+                    "code_file": f"/usr/lib/lib{i}.dylib",
+                    "debug_id": str(uuid.uuid4()),
+                    "image_addr": hex(0x100000000 + i * 0x10000),
+                    "image_size": 0x10000,
+                }
+                for i in range(300)
+            ]
+        },
+    }
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("indexed_format", [False, True])
+@pytest.mark.parametrize("subkey", [None, "unprocessed"])
+def test_benchmark_decode(benchmark, indexed_format, subkey):
+    ns = NodeStorage()
+    event = make_native_event()
+    with override_options({"nodestore.indexed-format": indexed_format}):
+        value = ns._encode({None: event, "unprocessed": event})
+
+    tracemalloc.start()
+    try:
+        ns._decode(value, subkey=subkey)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark(ns._decode, value, subkey=subkey)
+    benchmark.extra_info["node_bytes"] = len(value)
+    benchmark.extra_info["peak_memory_bytes"] = peak
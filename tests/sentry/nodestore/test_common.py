@@ -7,6 +7,8 @@ from contextlib import contextmanager
 import pytest
 
 from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.filesystem.backend import FilesystemNodeStorage
+from sentry.testutils.helpers import override_options
 from tests.sentry.nodestore.bigtable.backend.tests import (
     MockedBigtableNodeStorage,
     get_temporary_bigtable_nodestorage,
@@ -20,14 +22,20 @@ def nullcontext(returning):
 
 
 @pytest.fixture(
-    params=["bigtable-mocked", "bigtable-real", pytest.param("django", marks=pytest.mark.django_db)]
+    params=[
+        "bigtable-mocked",
+        "bigtable-real",
+        pytest.param("django", marks=pytest.mark.django_db),
+        "filesystem",
+    ]
 )
-def ns(request):
+def ns(request, tmpdir):
     # backends are returned from context managers to support teardown when required
     backends = {
         "bigtable-mocked": lambda: nullcontext(MockedBigtableNodeStorage(project="test")),
         "bigtable-real": lambda: get_temporary_bigtable_nodestorage(),
         "django": lambda: nullcontext(DjangoNodeStorage()),
+        "filesystem": lambda: nullcontext(FilesystemNodeStorage(path=str(tmpdir))),
     }
 
     ctx = backends[request.param]()
@@ -46,6 +54,31 @@ def test_get_multi(ns):
     assert result == {n[0]: n[1] for n in nodes}
 
 
+def test_set_multi(ns):
+    nodes = {"a" * 32: {"foo": "a"}, "b" * 32: {"foo": "b"}}
+
+    ns.set_multi(nodes)
+    assert ns.get_multi(list(nodes)) == nodes
+
+    # Existing nodes are overwritten
+    nodes = {"a" * 32: {"foo": "c"}, "c" * 32: {"foo": "d"}}
+    ns.set_multi(nodes)
+    assert ns.get_multi(list(nodes)) == nodes
+
+
+def test_set_subkeys_multi(ns):
+    ns.set_subkeys_multi(
+        {
+            "node_1": {None: {"foo": "a"}, "other": {"foo": "b"}},
+            "node_2": {None: {"foo": "c"}},
+        }
+    )
+    assert ns.get("node_1") == {"foo": "a"}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_2") == {"foo": "c"}
+    assert ns.get("node_2", subkey="other") is None
+
+
 def test_set(ns):
     node_id = "d2502ebbd7df41ceba8d3275595cac33"
     data = {"foo": "bar"}
@@ -97,3 +130,16 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@pytest.mark.parametrize("indexed_format", [False, True])
+def test_set_subkeys_format(ns, indexed_format):
+    with override_options({"nodestore.indexed-format": indexed_format}):
+        ns.set_subkeys("node_1", {None: {"foo": "a"}, "other": {"foo": "b"}, "empty": {}})
+
+    # Both formats can be read regardless of the format being written
+    ns._delete_cache_item("node_1")
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+    assert ns.get("node_1", subkey="empty") == {}
+    assert ns.get("node_1", subkey="missing") is None
+    assert ns.get("node_1") == {"foo": "a"}
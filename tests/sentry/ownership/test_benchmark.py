@@ -0,0 +1,78 @@
+"""
+Throughput of matching an event against a large CODEOWNERS file, comparing
+testing every rule with the compiled rules.
+"""
+import pytest
+
+from sentry.ownership.grammar import (
+    CompiledRules,
+    Matcher,
+    Owner,
+    Rule,
+    _iter_frames,
+    _path_to_regex,
+)
+from sentry.testutils.skips import requires_pytest_benchmark
+
+CODEOWNERS_LINES = 2000
+FRAMES = 50
+
+
+def make_rules():
+    owner = Owner("team", "backend")
+    rules = []
+    for i in range(CODEOWNERS_LINES):
+        if i % 10 == 0:
+            pattern = f"*.ext{i}"
+        elif i % 10 == 1:
+            pattern = f"docs_{i}/"
+        elif i % 10 == 2:
+            pattern = f"/static/app/components/component_{i}/**/*.tsx"
+        else:
+            pattern = f"/src/sentry/module_{i}/"
+        rules.append(Rule(Matcher("codeowners", pattern), [owner]))
+    return rules
+
+
+def make_event():
+    frames = [
+        {
+            "filename": f"src/sentry/module_{i * 37 % CODEOWNERS_LINES}/handlers/file_{i}.py",
+            "abs_path": f"/usr/src/sentry/src/sentry/module_{i}/handlers/file_{i}.py",
+        }
+        for i in range(FRAMES)
+    ]
+    return {"exception": {"values": [{"stacktrace": {"frames": frames}}]}}
+
+
+def match_uncompiled(rules, data):
+    # How rules were matched before they were compiled, where the regex for
+    # every pattern was built on every test.
+    matched = []
+    for rule in rules:
+        spec = _path_to_regex.__wrapped__(rule.matcher.pattern)
+        for frame in _iter_frames(data):
+            value = frame.get("filename") or frame.get("abs_path")
+            if value and spec.search(value):
+                matched.append(rule)
+                break
+    return matched
+
+
+@requires_pytest_benchmark
+@pytest.mark.parametrize("compiled", [False, True], ids=["uncompiled", "compiled"])
+def test_benchmark_codeowners(compiled, benchmark):
+    rules = make_rules()
+    data = make_event()
+    expected = match_uncompiled(rules, data)
+    assert expected
+
+    if compiled:
+        compiled_rules = CompiledRules(rules)
+        assert compiled_rules.get_matching_rules(data) == expected
+        benchmark(compiled_rules.get_matching_rules, data)
+    else:
+        benchmark(match_uncompiled, rules, data)
+
+    benchmark.extra_info["rules"] = CODEOWNERS_LINES
+    benchmark.extra_info["frames"] = FRAMES
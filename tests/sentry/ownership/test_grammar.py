@@ -1,12 +1,14 @@
 import pytest
 
 from sentry.ownership.grammar import (
+    CompiledRules,
     Matcher,
     Owner,
     Rule,
     convert_codeowners_syntax,
     convert_schema_to_rules_text,
     dump_schema,
+    load_compiled_schema,
     load_schema,
     parse_code_owners,
     parse_rules,
@@ -560,6 +562,62 @@ def test_codeowners_match_fowardslash(path_details, expected):
     _assert_matcher(Matcher("codeowners", "/"), path_details, expected)
 
 
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"request": {"url": "http://google.com/foo"}},
+        {"tags": [["foo", "bar"]], "stacktrace": {"frames": [{"module": "foo.bar"}]}},
+        {
+            "stacktrace": {
+                "frames": [
+                    {"filename": "app.js"},
+                    {"filename": "src/sentry/models.py", "abs_path": "/usr/src/models.py"},
+                ]
+            }
+        },
+        {
+            "exception": {
+                "values": [
+                    {
+                        "stacktrace": {
+                            "frames": [
+                                {"abs_path": "/src/components/Button.tsx"},
+                                {"filename": "frontend/app.ts", "module": "foo bar"},
+                                {"abs_path": "/SRC/SENTRY/api.py"},
+                            ]
+                        }
+                    }
+                ]
+            }
+        },
+    ],
+)
+def test_compiled_rules(data):
+    rules = parse_rules(fixture_data) + [
+        Rule(Matcher("codeowners", pattern), [Owner("user", "foo@example.com")])
+        for pattern in ("*", "**/components/", "src/", "/src/*", "\\", "/frontend/")
+    ]
+
+    assert CompiledRules(rules).get_matching_rules(data) == [
+        rule for rule in rules if rule.test(data)
+    ]
+
+
+def test_load_compiled_schema():
+    schema = dump_schema(parse_rules(fixture_data))
+
+    compiled = load_compiled_schema(schema, ("test", 1))
+    assert compiled.rules == load_schema(schema)
+    assert load_compiled_schema(schema, ("test", 1)) is compiled
+    assert (
+        load_compiled_schema(dump_schema(parse_rules("*.py #backend")), ("test", 2)) is not compiled
+    )
+
+    with pytest.raises(RuntimeError):
+        load_compiled_schema({**schema, "$version": 2}, ("test", 3))
+
+
 def test_parse_code_owners():
     assert parse_code_owners(codeowners_fixture_data) == (
         ["@getsentry/frontend", "@getsentry/docs", "@getsentry/ecosystem"],
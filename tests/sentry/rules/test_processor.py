@@ -6,13 +6,15 @@ from django.core.cache import cache
 from django.db import DEFAULT_DB_ALIAS, connections
 from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from freezegun import freeze_time
 
+from sentry import tsdb
 from sentry.models import GroupRuleStatus, GroupStatus, Rule, RuleFireHistory
 from sentry.notifications.types import ActionTargetType
 from sentry.rules import init_registry
 from sentry.rules.conditions import EventCondition
 from sentry.rules.filters.base import EventFilter
-from sentry.rules.processor import RuleProcessor
+from sentry.rules.processor import RuleProcessor, compiled_rules
 from sentry.testutils import TestCase
 
 EMAIL_ACTION_DATA = {
@@ -201,6 +203,96 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    def test_compiled_rules_cached(self):
+        rp = RuleProcessor(
+            self.event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+            rules=[self.rule],
+        )
+        assert len(list(rp.apply())) == 1
+        compiled = compiled_rules.get(self.rule)
+        assert compiled is not None
+
+        assert len(list(rp.apply())) == 0
+        assert compiled_rules.get(self.rule) is compiled
+
+        # Changing the rule compiles it again
+        self.rule.update(data={**self.rule.data, "frequency": 5})
+        assert compiled_rules.get(self.rule) is None
+        assert len(list(rp.apply())) == 0
+        assert compiled_rules.get(self.rule).frequency == 5
+
+    @freeze_time()
+    def test_frequency_queries_batched(self):
+        frequency_condition = "sentry.rules.conditions.event_frequency.EventFrequencyCondition"
+        Rule.objects.filter(project=self.event.project).delete()
+        rules = [
+            Rule.objects.create(
+                project=self.event.project,
+                data={
+                    "conditions": [
+                        {"id": frequency_condition, "interval": interval, "value": value}
+                    ],
+                    "actions": [EMAIL_ACTION_DATA],
+                },
+            )
+            for interval, value in (("5m", 0), ("15m", 0), ("1h", 1), ("5m", 0))
+        ]
+
+        # A single event in the latest bucket of the series
+        now = timezone.now()
+        _, series = tsdb.get_optimal_rollup_series(now - timedelta(minutes=5), now)
+        rp = RuleProcessor(
+            self.event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+        with patch("sentry.rules.processor.tsdb", mock.Mock(wraps=tsdb)) as mock_tsdb:
+            mock_tsdb.get_range.return_value = {self.event.group_id: [(series[-1], 1)]}
+            results = list(rp.apply())
+
+        # All three intervals are fetched with one request, and the fourth rule reuses the result
+        # of the first one.
+        assert mock_tsdb.get_range.call_count == 1
+        assert mock_tsdb.get_sums.call_count == 0
+        assert [futures[0].rule for _, futures in results] == [rules[0], rules[1], rules[3]]
+
+    def test_percent_frequency_not_prefetched(self):
+        Rule.objects.filter(project=self.event.project).delete()
+        Rule.objects.create(
+            project=self.event.project,
+            data={
+                "conditions": [
+                    {
+                        "id": "sentry.rules.conditions.event_frequency.EventFrequencyPercentCondition",
+                        "interval": "5m",
+                        "value": 10,
+                    }
+                ],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        # Too few sessions for the issue count to be queried
+        cache.set(f"r.c.spc:{self.event.project_id}-None", 10, 600)
+
+        rp = RuleProcessor(
+            self.event,
+            is_new=True,
+            is_regression=True,
+            is_new_group_environment=True,
+            has_reappeared=True,
+        )
+        with patch("sentry.rules.processor.tsdb", mock.Mock(wraps=tsdb)) as mock_tsdb:
+            assert list(rp.apply()) == []
+
+        assert mock_tsdb.get_range.call_count == 0
+        assert mock_tsdb.get_sums.call_count == 0
+
 
 # mock filter which always passes
 class MockFilterTrue(EventFilter):
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from sentry.sentry_metrics.indexer.models import MetricsKeyIndexer
 from sentry.sentry_metrics.indexer.postgres import PGStringIndexer
 from sentry.testutils.cases import TestCase
@@ -28,3 +30,44 @@ class PostgresIndexerTest(TestCase):
         # test invalid values
         assert PGStringIndexer().resolve("beep") is None
         assert PGStringIndexer().reverse_resolve(1234) is None
+
+    def test_local_cache(self):
+        results = self.indexer.bulk_record(strings=["hello", "hey"])
+
+        with patch.object(MetricsKeyIndexer.objects, "get_many_from_cache") as get_many:
+            assert self.indexer.bulk_record(strings=["hello", "hey"]) == results
+            assert self.indexer.resolve("hello") == results["hello"]
+            assert self.indexer.reverse_resolve(results["hey"]) == "hey"
+        assert not get_many.called
+
+        # A fresh indexer falls back to memcache and the database
+        assert PGStringIndexer().bulk_record(strings=["hello", "hey"]) == results
+
+    def test_negative_cache(self):
+        assert self.indexer.resolve("beep") is None
+        with patch.object(MetricsKeyIndexer.objects, "get_from_cache") as get_from_cache:
+            assert self.indexer.resolve("beep") is None
+        assert not get_from_cache.called
+
+        # Recording a string that was not found before creates it
+        id = self.indexer.record("beep")
+        assert self.indexer.resolve("beep") == id
+        assert MetricsKeyIndexer.objects.get(string="beep").id == id
+
+        # Negative entries expire
+        assert self.indexer.reverse_resolve(1234) is None
+        with patch("sentry.sentry_metrics.indexer.postgres.NEGATIVE_CACHE_TTL", 0):
+            self.indexer._id_cache.set_missing([1234])
+        with patch.object(MetricsKeyIndexer.objects, "get_from_cache") as get_from_cache:
+            get_from_cache.side_effect = MetricsKeyIndexer.DoesNotExist
+            assert self.indexer.reverse_resolve(1234) is None
+        assert get_from_cache.called
+
+    def test_bulk_record_conflicts(self):
+        # Rows inserted by a concurrent consumer are not returned by the insert
+        obj = MetricsKeyIndexer.objects.create(string="hello")
+        result = self.indexer._bulk_record({"hello", "hey"})
+        assert result == {
+            "hello": obj.id,
+            "hey": MetricsKeyIndexer.objects.get(string="hey").id,
+        }
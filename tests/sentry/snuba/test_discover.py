@@ -6465,6 +6465,38 @@ def test_zerofill():
     assert results[7]["time"] == 1546992000
 
 
+def test_zerofill_snql_times():
+    data = [
+        {"time": "2019-01-04T00:00:00+00:00", "transaction": "a", "count": 1},
+        {"time": "2019-01-02T00:00:00+00:00", "transaction": "a", "count": 2},
+        {"time": "2019-01-04T00:00:00Z", "transaction": "b", "count": 3},
+    ]
+    results = discover.zerofill(
+        data, datetime(2019, 1, 2, 0, 0), datetime(2019, 1, 4, 23, 59, 59), 86400, "-time"
+    )
+
+    # The whole result is reversed, including rows within a bucket
+    assert results == [
+        {"time": 1546560000, "transaction": "b", "count": 3},
+        {"time": 1546560000, "transaction": "a", "count": 1},
+        {"time": 1546473600},
+        {"time": 1546387200, "transaction": "a", "count": 2},
+    ]
+
+
+@pytest.mark.parametrize("translated_columns", [{}, {"count_unique_user": "count_unique(user)"}])
+def test_transform_data_invalid_floats(translated_columns):
+    result = {
+        "meta": [{"name": "count_unique_user"}, {"name": "p50"}, {"name": "p95"}],
+        "data": [{"count_unique_user": 1.5, "p50": float("nan"), "p95": float("inf")}],
+    }
+    result = discover.transform_data(result, translated_columns, None)
+
+    name = translated_columns.get("count_unique_user", "count_unique_user")
+    assert [col["name"] for col in result["meta"]] == [name, "p50", "p95"]
+    assert result["data"] == [{name: 1.5, "p50": 0, "p95": None}]
+
+
 class ArithmeticTest(SnubaTestCase, TestCase):
     def setUp(self):
         super().setUp()
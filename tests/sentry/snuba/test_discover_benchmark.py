@@ -0,0 +1,47 @@
+"""
+Throughput of transforming a top events timeseries response, with SnQL
+timestamps, into zerofilled results.
+"""
+from datetime import datetime, timedelta
+
+import pytz
+
+from sentry.eventstore import Filter
+from sentry.snuba import discover
+from sentry.testutils.skips import requires_pytest_benchmark
+
+BUCKETS = 10000
+SERIES = 10
+ROLLUP = 60
+
+
+def make_result(start):
+    times = [(start + timedelta(seconds=i * ROLLUP)).isoformat() for i in range(BUCKETS)]
+    return {
+        "meta": [{"name": "time"}, {"name": "transaction"}, {"name": "count"}, {"name": "p95"}],
+        "data": [
+            {
+                "time": time,
+                "transaction": f"/api/0/endpoint/{series}/",
+                "count": i,
+                "p95": float("nan") if i % 100 == 0 else 1.5 * i,
+            }
+            for series in range(SERIES)
+            for i, time in enumerate(times)
+        ],
+    }
+
+
+@requires_pytest_benchmark
+def test_benchmark_transform_data(benchmark):
+    start = datetime(2021, 1, 1, tzinfo=pytz.utc)
+    end = start + timedelta(seconds=(BUCKETS - 1) * ROLLUP)
+    snuba_filter = Filter(start=start, end=end, rollup=ROLLUP, orderby="time")
+
+    def setup():
+        return (make_result(start), {}, snuba_filter), {}
+
+    result = benchmark.pedantic(discover.transform_data, setup=setup, rounds=5)
+    assert len(result["data"]) == BUCKETS * SERIES
+    benchmark.extra_info["buckets"] = BUCKETS
+    benchmark.extra_info["series"] = SERIES
@@ -1,3 +1,4 @@
+import threading
 from datetime import timedelta
 from unittest import mock
 from unittest.mock import ANY, Mock, patch
@@ -21,10 +22,16 @@ from sentry.models import (
     ProjectOwnership,
     ProjectTeam,
 )
+from sentry.models import Rule as AlertRule
 from sentry.ownership.grammar import Matcher, Owner, Rule, dump_schema
 from sentry.rules import init_registry
 from sentry.tasks.merge import merge_groups
-from sentry.tasks.post_process import post_process_group
+from sentry.tasks.post_process import (
+    PostProcessStage,
+    post_process_group,
+    post_process_group_batch,
+    run_post_process_stages,
+)
 from sentry.testutils import TestCase
 from sentry.testutils.helpers import with_feature
 from sentry.testutils.helpers.datetime import before_now, iso_format
@@ -645,6 +652,164 @@ class PostProcessGroupTest(TestCase):
                 group_id=event.group_id,
             )
 
+    @patch("sentry.rules.processor.RuleProcessor")
+    def test_skip_stage(self, mock_processor):
+        event = self.store_event(data={"message": "testing"}, project_id=self.project.id)
+        cache_key = write_event_to_cache(event)
+
+        with self.options({"post_process.skip-stages": [{"stage": "process_rules"}]}):
+            post_process_group(
+                is_new=True,
+                is_regression=False,
+                is_new_group_environment=True,
+                cache_key=cache_key,
+                group_id=event.group_id,
+            )
+
+        assert not mock_processor.called
+        assert GroupInbox.objects.filter(
+            group=event.group, reason=GroupInboxReason.NEW.value
+        ).exists()
+
+
+class PostProcessGroupBatchTest(TestCase):
+    @patch("sentry.rules.processor.RuleProcessor")
+    @patch("sentry.signals.transaction_processed.send_robust")
+    def test_batch(self, mock_transaction_processed, mock_processor):
+        self.create_project_rule(project=self.project)
+        rules = AlertRule.get_for_project(self.project.id)
+        events = [
+            self.store_event(
+                data={"message": "testing", "fingerprint": [f"group-{i}"]},
+                project_id=self.project.id,
+            )
+            for i in range(2)
+        ]
+        min_ago = iso_format(before_now(minutes=1))
+        transaction = self.store_event(
+            data={
+                "type": "transaction",
+                "timestamp": min_ago,
+                "start_timestamp": min_ago,
+                "contexts": {"trace": {"trace_id": "b" * 32, "span_id": "c" * 16, "op": ""}},
+            },
+            project_id=self.project.id,
+        )
+        cache_keys = [write_event_to_cache(event) for event in events + [transaction]]
+        batch = [
+            {
+                "is_new": True,
+                "is_regression": False,
+                "is_new_group_environment": True,
+                "primary_hash": None,
+                "cache_key": cache_key,
+                "group_id": event.group_id,
+            }
+            for event, cache_key in zip(events + [transaction], cache_keys)
+        ]
+        # The same message delivered twice is only processed once
+        batch.append(dict(batch[0]))
+
+        post_process_group_batch(events=batch)
+
+        assert mock_processor.call_args_list == [
+            mock.call(EventMatcher(event), True, False, True, False, rules=rules)
+            for event in events
+        ]
+        assert mock_transaction_processed.call_count == 1
+        for cache_key in cache_keys:
+            assert event_processing_store.get(cache_key) is None
+
+        # Events that have been processed are skipped
+        post_process_group_batch(events=batch)
+        assert mock_processor.call_count == 2
+
+
+class RunPostProcessStagesTest(TestCase):
+    def setUp(self):
+        self.event = Mock(project_id=self.project.id, project=self.project)
+        self.events = []
+        self.lock = threading.Lock()
+
+    def make_stage(self, name, dependencies=(), fail=False):
+        def func(job):
+            with self.lock:
+                self.events.append(("start", name))
+            if fail:
+                raise Exception("failed")
+            job[name] = True
+            with self.lock:
+                self.events.append(("end", name))
+
+        return PostProcessStage(name, func, dependencies)
+
+    def test_serial(self):
+        stages = [self.make_stage("a"), self.make_stage("b", ("a",)), self.make_stage("c")]
+        job = {"event": self.event}
+        run_post_process_stages(stages, job)
+
+        assert self.events == [
+            ("start", "a"),
+            ("end", "a"),
+            ("start", "b"),
+            ("end", "b"),
+            ("start", "c"),
+            ("end", "c"),
+        ]
+        assert job["a"] and job["b"] and job["c"]
+
+    def test_concurrent(self):
+        c_started = threading.Event()
+
+        def wait_for_c(job):
+            # `a` can only finish once `c` runs at the same time
+            assert c_started.wait(timeout=5)
+            job["a"] = True
+            with self.lock:
+                self.events.append(("end", "a"))
+
+        def start_c(job):
+            c_started.set()
+            with self.lock:
+                self.events.append(("end", "c"))
+
+        stages = [
+            PostProcessStage("a", wait_for_c),
+            self.make_stage("b", ("a", "c")),
+            PostProcessStage("c", start_c),
+        ]
+        job = {"event": self.event}
+        run_post_process_stages(stages, job, concurrency=2)
+
+        assert job["a"] and job["b"]
+        assert self.events[-2:] == [("start", "b"), ("end", "b")]
+
+    def test_failed_and_skipped_stages(self):
+        stages = [
+            self.make_stage("a", fail=True),
+            self.make_stage("b"),
+            self.make_stage("c", ("a", "b")),
+        ]
+        job = {"event": self.event}
+        with self.options({"post_process.skip-stages": [{"stage": "b"}]}):
+            run_post_process_stages(stages, job, concurrency=2)
+
+        assert ("start", "b") not in self.events
+        assert self.events[-2:] == [("start", "c"), ("end", "c")]
+        assert job["c"]
+
+    @patch("sentry.utils.metrics.timing")
+    def test_failed_stage_is_tagged_as_failure(self, timing):
+        stages = [self.make_stage("a", fail=True), self.make_stage("b")]
+        run_post_process_stages(stages, {"event": self.event})
+
+        results = {
+            call[0][3]["stage"]: call[0][3]["result"]
+            for call in timing.call_args_list
+            if call[0][0] == "tasks.post_process_group.stage"
+        }
+        assert results == {"a": "failure", "b": "success"}
+
 
 class PostProcessGroupAssignmentTest(TestCase):
     def make_ownership(self, extra_rules=None):
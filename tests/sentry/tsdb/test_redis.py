@@ -1,5 +1,6 @@
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from unittest import mock
 
 import pytest
 import pytz
@@ -317,6 +318,57 @@ class RedisTSDBTest(TestCase):
         )
         assert results == {1: 0, 2: 0}
 
+    def test_write_batch(self):
+        now = datetime.utcnow().replace(minute=0, second=0, tzinfo=pytz.UTC) - timedelta(hours=1)
+        dts = [now, now + timedelta(minutes=1), now + timedelta(hours=1)]
+        timestamps = [int(to_timestamp(dt)) // 3600 * 3600 for dt in (dts[0], dts[2])]
+        frequency_model = TSDBModel.frequent_environments_by_group
+
+        with mock.patch.object(
+            self.db.cluster, "execute_commands", side_effect=self.db.cluster.execute_commands
+        ) as execute_commands:
+            self.db.write_batch(
+                increments=[
+                    (TSDBModel.project, 1, {"timestamp": dts[0], "environment_id": 1}),
+                    (TSDBModel.project, 1, {"timestamp": dts[1], "count": 2}),
+                    (TSDBModel.project, 2, {"timestamp": dts[2], "environment_id": 2}),
+                ],
+                records=[
+                    (TSDBModel.users_affected_by_group, 1, ("foo",), {"timestamp": dts[0]}),
+                    (
+                        TSDBModel.users_affected_by_group,
+                        1,
+                        ("foo", "bar"),
+                        {"timestamp": dts[1], "environment_id": 1},
+                    ),
+                ],
+                frequencies=[
+                    (frequency_model, {1: {"1": 1, "2": 1}}, {"timestamp": dts[0]}),
+                    (frequency_model, {1: {"2": 2}}, {"timestamp": dts[1]}),
+                ],
+            )
+        assert execute_commands.call_count == 1
+
+        assert self.db.get_range(TSDBModel.project, [1, 2], dts[0], dts[-1], rollup=3600) == {
+            1: [(timestamps[0], 3), (timestamps[1], 0)],
+            2: [(timestamps[0], 0), (timestamps[1], 1)],
+        }
+        assert self.db.get_range(
+            TSDBModel.project, [1], dts[0], dts[-1], rollup=3600, environment_ids=[1]
+        ) == {1: [(timestamps[0], 1), (timestamps[1], 0)]}
+
+        model = TSDBModel.users_affected_by_group
+        assert self.db.get_distinct_counts_totals(model, [1], dts[0], dts[-1], rollup=3600) == {
+            1: 2
+        }
+        assert self.db.get_distinct_counts_totals(
+            model, [1], dts[0], dts[-1], rollup=3600, environment_id=1
+        ) == {1: 2}
+
+        assert self.db.get_most_frequent(frequency_model, [1], dts[0], dts[1], rollup=3600) == {
+            1: [("2", 3.0), ("1", 1.0)]
+        }
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC)
         model = TSDBModel.frequent_issues_by_project
@@ -1,17 +1,21 @@
+import threading
 import unittest
 from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 import pytz
+from django.core.cache import cache
 from django.utils import timezone
 
 from sentry.models import GroupRelease, Project, Release
 from sentry.testutils import TestCase
 from sentry.utils.snuba import (
+    ConcurrencyLimiter,
     Dataset,
     SnubaQueryParams,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
     _prepare_query_params,
     get_json_type,
     get_query_params_to_update_for_projects,
@@ -374,3 +378,126 @@ class QuantizeTimeTest(unittest.TestCase):
                 break
 
         assert i != j
+
+
+class TimeseriesCacheTest(TestCase):
+    rollup = 3600
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        self.queried = []
+
+    def bulk_snuba_query(self, snuba_param_list, headers):
+        results = []
+        for query, _, _ in snuba_param_list:
+            self.queried.append((query["from_date"], query["to_date"]))
+            start = datetime.fromisoformat(query["from_date"])
+            end = datetime.fromisoformat(query["to_date"])
+            buckets = []
+            while start < end:
+                buckets.append({"time": start.isoformat(), "count": start.hour})
+                start += timedelta(seconds=self.rollup)
+            results.append({"data": buckets, "meta": [{"name": "count"}]})
+        return results
+
+    def query(self, start, end):
+        query = {
+            "dataset": "discover",
+            "from_date": start.isoformat(),
+            "to_date": end.isoformat(),
+            "groupby": ["time"],
+            "orderby": "time",
+            "granularity": self.rollup,
+            "aggregations": [["count()", "", "count"]],
+        }
+        with mock.patch(
+            "sentry.utils.snuba._bulk_snuba_query", side_effect=self.bulk_snuba_query
+        ), self.options({"snuba.timeseries-cache.enabled": True}):
+            return list(_apply_cache_and_build_results([(query, None, None)]))[0]
+
+    def expected(self, start, end):
+        return self.bulk_snuba_query(
+            [({"from_date": start.isoformat(), "to_date": end.isoformat()}, None, None)], {}
+        )[0]["data"]
+
+    def test_rolling_range(self):
+        hour = timedelta(hours=1)
+        start = self.now - timedelta(days=1)
+        aligned_start = start.replace(minute=0)
+        aligned_end = self.now.replace(minute=0) + hour
+
+        with mock.patch("time.time", return_value=self.now.timestamp()):
+            result = self.query(start, self.now)
+        assert result["data"] == self.expected(aligned_start, aligned_end)
+        assert self.queried == [(aligned_start.isoformat(), aligned_end.isoformat())]
+
+        # Only the open trailing bucket is queried again once it has moved on
+        self.queried = []
+        with mock.patch("time.time", return_value=(self.now + hour).timestamp()):
+            result = self.query(start + hour, self.now + hour)
+        assert result["data"] == self.expected(aligned_start + hour, aligned_end + hour)
+        assert self.queried == [
+            ((aligned_end - hour).isoformat(), (aligned_end + hour).isoformat())
+        ]
+
+        # The open bucket is cached briefly as well
+        self.queried = []
+        with mock.patch("time.time", return_value=(self.now + hour).timestamp()):
+            result = self.query(start + hour, self.now + hour)
+        assert result["data"] == self.expected(aligned_start + hour, aligned_end + hour)
+        assert self.queried == []
+
+    def test_disabled(self):
+        query = {"from_date": self.now.isoformat(), "groupby": ["time"], "granularity": 60}
+        with mock.patch(
+            "sentry.utils.snuba._bulk_snuba_query", return_value=[{"data": []}]
+        ) as bulk_snuba_query:
+            _apply_cache_and_build_results([(query, None, None)])
+            _apply_cache_and_build_results([(query, None, None)])
+        assert bulk_snuba_query.call_count == 2
+
+
+class ConcurrencyLimiterTest(unittest.TestCase):
+    def test_adapts_limit(self):
+        limiter = ConcurrencyLimiter(4)
+        for _ in range(4):
+            limiter.acquire()
+        assert limiter.in_flight == 4
+
+        limiter.release(1.0, overloaded=True)
+        assert limiter.limit == 2
+        assert limiter.average_latency is None
+
+        limiter.release(1.0, overloaded=False)
+        assert limiter.limit == 2.5
+        assert limiter.average_latency == 1.0
+
+        # Slow queries compared to the average reduce the limit
+        limiter.release(3.0, overloaded=False)
+        assert limiter.limit == 2.25
+
+        limiter.release(1.0, overloaded=True)
+        limiter.acquire()
+        limiter.release(1.0, overloaded=True)
+        assert limiter.limit == 1
+        assert limiter.in_flight == 0
+
+    def test_blocks_at_limit(self):
+        limiter = ConcurrencyLimiter(1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert not acquired.wait(0.1)
+
+        limiter.release(1.0, overloaded=False)
+        assert acquired.wait(1)
+        thread.join()
+        assert limiter.in_flight == 1
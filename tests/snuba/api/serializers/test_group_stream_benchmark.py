@@ -0,0 +1,43 @@
+"""
+Latency of serializing a 100-issue page of the issue stream, comparing
+sequential and concurrent fetches in `StreamGroupSerializerSnuba.get_attrs`.
+"""
+import pytest
+
+from sentry.api.serializers import serialize
+from sentry.api.serializers.models.group import StreamGroupSerializerSnuba
+from sentry.testutils.helpers import override_options
+from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.testutils.skips import requires_pytest_benchmark
+
+PAGE_SIZE = 100
+
+
+@requires_pytest_benchmark
+# Committed data is needed for the database queries of concurrent fetches,
+# which run on their own connections.
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("concurrent", [False, True], ids=["sequential", "concurrent"])
+def test_benchmark_stream_group_serializer(
+    concurrent, benchmark, factories, default_project, default_user, reset_snuba
+):
+    groups = [
+        factories.store_event(
+            data={
+                "fingerprint": [f"group-{i}"],
+                "timestamp": iso_format(before_now(minutes=i % 60)),
+                "environment": "production",
+            },
+            project_id=default_project.id,
+        ).group
+        for i in range(PAGE_SIZE)
+    ]
+    serializer = StreamGroupSerializerSnuba(
+        stats_period="24h", expand=["inbox", "owners", "sessions"]
+    )
+
+    with override_options({"api.serializers.concurrent-fetches": concurrent}):
+        result = benchmark.pedantic(serialize, args=(groups, default_user, serializer), rounds=10)
+
+    assert len(result) == PAGE_SIZE
+    benchmark.extra_info["issues"] = PAGE_SIZE
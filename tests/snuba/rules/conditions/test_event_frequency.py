@@ -1,19 +1,22 @@
 import time
 from copy import deepcopy
 from datetime import timedelta
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 from uuid import uuid4
 
 from django.utils.timezone import now
 from freezegun import freeze_time
 
+from sentry import tsdb
 from sentry.models import Rule
 from sentry.rules.conditions.event_frequency import (
     EventFrequencyCondition,
     EventFrequencyPercentCondition,
     EventUniqueUserFrequencyCondition,
+    FrequencyQuery,
+    FrequencyQueryBatch,
 )
-from sentry.testutils.cases import RuleTestCase, SnubaTestCase
+from sentry.testutils.cases import RuleTestCase, SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
 
 
@@ -402,3 +405,74 @@ class EventFrequencyPercentConditionTestCase(
             }
             rule = self.get_rule(data=data, rule=Rule(environment_id=None))
             self.assertDoesNotPass(rule, event)
+
+
+class FrequencyQueryBatchTest(TestCase, SnubaTestCase):
+    def make_queries(self, method, model, group_id, end, intervals):
+        return [
+            FrequencyQuery(
+                method=method,
+                model=model,
+                key=group_id,
+                start=end - timedelta(minutes=minutes),
+                end=end,
+                environment_id=None,
+            )
+            for minutes in intervals
+        ]
+
+    def test_sums(self):
+        with freeze_time(before_now(minutes=0)):
+            for minutes in (2, 8, 20, 50):
+                event = self.store_event(
+                    data={
+                        "fingerprint": ["group-1"],
+                        "timestamp": iso_format(before_now(minutes=minutes)),
+                    },
+                    project_id=self.project.id,
+                )
+
+            end = now()
+            queries = self.make_queries(
+                "get_sums", tsdb.models.group, event.group_id, end, (5, 15, 60)
+            )
+            batch = FrequencyQueryBatch(Mock(wraps=tsdb), now=end)
+            batch.add(queries + queries[:1])
+            batch.execute()
+
+            assert [batch.get(query) for query in queries] == [1, 2, 4]
+            assert [
+                tsdb.get_sums(
+                    model=query.model, keys=[query.key], start=query.start, end=query.end
+                )[query.key]
+                for query in queries
+            ] == [1, 2, 4]
+            assert batch.tsdb.get_range.call_count == 1
+            assert batch.tsdb.get_sums.call_count == 0
+
+    def test_distinct_counts(self):
+        with freeze_time(before_now(minutes=0)):
+            for minutes in (2, 8):
+                event = self.store_event(
+                    data={
+                        "fingerprint": ["group-1"],
+                        "timestamp": iso_format(before_now(minutes=minutes)),
+                        "user": {"id": uuid4().hex},
+                    },
+                    project_id=self.project.id,
+                )
+
+            end = now()
+            queries = self.make_queries(
+                "get_distinct_counts_totals",
+                tsdb.models.users_affected_by_group,
+                event.group_id,
+                end,
+                (5, 15, 5),
+            )
+            batch = FrequencyQueryBatch(Mock(wraps=tsdb), now=end)
+            batch.add(queries)
+            batch.execute()
+
+            assert [batch.get(query) for query in queries] == [1, 2, 1]
+            assert batch.tsdb.get_distinct_counts_totals.call_count == 2
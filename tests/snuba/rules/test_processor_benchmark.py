@@ -0,0 +1,76 @@
+"""
+Latency of evaluating the issue alert rules of a project with a few hundred
+rules, with and without the rules compiled already.
+"""
+import pytest
+
+from sentry.models import Rule
+from sentry.notifications.types import ActionTargetType
+from sentry.rules.processor import RuleProcessor, compiled_rules
+from sentry.testutils.helpers.datetime import before_now, iso_format
+from sentry.testutils.skips import requires_pytest_benchmark
+
+RULE_COUNT = 250
+INTERVALS = ("1m", "5m", "15m", "1h", "1d", "1w")
+FREQUENCY_CONDITIONS = (
+    "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+    "sentry.rules.conditions.event_frequency.EventUniqueUserFrequencyCondition",
+)
+EMAIL_ACTION_DATA = {
+    "id": "sentry.mail.actions.NotifyEmailAction",
+    "targetType": ActionTargetType.ISSUE_OWNERS.value,
+    "targetIdentifier": None,
+}
+
+
+@requires_pytest_benchmark
+@pytest.mark.django_db
+@pytest.mark.parametrize("compiled", [False, True], ids=["cold", "compiled"])
+def test_benchmark_rule_processor(compiled, benchmark, factories, default_project, reset_snuba):
+    event = factories.store_event(
+        data={
+            "fingerprint": ["group-1"],
+            "timestamp": iso_format(before_now(minutes=1)),
+            "tags": {"browser": "chrome"},
+        },
+        project_id=default_project.id,
+    )
+    # None of the rules fire, so that every round evaluates all of them
+    for i in range(RULE_COUNT):
+        Rule.objects.create(
+            project=default_project,
+            data={
+                "conditions": [
+                    {
+                        "id": "sentry.rules.conditions.tagged_event.TaggedEventCondition",
+                        "key": "browser",
+                        "match": "eq",
+                        "value": "chrome",
+                    },
+                    {
+                        "id": FREQUENCY_CONDITIONS[i % len(FREQUENCY_CONDITIONS)],
+                        "interval": INTERVALS[i % len(INTERVALS)],
+                        "value": 1000 + i,
+                    },
+                ],
+                "action_match": "all",
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+
+    rp = RuleProcessor(
+        event,
+        is_new=False,
+        is_regression=False,
+        is_new_group_environment=False,
+        has_reappeared=False,
+    )
+
+    def setup():
+        if not compiled:
+            compiled_rules.clear()
+
+    result = benchmark.pedantic(lambda: list(rp.apply()), setup=setup, rounds=10)
+
+    assert result == []
+    benchmark.extra_info["rules"] = RULE_COUNT
@@ -27,7 +27,7 @@ from sentry.search.snuba.backend import (
     CdcEventsDatasetSnubaSearchBackend,
     EventsDatasetSnubaSearchBackend,
 )
-from sentry.search.snuba.executors import InvalidQueryForExecutor
+from sentry.search.snuba.executors import InvalidQueryForExecutor, PostgresSnubaQueryExecutor
 from sentry.testutils import SnubaTestCase, TestCase, xfail_if_not_postgres
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.utils.snuba import SENTRY_SNUBA_MAP, Dataset, SnubaError
@@ -1313,6 +1313,30 @@ class EventsSnubaSearchTest(TestCase, SnubaTestCase):
         finally:
             options.set("snuba.search.max-pre-snuba-candidates", prev_max_pre)
 
+    def test_pipelined_chunks(self):
+        snuba_groups = [(self.group1.id, 2), (self.group2.id, 1)]
+
+        def snuba_search(limit, offset, **kwargs):
+            return snuba_groups[offset : offset + limit], len(snuba_groups)
+
+        for pipelined in (False, True):
+            with self.options(
+                {
+                    # Post-filter every chunk
+                    "snuba.search.max-pre-snuba-candidates": 0,
+                    "snuba.search.pipelined-chunks": pipelined,
+                }
+            ), mock.patch.object(
+                PostgresSnubaQueryExecutor, "snuba_search", side_effect=snuba_search
+            ) as search_mock:
+                # The first chunk only contains group1, which is filtered out
+                # in Postgres.
+                results = self.make_query(
+                    search_filter_query="is:resolved", sort_by="freq", limit=1
+                )
+                assert list(results) == [self.group2]
+                assert [call[1]["offset"] for call in search_mock.call_args_list] == [0, 1]
+
     def test_optimizer_enabled(self):
         prev_optimizer_enabled = options.get("snuba.search.pre-snuba-candidates-optimizer")
         options.set("snuba.search.pre-snuba-candidates-optimizer", True)